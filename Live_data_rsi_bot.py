@@ -5,13 +5,13 @@ from collections import deque
 import numpy as np
 import asyncio
 from src.paper_trading.alpaca_manager import AlpacaManager
-from src.paper_trading.helpers.rsi_crossover_helpers import RSI_Calculator
 from src.websockets.eodhd_websocket import EodHd_Websocket
 import nest_asyncio
 from dotenv import load_dotenv
 import os
 from src.paper_trading.helpers.bollinger_band_helper import BollingerBandsCalculator
 from src.paper_trading.helpers.vwap_helper import VWAPCalculator
+from src.paper_trading.helpers.indicator_engine import IndicatorEngine
 nest_asyncio.apply()
 
 
@@ -24,10 +24,8 @@ class AlpacaWebSocket:
         self.stock_list = stock_list
         self.alpaca_manager = AlpacaManager(self.stock_list)
 
-        self.rsi_calculators_50 = {stock: RSI_Calculator(10)
-                                   for stock in stock_list}
-        self.rsi_calculators_250 = {stock: RSI_Calculator(50)
-                                    for stock in stock_list}
+        self.indicators = IndicatorEngine(stock_list).add_rsi(
+            'rsi_50', 10).add_rsi('rsi_250', 50)
         # self.vwap = {stock: None
         #              for stock in stock_list}
 
@@ -42,7 +40,9 @@ class AlpacaWebSocket:
 
     async def connect(self):
         self.conn = StockDataStream(self.api_key, self.api_secret)
-        self.eodhd_websocket.connect_quotes(self.stock_list)
+        # EODHD quotes stream on this event loop rather than in their own threads
+        self.quote_stream = asyncio.create_task(
+            self.eodhd_websocket.stream_quotes(self.stock_list))
 
     # async def schedule_brackets(self):
     #     while True:
@@ -93,8 +93,8 @@ class AlpacaWebSocket:
             # use deviation percentage instead of flat percentage in take profit and stop loss
             # Limit size of buys if deviation percent is too low
 
-            current_rsi_50 = self.rsi_calculators_50[symbol].current_rsi
-            current_rsi_250 = self.rsi_calculators_250[symbol].current_rsi
+            current_rsi_50 = self.indicators.get(symbol, 'rsi_50')
+            current_rsi_250 = self.indicators.get(symbol, 'rsi_250')
 
             print('current_rsi_50', symbol, current_rsi_50)
             print('current_rsi_250', symbol, current_rsi_250)
@@ -196,8 +196,7 @@ class AlpacaWebSocket:
         price = data.price  # data.C is the closing price
 
         print('on trade', symbol, price)
-        self.rsi_calculators_50[symbol].add_price(price)
-        self.rsi_calculators_250[symbol].add_price(price)
+        self.indicators.update(symbol, price, data.size, data.timestamp)
 
         self.current_prices[symbol] = price
 
@@ -8,13 +8,12 @@ from collections import deque
 import numpy as np
 import asyncio
 from src.paper_trading.alpaca_manager import AlpacaManager
-from src.paper_trading.helpers.rsi_crossover_helpers import RSI_Calculator
 from src.websockets.eodhd_websocket import EodHd_Websocket
 import nest_asyncio
 from dotenv import load_dotenv
 import os
 from src.paper_trading.helpers.bollinger_band_helper import BollingerBandsCalculator
-from src.paper_trading.helpers.vwap_helper import VWAPCalculator
+from src.paper_trading.helpers.indicator_engine import IndicatorEngine
 nest_asyncio.apply()
 
 
@@ -26,17 +25,17 @@ class AlpacaWebSocket:
     def __init__(self, stock_list):
         self.stock_list = stock_list
         self.alpaca_manager = AlpacaManager(self.stock_list)
-        self.rsi_calculators_3 = {stock: RSI_Calculator(3)
-                                  for stock in stock_list}
-        self.rsi_calculators_14 = {stock: RSI_Calculator(14)
-                                   for stock in stock_list}
-        self.vwap_calculators = {stock: VWAPCalculator()
-                                 for stock in stock_list}
+        # RSI 3, RSI 14 and session VWAP for every stock, updated once per minute bar
+        self.indicators = IndicatorEngine(stock_list).add_rsi(
+            'rsi_3', 3).add_rsi('rsi_14', 14).add_vwap()
 
         self.api_key = self.ALPACA_API_KEY
         self.api_secret = self.ALPACA_SECRET_KEY
+        # The quote handler makes Alpaca REST calls, so run it off the receive
+        # thread and only act on the latest quote per symbol
         self.eodhd_websocket = EodHd_Websocket(
-            self.handle_incoming_quote_for_position, self.on_minute_bar)
+            self.handle_incoming_quote_for_position, self.on_minute_bar,
+            dispatch_workers=4, conflate_quotes=True)
         self.quotes = {stock: None
                        for stock in stock_list}
 
@@ -72,9 +71,9 @@ class AlpacaWebSocket:
                 # print('no position in', symbol)
                 return
 
-            current_rsi_3 = self.rsi_calculators_3[symbol].get_rsi()
-            current_rsi_14 = self.rsi_calculators_14[symbol].get_rsi()
-            current_vwap = self.vwap_calculators.get(symbol).get_vwap()
+            current_rsi_3 = self.indicators.get(symbol, 'rsi_3')
+            current_rsi_14 = self.indicators.get(symbol, 'rsi_14')
+            current_vwap = self.indicators.get(symbol, 'vwap')
 
             print('exit current rsi 3', current_rsi_3)
             print('exit current rsi 14', current_rsi_14)
@@ -147,10 +146,10 @@ class AlpacaWebSocket:
         symbol = data.get('m')  # data.S is the symbol
         price = data.get('c')  # data.C is the closing price
         volume = data.get('v')
-        self.vwap_calculators.get(symbol).add_tick(price, volume)
-        vwap = self.vwap_calculators.get(symbol).get_vwap()
-        current_rsi_14 = self.rsi_calculators_14.get(symbol).add_price(price)
-        current_rsi_3 = self.rsi_calculators_3.get(symbol).add_price(price)
+        self.indicators.update(symbol, price, volume, data.get('t'))
+        vwap = self.indicators.get(symbol, 'vwap')
+        current_rsi_14 = self.indicators.get(symbol, 'rsi_14')
+        current_rsi_3 = self.indicators.get(symbol, 'rsi_3')
 
         print('handling incoming bar', symbol,
               current_rsi_14, current_rsi_3, vwap)
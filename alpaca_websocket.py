@@ -5,17 +5,18 @@ from collections import deque
 import numpy as np
 import asyncio
 from src.paper_trading.alpaca_manager import AlpacaManager
-from src.paper_trading.helpers.rsi_crossover_helpers import RSI_Calculator
 from src.websockets.eodhd_websocket import EodHd_Websocket
 import nest_asyncio
 from dotenv import load_dotenv
 import os
 from src.paper_trading.helpers.bollinger_band_helper import BollingerBandsCalculator
 from src.paper_trading.helpers.vwap_helper import VWAPCalculator
+from src.paper_trading.helpers.indicator_engine import IndicatorEngine
+from src.paper_trading.exit_engine import ExitEngine, ExitRules
 nest_asyncio.apply()
 
 
-# make exit check evcery 20 seconds
+# exits are checked on every quote
 # if we've been in position for more than 5 minutes and losing more than .5% exit
 # if we've been in position for more than 5 minutes and winning more than 1% exit
 # if we've made 20 dollars exit
@@ -30,10 +31,8 @@ class AlpacaWebSocket:
     def __init__(self, stock_list):
         self.stock_list = stock_list
         self.alpaca_manager = AlpacaManager(self.stock_list)
-        self.rsi_calculators_3 = {stock: RSI_Calculator(3)
-                                  for stock in stock_list}
-        self.rsi_calculators_14 = {stock: RSI_Calculator(14)
-                                   for stock in stock_list}
+        self.indicators = IndicatorEngine(stock_list).add_rsi(
+            'rsi_3', 3).add_rsi('rsi_14', 14)
         self.vwap = {stock: None
                      for stock in stock_list}
         self.api_key = self.ALPACA_API_KEY
@@ -42,111 +41,29 @@ class AlpacaWebSocket:
             self.handle_incoming_quote_for_position)
         self.quotes = {stock: None
                        for stock in stock_list}
+        # Take profit at +0.5% (partially if the bid is smaller than the position),
+        # stop at -5%, $15 profit under $2500, $10 loss, or an overbought rsi
+        self.exit_engine = ExitEngine(self.alpaca_manager, ExitRules(
+            take_profit_pct=.005, stop_loss_pct=.05, take_profit_pl=15, max_take_profit_value=2500,
+            stop_loss_pl=10, rsi_exits={'rsi_14': 70, 'rsi_3': 80}, partial_take_profit=True),
+            indicators=self.indicators)
 
     async def connect(self):
         self.conn = StockDataStream(self.api_key, self.api_secret)
-        self.eodhd_websocket.connect_quotes(self.stock_list)
+        # EODHD quotes stream on this event loop rather than in their own threads
+        self.quote_stream = asyncio.create_task(
+            self.eodhd_websocket.stream_quotes(self.stock_list))
 
     async def log_rsi_for_stock(self, stock):
         while True:
             await asyncio.sleep(60)  # Wait for 10 seconds
-            rsi_calculator = self.rsi_calculators_3.get(stock)
-            if rsi_calculator:
-                # Assuming you have a method to get the current RSI
-                rsi_value = rsi_calculator.get_rsi()
-                print(f"Current RSI for {stock}: {rsi_value}")
+            rsi_value = self.indicators.get(stock, 'rsi_3')
+            print(f"Current RSI for {stock}: {rsi_value}")
 
     # Create stocks to avoid list when the stock has broken out of the support or resistance hold it in a list for 3 minutes
-    async def handle_exiting_positions_poll(self, symbol):
-        while True:
-            await asyncio.sleep(20)
-            try:
-
-                position = self.alpaca_manager.get_position_by_symbol(symbol)
-                print('position', position)
-                if position is None:
-                    return
-
-                quote = self.quotes[symbol]
-                bid_price = float(quote['bid_price'])
-                bid_size = int(quote['bid_size'])
-
-                current_rsi_3 = self.rsi_calculators_3[symbol].get_rsi()
-                current_rsi_14 = self.rsi_calculators_14[symbol].get_rsi()
-                current_vwap = self.vwap.get(symbol)
-
-                unrealized_plpc = float(position.unrealized_plpc)
-                unrealized_pl = float(position.unrealized_pl)
-                entry_price = float(position.avg_entry_price)
-                market_value = float(position.market_value)
-
-                qty = int(position.qty)
-
-                print('handling exiting positions poll', symbol, bid_price, bid_size, current_rsi_3,
-                      current_rsi_14, current_vwap, unrealized_plpc, unrealized_pl, entry_price, qty, market_value)
-
-                if entry_price * 1.01 < bid_price and qty > bid_size:
-                    # Sell the amount of shares that are bid
-                    limit_order_size = bid_size > qty and qty or bid_size
-                    print('bid price is higher than take profit, exiting position partially',
-                          symbol, bid_price, bid_size)
-                    self.alpaca_manager.create_limit_order(
-                        symbol, limit_order_size, OrderSide.SELL, TimeInForce.DAY, bid_price)
-                    return
-
-                if entry_price * 1.01 < bid_price and qty < bid_size:
-                    # Sell the amount of shares that are bid
-                    print('closing position way up',
-                          symbol, bid_price, bid_size)
-                    self.alpaca_manager.close_position_by_symbol(symbol)
-                    return
-
-                if entry_price * 1.005 < bid_price and qty < bid_size:
-                    print(
-                        'bid price is higher than entry price * 1.005 and qty', symbol)
-                    self.alpaca_manager.close_position_by_symbol(symbol)
-                    return
-
-                if entry_price * 1.005 < bid_price and qty > bid_size:
-                    print(
-                        'bid price is higher than entry price * 1.005 and qty', symbol)
-                    limit_order_size = bid_size > qty and qty or bid_size
-                    self.alpaca_manager.create_limit_order(
-                        symbol, limit_order_size, OrderSide.SELL, TimeInForce.DAY, bid_price)
-                    return
-
-                if unrealized_plpc > .005:
-                    print('rsi is greater than 70, selling', symbol)
-                    # for now
-                    self.alpaca_manager.close_position_by_symbol(symbol)
-                    return
-
-                if unrealized_plpc < -.05:
-                    print('stop loss hit', symbol)
-                    self.alpaca_manager.close_position_by_symbol(symbol)
-                    return
-
-                if unrealized_pl > 15 and market_value < 2500:
-                    print('unrealized pl is greater than 15 selling', symbol)
-                    self.alpaca_manager.close_position_by_symbol(symbol)
-                    return
-
-                if unrealized_pl < -10 < market_value:
-                    print('has lost 10 dollars sell', symbol)
-                    self.alpaca_manager.close_position_by_symbol(symbol)
-                    return
-
-                if current_rsi_14 > 70 or current_rsi_3 > 80:
-                    print('rsi is greater than 70, selling', symbol)
-                    # for now
-                    self.alpaca_manager.close_position_by_symbol(symbol)
-                    return
-
-            except Exception as e:
-                print('error handling exiting positions poll', e)
-
     def handle_incoming_quote_for_position(self, symbol, quote):
         self.quotes[symbol] = quote
+        self.exit_engine.on_quote(symbol, quote)
         return
 
     # def handle_exit_conditions(self, entry_price, qty, symbol, bid_price, bid_size, unrealized_plpc, current_rsi_14, current_rsi_3):
@@ -205,8 +122,9 @@ class AlpacaWebSocket:
         vwap = data.vwap
         self.vwap[symbol] = vwap
 
-        current_rsi_3 = self.rsi_calculators_3.get(symbol).add_price(price)
-        current_rsi_14 = self.rsi_calculators_14.get(symbol).add_price(price)
+        self.indicators.update(symbol, price, data.volume, data.timestamp)
+        current_rsi_3 = self.indicators.get(symbol, 'rsi_3')
+        current_rsi_14 = self.indicators.get(symbol, 'rsi_14')
         current_vwap = self.vwap.get(symbol)
 
         print('current rsi 3', current_rsi_3)
@@ -245,10 +163,14 @@ class AlpacaWebSocket:
             await self.connect()
         except Exception as e:
             print('error connecting', e)
+        try:
+            # Open positions are read once; trade updates keep them current
+            self.exit_engine.start()
+        except Exception as e:
+            print('error starting exit engine', e)
         # # Start the RSI logging task
         for symbol in self.stock_list:
             # asyncio.create_task(self.log_rsi_for_stock(symbol))
-            asyncio.create_task(self.handle_exiting_positions_poll(symbol))
 
             print('conned')
             try:
@@ -1,46 +1,58 @@
 from src.paper_trading.alpaca_manager import AlpacaManager
+from src.paper_trading.exit_engine import ExitEngine, ExitRules
+from src.websockets.eodhd_websocket import EodHd_Websocket
 import asyncio
 import datetime
+import sys
 
 
 class BracketManager:
-    def __init__(self):
-        self.alpaca_manager = AlpacaManager()
+    def __init__(self, stock_list):
+        self.stock_list = stock_list
+        self.alpaca_manager = AlpacaManager(stock_list)
+        # Take profit at +0.5% and stop at -0.2% from the entry price
+        self.exit_engine = ExitEngine(self.alpaca_manager, ExitRules(
+            take_profit_pct=.005, stop_loss_pct=.002))
+        self.eodhd_websocket = EodHd_Websocket(self.handle_incoming_quote)
+        self.watching = set(stock_list)
+        self.loop = None
 
     def run(self):
         asyncio.run(self.handle_exit_via_PL())
 
+    def handle_incoming_quote(self, symbol, quote):
+        self.exit_engine.on_quote(symbol, quote)
+
+    def handle_trade_update(self, trade):
+        # Runs on the trade updates thread; a fill in a symbol we have no
+        # quotes for opened a position, so start streaming it
+        event = getattr(trade.event, 'value', trade.event)
+        symbol = trade.order.symbol
+        if event not in ('fill', 'partial_fill') or symbol in self.watching:
+            return
+        self.watching.add(symbol)
+        print('watching', symbol, 'after a fill')
+        asyncio.run_coroutine_threadsafe(
+            self.eodhd_websocket.subscribe_quotes([symbol]), self.loop)
+
     async def handle_exit_via_PL(self):
-        while True:
-            await asyncio.sleep(60)
-            print('checking open positions', datetime.datetime.now())
-            try:
-                positions = self.alpaca_manager.get_positions()
-                for position in positions:
-                    print('checking position', position.symbol)
-                    entry_price = position.avg_entry_price
-                    take_profit_price = round(
-                        float(entry_price) * 1.005, 2)
-                    stop_loss_price = round(float(entry_price) * .998, 2)
-                    current_price = float(position.current_price)
-                    if (current_price > take_profit_price):
-                        print('price is higher than take profit exiting',
-                              position.symbol, 'Profit', position.unrealized_pl)
-                        self.alpaca_manager.close_position_by_symbol(
-                            position.symbol)
-                        return
-
-                    elif (current_price < stop_loss_price):
-                        print('price is lower than stop loss exiting',
-                              position.symbol, 'Loss', position.unrealized_pl)
-                        self.alpaca_manager.close_position_by_symbol(
-                            position.symbol)
-                        return
-                    print('no action taken on', position.symbol)
-
-            except Exception as e:
-                print('error handling open positions', e)
-                return
-
-
-asyncio.run(BracketManager().handle_exit_via_PL())
+        print('checking open positions', datetime.datetime.now())
+        self.loop = asyncio.get_running_loop()
+        self.alpaca_manager.subscribe_trade_updates(self.handle_trade_update)
+        try:
+            # Open positions are read once; trade updates keep them current
+            self.exit_engine.start()
+        except Exception as e:
+            print('error loading open positions', e)
+            return
+        # The watch list and the open positions now; handle_trade_update adds
+        # symbols filled later
+        self.watching |= set(self.exit_engine.positions)
+        symbols = sorted(self.watching)
+        print('watching', symbols)
+        await self.eodhd_websocket.stream_quotes(symbols)
+
+
+if __name__ == '__main__':
+    # Symbols to watch besides the open positions, e.g. today's order list
+    BracketManager(sys.argv[1:]).run()
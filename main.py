@@ -1,8 +1,11 @@
 # main.py
 from src.entries.moving_average_crossover_entry import run_moving_average_strategy
-from src.data_fetchers.eodhd.get_baseline import fetch_baseline_data
-from src.data_fetchers.eodhd.update_eod_data import fetch_and_update_data
+from src.data_fetchers.eodhd.fetch_pipeline import fetch_baseline_data
+from src.data_fetchers.eodhd.update_eod_data import fetch_and_update_data, get_store
+from src.data_store.market_data_store import market_data_store
 from dotenv import load_dotenv
+from datetime import datetime
+import asyncio
 import os
 
 load_dotenv()
@@ -27,17 +30,28 @@ def main():
 
 def start_baseline_fetch():
     try:
-        fetch_baseline_data(api_token, tickers_json_path, output_folder)
-        return True
+        # Concurrent and resumable; the bars land in the Parquet store next to output_folder
+        summary = asyncio.run(fetch_baseline_data(
+            api_token, tickers_json_path, store=get_store(output_folder)))
+        return not summary['failed']
     except Exception as e:
         print(f"An error occurred while fetching baseline data {e}")
         return None
     
-def update_baseline_data():
+def update_baseline_data(date=None):
     try:
-        fetch_and_update_data(api_token, tickers_json_path, output_folder)
-        return True
+        exchanges = get_store(output_folder).exchanges()
+        summary = asyncio.run(fetch_and_update_data(
+            output_folder, exchanges, date or datetime.now().strftime('%Y-%m-%d')))
+        return not summary['failed']
     except Exception as e:
         print(f"An error occurred while updating baseline data {e}")
         return None
-    
+
+def migrate_market_data():
+    try:
+        market_data_store.migrate_from_csv()
+        return True
+    except Exception as e:
+        print(f"An error occurred while migrating baseline data to Parquet {e}")
+        return None
@@ -17,6 +17,7 @@ from alpaca.trading.requests import GetAssetsRequest, MarketOrderRequest
 from alpaca.data.requests import StockLatestTradeRequest
 from alpaca.trading.enums import OrderSide, TimeInForce, OrderClass
 from src.data_fetchers.alpaca.hourly_bars_helper import fetch_minute_stock_bars_for_rsi_divergence_start_up, fetch_latest_30min_bar
+from src.paper_trading.helpers.rsi_divergence_helper import RSIDivergenceState
 from dotenv import load_dotenv
 import os
 import nest_asyncio
@@ -62,7 +63,21 @@ class rsi_divergence_trading_strategy:
         #                for stock in self.stock_list}
         self.alpaca_manager = AlpacaManager(self.stock_list)
 
-        self.dfs = {stock: None for stock in stock_list}
+        self.indicator_states = {stock: self.new_indicator_state()
+                                 for stock in stock_list}
+        self.loaded = {stock: False for stock in stock_list}
+
+    @staticmethod
+    def new_indicator_state():
+        # 5 bar rsi of the minute bars and its 14 bar sma, as calculate_rsi(df, 5) and rolling_mean(14)
+        return RSIDivergenceState(5, 14, max_bars=1000)
+
+    def load_history(self, stock, df):
+        state = self.new_indicator_state()
+        state.load(df)
+        self.indicator_states[stock] = state
+        self.loaded[stock] = True
+        print('last row', state.last_bar())
 
     # def handle_incoming_quote_for_position(self, symbol, quote):
     #     self.quotes[symbol] = quote
@@ -110,12 +125,8 @@ class rsi_divergence_trading_strategy:
             'vwap': vwap,
         }
 
-        df = pd.DataFrame(data_to_append, index=['datetime'])
-
-        df.drop(columns=['datetime'], inplace=True)
-        pl_df = pl.from_pandas(df)
-
-        pl.concat([self.dfs[stock], pl_df])
+        # Updates the rsi and rsi sma from this bar and keeps it in the bounded bar buffer
+        self.indicator_states[stock].add_bar(data_to_append)
 
         await self.handle_positions_for_rsi_divergence(symbol)
 
@@ -123,19 +134,14 @@ class rsi_divergence_trading_strategy:
         try:
             for stock in self.stock_list:
                 df = fetch_minute_stock_bars_for_rsi_divergence_start_up(stock)
-                self.dfs[stock] = df
-                print('last row', self.dfs[stock])
+                self.load_history(stock, df)
         except Exception as e:
             print('error preloading', e)
 
     async def get_minute_data_for_stock(self, stock):
         try:
             df = fetch_minute_stock_bars_for_rsi_divergence_start_up(stock)
-            self.dfs[stock] = df
-            # self.dfs[stock]['timestamp'] = pd.to_datetime(
-            #     self.dfs[stock]['timestamp'])
-            # self.dfs[stock].set_index('timestamp', inplace=True)
-            print('last row', self.dfs[stock])
+            self.load_history(stock, df)
         except Exception as e:
             print('error getting minute data for stock', e)
 
@@ -147,7 +153,7 @@ class rsi_divergence_trading_strategy:
             return
         for stock in self.stock_list:
             try:
-                if self.dfs[stock] is None:
+                if not self.loaded[stock]:
                     print('no data for', stock)
                     await self.get_minute_data_for_stock(stock)
 
@@ -247,22 +253,13 @@ class rsi_divergence_trading_strategy:
 
     async def handle_positions_for_rsi_divergence(self, stock):
         print('handling positions for', stock)
-        if self.dfs[stock] is None:
+        if not self.loaded[stock]:
             return
-        df = self.dfs[stock]
-        rsi = calculate_rsi(df, 5)
-        df_with_rsi = df.with_columns(
-            pl.Series(name='rsi', values=rsi))
-
-        # df['rsi_sma'] = df['rsi'].rolling(window=14).mean()
-
-        df_with_rsi_sma = df_with_rsi.with_columns(pl.Series(name='rsi_sma', values=df_with_rsi['rsi'].rolling_mean(
-            window_size=14)))
-
-        current_rsi = df_with_rsi_sma.tail(1)['rsi']
-        current_rsi_sma = df_with_rsi_sma.tail(1)['rsi_sma']
+        state = self.indicator_states[stock]
+        current_rsi = state.rsi
+        current_rsi_sma = state.rsi_sma
 
-        print('current_rsi', current_rsi_sma.tail(1))
+        print('current_rsi', current_rsi, 'current_rsi_sma', current_rsi_sma)
 
         short_threshold = current_rsi_sma - 20
         long_threshold = current_rsi_sma + 20
@@ -270,8 +267,8 @@ class rsi_divergence_trading_strategy:
         is_current_rsi_20_below_sma = current_rsi < short_threshold  # Short Signal
         is_current_rsi_20_above_sma = current_rsi > long_threshold  # Long Signal
 
-        print('long_signal', is_current_rsi_20_above_sma[0])
-        print('short_signal', is_current_rsi_20_below_sma[0])
+        print('long_signal', is_current_rsi_20_above_sma)
+        print('short_signal', is_current_rsi_20_below_sma)
 
         is_market_open = self.alpaca_manager.is_market_open()
 
@@ -285,9 +282,9 @@ class rsi_divergence_trading_strategy:
                 current_position = None
             try:
                 await self.handle_long_positions(
-                    stock, is_current_rsi_20_above_sma[0], current_position)
+                    stock, is_current_rsi_20_above_sma, current_position)
                 await self.handle_short_positions(
-                    stock, is_current_rsi_20_below_sma[0], current_position)
+                    stock, is_current_rsi_20_below_sma, current_position)
             except Exception as e:
                 print('error handling positions', e)
                 return
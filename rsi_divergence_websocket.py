@@ -14,6 +14,7 @@ from alpaca.data.enums import DataFeed
 from alpaca.trading.requests import GetAssetsRequest, MarketOrderRequest, LimitOrderRequest, StopOrderRequest, StopLimitOrderRequest, GetOrdersRequest, ClosePositionRequest
 from alpaca.trading.enums import OrderSide, TimeInForce, OrderClass
 from src.data_fetchers.alpaca.hourly_bars_helper import fetch_hourly_stock_bars_for_rsi_divergence_start_up, fetch_latest_30min_bar
+from src.paper_trading.helpers.rsi_divergence_helper import RSIDivergenceState
 from dotenv import load_dotenv
 import os
 import nest_asyncio
@@ -62,7 +63,21 @@ class rsi_divergence_trading_strategy:
             self.handle_incoming_quote_for_position)
         self.current_hours_minute_bar = {stock: []
                                          for stock in self.stock_list}
-        self.dfs = {stock: None for stock in stock_list}
+        self.indicator_states = {stock: self.new_indicator_state()
+                                 for stock in stock_list}
+        self.loaded = {stock: False for stock in stock_list}
+
+    @staticmethod
+    def new_indicator_state():
+        # doubling the rsi window to 10 and the sma window to 28 because we are using 30 min bars
+        return RSIDivergenceState(10, 28, max_bars=500)
+
+    def load_history(self, stock, df):
+        state = self.new_indicator_state()
+        state.load(df)
+        self.indicator_states[stock] = state
+        self.loaded[stock] = True
+        print('last row', state.last_bar())
 
     def handle_incoming_quote_for_position(self, symbol, quote):
 
@@ -89,7 +104,7 @@ class rsi_divergence_trading_strategy:
         # Get minute bar for each
         print('minute bar', minute_bar)
         print('most recent quote', self.quotes[minute_bar.symbol])
-        print('df last row', self.dfs[minute_bar.symbol].iloc[-1])
+        print('last bar', self.indicator_states[minute_bar.symbol].last_bar())
 
         # timestamp = minute_bar.t
         # symbol = minute_bar.s
@@ -124,19 +139,14 @@ class rsi_divergence_trading_strategy:
         try:
             for stock in self.stock_list:
                 df = fetch_hourly_stock_bars_for_rsi_divergence_start_up(stock)
-                self.dfs[stock] = df
-                print('last row', self.dfs[stock].iloc[-1])
+                self.load_history(stock, df)
         except Exception as e:
             print('error preloading', e)
 
     async def get_hourly_data_for_stock(self, stock):
         try:
             df = fetch_hourly_stock_bars_for_rsi_divergence_start_up(stock)
-            self.dfs[stock] = df
-            # self.dfs[stock]['timestamp'] = pd.to_datetime(
-            #     self.dfs[stock]['timestamp'])
-            # self.dfs[stock].set_index('timestamp', inplace=True)
-            print('last row', self.dfs[stock].iloc[-1])
+            self.load_history(stock, df)
         except Exception as e:
             print('error getting hourly data for stock', e)
 
@@ -148,7 +158,7 @@ class rsi_divergence_trading_strategy:
             return
         for stock in self.stock_list:
             try:
-                if self.dfs[stock] is None:
+                if not self.loaded[stock]:
                     print('no data for', stock)
                     await self.get_hourly_data_for_stock(stock)
 
@@ -183,7 +193,8 @@ class rsi_divergence_trading_strategy:
             try:
                 latest_bar = fetch_latest_30min_bar(stock)
                 print('latest_bar', latest_bar)
-                self.dfs[stock].loc[latest_bar['datetime']] = latest_bar
+                # A bar with the same datetime as the last one replaces it
+                self.indicator_states[stock].add_bar(latest_bar)
             except Exception as e:
                 print('error getting latest bar', e)
         if should_handle_positions:
@@ -267,15 +278,12 @@ class rsi_divergence_trading_strategy:
     async def handle_positions_for_rsi_divergence(self):
         for stock in self.stock_list:
             print('handling positions for', stock)
-            if self.dfs[stock] is None:
+            if not self.loaded[stock]:
                 continue
-            df = self.dfs[stock]
-            # doubling the window to 10 because we are using 30 min bars
-            df['rsi'] = calculate_rsi(df, 10)
-            # doubling the window to 28 because we are using 30 min bars
-            df['rsi_sma'] = df['rsi'].rolling(window=28).mean()
-            current_rsi = df.iloc[-1]['rsi']
-            current_rsi_sma = df.iloc[-1]['rsi_sma']
+            # Same values as calculate_rsi(df, 10) and rolling(window=28).mean() over the history
+            state = self.indicator_states[stock]
+            current_rsi = state.rsi
+            current_rsi_sma = state.rsi_sma
             short_threshold = current_rsi_sma - 20
             long_threshold = current_rsi_sma + 20
             is_current_rsi_20_below_sma = current_rsi < short_threshold  # Short Signal
@@ -0,0 +1,253 @@
+from typing import Iterable, Mapping
+
+from src.alphas.expression_compiler import compile_alphas
+
+# Alpha Formulas
+#
+# The alphas from all_alphas.py written as expression strings for the alpha
+# compiler. On panel data rank and scale are cross-sectional, which is how the
+# 101 Formulaic Alphas define them. Alphas that need an industry
+# classification or market cap are left out, since neither is in our data.
+#
+# The formulas follow the 101 Formulaic Alphas definitions, not the
+# hand-written functions in all_alphas.py. On one ticker's data most of them
+# give the same values, but these do not:
+#
+#   alpha4   all_alphas uses min_periods=1 for ts_rank, so its first 8 rows
+#            have values; here they are NaN.
+#   alpha5   all_alphas uses min_periods=1 for sum(vwap, 10). That changes
+#            the first 9 rows, and through the full-history rank every row.
+#   alpha7   all_alphas defines adv20 as the 20-day mean of volume; here it is
+#            the input's adv20, the 20-day mean of dollar volume from
+#            calculate_metrics.
+#   alpha9   all_alphas tests delta(close, 1) > ts_min(...) and
+#            delta(close, 1) < ts_max(...); here the tests are 0 < ts_min(...)
+#            and ts_max(...) < 0.
+#   alpha21  all_alphas compares sum(close, 2) / 2 with sum(close, 8) / 8
+#            instead of sum(close, 8) / 8 - stddev(close, 8).
+#   alpha37  all_alphas shifts open - close with np.roll, which wraps the
+#            last row to the front, instead of delay(..., 1).
+#   alpha42  all_alphas ranks the ratio (vwap - close) / (vwap + close)
+#            instead of dividing rank(vwap - close) by rank(vwap + close).
+#   alpha83  all_alphas calls the builtin sum(close, 5), which adds 5 to the
+#            total, instead of the 5-day rolling sum.
+#
+# alpha10 and most of alpha26 onwards raise in all_alphas.py; for example
+# np.max(x, 3) is not ts_max(x, 3), and fractional windows are not truncated.
+# Backtests run with all_alphas.py therefore do not line up with the
+# compiled values for the alphas above.
+
+ALPHA_FORMULAS = {
+    "alpha1": "rank(ts_argmax(signedpower(where(returns < 0, stddev(returns, 20), close), 2), 5)) - 0.5",
+    "alpha2": "-1 * correlation(rank(delta(log(volume), 2)), rank((close - open) / open), 6)",
+    "alpha3": "-1 * correlation(rank(open), rank(volume), 10)",
+    "alpha4": "-1 * ts_rank(rank(low), 9)",
+    "alpha5": "rank(open - sum(vwap, 10) / 10) * (-1 * abs(rank(close - vwap)))",
+    "alpha6": "-1 * correlation(open, volume, 10)",
+    "alpha7": "where(adv20 < volume, -1 * ts_rank(abs(delta(close, 7)), 60) * sign(delta(close, 7)), -1)",
+    "alpha8": "-1 * rank(sum(open, 5) * sum(returns, 5) - delay(sum(open, 5) * sum(returns, 5), 10))",
+    "alpha9": (
+        "where(0 < ts_min(delta(close, 1), 5), delta(close, 1),"
+        " where(ts_max(delta(close, 1), 5) < 0, delta(close, 1), -1 * delta(close, 1)))"
+    ),
+    "alpha10": (
+        "rank(where(0 < ts_min(delta(close, 1), 4), delta(close, 1),"
+        " where(ts_max(delta(close, 1), 4) < 0, delta(close, 1), -1 * delta(close, 1))))"
+    ),
+    "alpha11": "(rank(ts_max(vwap - close, 3)) + rank(ts_min(vwap - close, 3))) * rank(delta(volume, 3))",
+    "alpha12": "sign(delta(volume, 1)) * (-1 * delta(close, 1))",
+    "alpha13": "-1 * rank(covariance(rank(close), rank(volume), 5))",
+    "alpha14": "-1 * rank(delta(returns, 3)) * correlation(open, volume, 10)",
+    "alpha15": "-1 * sum(rank(correlation(rank(high), rank(volume), 3)), 3)",
+    "alpha16": "-1 * rank(covariance(rank(high), rank(volume), 5))",
+    "alpha17": "-1 * rank(ts_rank(close, 10)) * rank(delta(delta(close, 1), 1)) * rank(ts_rank(volume / adv20, 5))",
+    "alpha18": "-1 * rank(stddev(abs(close - open), 5) + (close - open) + correlation(close, open, 10))",
+    "alpha19": "-1 * sign(close - delay(close, 7) + delta(close, 7)) * (1 + rank(1 + sum(returns, 250)))",
+    "alpha20": "-1 * rank(open - delay(high, 1)) * rank(open - delay(close, 1)) * rank(open - delay(low, 1))",
+    "alpha21": (
+        "where(sum(close, 8) / 8 + stddev(close, 8) < sum(close, 2) / 2, -1,"
+        " where(sum(close, 2) / 2 < sum(close, 8) / 8 - stddev(close, 8), 1,"
+        " where(volume / adv20 >= 1, 1, -1)))"
+    ),
+    "alpha22": "-1 * delta(correlation(high, volume, 5), 5) * rank(stddev(close, 20))",
+    "alpha23": "where(sum(high, 20) / 20 < high, -1 * delta(high, 2), 0)",
+    "alpha24": (
+        "where(delta(sum(close, 100) / 100, 100) / delay(close, 100) <= 0.05,"
+        " -1 * (close - ts_min(close, 100)), -1 * delta(close, 3))"
+    ),
+    "alpha25": "rank(-1 * returns * adv20 * vwap * (high - close))",
+    "alpha26": "-1 * ts_max(correlation(ts_rank(volume, 5), ts_rank(high, 5), 5), 3)",
+    "alpha27": "where(0.5 < rank(sum(correlation(rank(volume), rank(vwap), 6), 2) / 2), -1, 1)",
+    "alpha28": "scale(correlation(adv20, low, 5) + (high + low) / 2 - close)",
+    "alpha29": (
+        "min(product(rank(rank(scale(log(sum(ts_min(rank(rank(-1 * rank(delta(close - 1, 5)))), 2), 1))))), 1), 5)"
+        " + ts_rank(delay(-1 * returns, 6), 5)"
+    ),
+    "alpha30": (
+        "(1 - rank(sign(close - delay(close, 1)) + sign(delay(close, 1) - delay(close, 2))"
+        " + sign(delay(close, 2) - delay(close, 3)))) * sum(volume, 5) / sum(volume, 20)"
+    ),
+    "alpha31": (
+        "rank(rank(rank(decay_linear(-1 * rank(rank(delta(close, 10))), 10))))"
+        " + rank(-1 * delta(close, 3)) + sign(scale(correlation(adv20, low, 12)))"
+    ),
+    "alpha32": "scale(sum(close, 7) / 7 - close) + 20 * scale(correlation(vwap, delay(close, 5), 230))",
+    "alpha33": "rank(-1 * (1 - open / close))",
+    "alpha34": "rank(1 - rank(stddev(returns, 2) / stddev(returns, 5)) + (1 - rank(delta(close, 1))))",
+    "alpha35": "ts_rank(volume, 32) * (1 - ts_rank(close + high - low, 16)) * (1 - ts_rank(returns, 32))",
+    "alpha36": (
+        "2.21 * rank(correlation(close - open, delay(volume, 1), 15)) + 0.7 * rank(open - close)"
+        " + 0.73 * rank(ts_rank(delay(-1 * returns, 6), 5)) + rank(abs(correlation(vwap, adv20, 6)))"
+        " + 0.6 * rank((sum(close, 200) / 200 - open) * (close - open))"
+    ),
+    "alpha37": "rank(correlation(delay(open - close, 1), close, 200)) + rank(open - close)",
+    "alpha38": "-1 * rank(ts_rank(close, 10)) * rank(close / open)",
+    "alpha39": "-1 * rank(delta(close, 7) * (1 - rank(decay_linear(volume / adv20, 9)))) * (1 + rank(sum(returns, 250)))",
+    "alpha40": "-1 * rank(stddev(high, 10)) * correlation(high, volume, 10)",
+    "alpha41": "signedpower(high * low, 0.5) - vwap",
+    "alpha42": "rank(vwap - close) / rank(vwap + close)",
+    "alpha43": "ts_rank(volume / adv20, 20) * ts_rank(-1 * delta(close, 7), 8)",
+    "alpha44": "-1 * correlation(high, rank(volume), 5)",
+    "alpha45": (
+        "-1 * rank(sum(delay(close, 5), 20) / 20) * correlation(close, volume, 2)"
+        " * rank(correlation(sum(close, 5), sum(close, 20), 2))"
+    ),
+    "alpha46": (
+        "where(0.25 < (delay(close, 20) - delay(close, 10)) / 10 - (delay(close, 10) - close) / 10, -1,"
+        " where((delay(close, 20) - delay(close, 10)) / 10 - (delay(close, 10) - close) / 10 < 0, 1,"
+        " -1 * (close - delay(close, 1))))"
+    ),
+    "alpha47": (
+        "rank(1 / close) * volume / adv20 * (high * rank(high - close) / (sum(high, 5) / 5))"
+        " - rank(vwap - delay(vwap, 5))"
+    ),
+    "alpha49": (
+        "where((delay(close, 20) - delay(close, 10)) / 10 - (delay(close, 10) - close) / 10 < -0.1, 1,"
+        " -1 * (close - delay(close, 1)))"
+    ),
+    "alpha50": "-1 * ts_max(rank(correlation(rank(volume), rank(vwap), 5)), 5)",
+    "alpha51": (
+        "where((delay(close, 20) - delay(close, 10)) / 10 - (delay(close, 10) - close) / 10 < -0.05, 1,"
+        " -1 * (close - delay(close, 1)))"
+    ),
+    "alpha52": (
+        "(-1 * ts_min(low, 5) + delay(ts_min(low, 5), 5)) * rank((sum(returns, 240) - sum(returns, 20)) / 220)"
+        " * ts_rank(volume, 5)"
+    ),
+    "alpha53": "-1 * delta((close - low - (high - close)) / (close - low), 9)",
+    "alpha54": "-1 * (low - close) * signedpower(open, 5) / ((low - high) * signedpower(close, 5))",
+    "alpha55": "-1 * correlation(rank((close - ts_min(low, 12)) / (ts_max(high, 12) - ts_min(low, 12))), rank(volume), 6)",
+    "alpha57": "0 - 1 * ((close - vwap) / decay_linear(rank(ts_argmax(close, 30)), 2))",
+    "alpha60": (
+        "0 - 1 * (2 * scale(rank((close - low - (high - close)) / (high - low) * volume))"
+        " - scale(rank(ts_argmax(close, 10))))"
+    ),
+    "alpha61": "rank(vwap - ts_min(vwap, 16.1219)) < rank(correlation(vwap, adv180, 17.9282))",
+    "alpha62": (
+        "(rank(correlation(vwap, sum(adv20, 22.4101), 9.91009))"
+        " < rank((rank(open) + rank(open)) < (rank((high + low) / 2) + rank(high)))) * -1"
+    ),
+    "alpha64": (
+        "(rank(correlation(sum(open * 0.178404 + low * (1 - 0.178404), 12.7054), sum(adv120, 12.7054), 16.6208))"
+        " < rank(delta((high + low) / 2 * 0.178404 + vwap * (1 - 0.178404), 3.69741))) * -1"
+    ),
+    "alpha65": (
+        "(rank(correlation(open * 0.00817205 + vwap * (1 - 0.00817205), sum(adv60, 8.6911), 6.40374))"
+        " < rank(open - ts_min(open, 13.635))) * -1"
+    ),
+    "alpha66": (
+        "(rank(decay_linear(delta(vwap, 3.51013), 7.23052))"
+        " + ts_rank(decay_linear((low * 0.96633 + low * (1 - 0.96633) - vwap) / (open - (high + low) / 2), 11.4157),"
+        " 6.72611)) * -1"
+    ),
+    "alpha68": (
+        "(ts_rank(correlation(rank(high), rank(adv15), 8.91644), 13.9333)"
+        " < rank(delta(close * 0.518371 + low * (1 - 0.518371), 1.06157))) * -1"
+    ),
+    "alpha71": (
+        "max(ts_rank(decay_linear(correlation(ts_rank(close, 3.43976), ts_rank(adv180, 12.0647), 18.0175), 4.20501),"
+        " 15.6948), ts_rank(decay_linear(signedpower(rank(low + open - (vwap + vwap)), 2), 16.4662), 4.4388))"
+    ),
+    "alpha72": (
+        "rank(decay_linear(correlation((high + low) / 2, adv40, 8.93345), 10.1519))"
+        " / rank(decay_linear(correlation(ts_rank(vwap, 3.72469), ts_rank(volume, 18.5188), 6.86671), 2.95011))"
+    ),
+    "alpha73": (
+        "max(rank(decay_linear(delta(vwap, 4.72775), 2.91864)),"
+        " ts_rank(decay_linear(delta(open * 0.147155 + low * (1 - 0.147155), 2.03608)"
+        " / (open * 0.147155 + low * (1 - 0.147155)) * -1, 3.33829), 16.7411)) * -1"
+    ),
+    "alpha74": (
+        "(rank(correlation(close, sum(adv30, 37.4843), 15.1365))"
+        " < rank(correlation(rank(high * 0.0261661 + vwap * (1 - 0.0261661)), rank(volume), 11.4791))) * -1"
+    ),
+    "alpha75": "rank(correlation(vwap, volume, 4.24304)) < rank(correlation(rank(low), rank(adv50), 12.4413))",
+    "alpha77": (
+        "min(rank(decay_linear((high + low) / 2 + high - (vwap + high), 20.0451)),"
+        " rank(decay_linear(correlation((high + low) / 2, adv40, 3.1614), 5.64125)))"
+    ),
+    "alpha78": (
+        "rank(correlation(sum(low * 0.352233 + vwap * (1 - 0.352233), 19.7428), sum(adv40, 19.7428), 6.83313))"
+        " ** rank(correlation(rank(vwap), rank(volume), 5.77492))"
+    ),
+    "alpha81": (
+        "(rank(log(product(rank(signedpower(rank(correlation(vwap, sum(adv10, 49.6054), 8.47743)), 4)), 14.9655)))"
+        " < rank(correlation(rank(vwap), rank(volume), 5.07914))) * -1"
+    ),
+    "alpha83": (
+        "rank(delay((high - low) / (sum(close, 5) / 5), 2)) * rank(rank(volume))"
+        " / ((high - low) / (sum(close, 5) / 5) / (vwap - close))"
+    ),
+    "alpha84": "signedpower(ts_rank(vwap - ts_max(vwap, 15.3217), 20.7127), delta(close, 4.96796))",
+    "alpha85": (
+        "rank(correlation(high * 0.876703 + close * (1 - 0.876703), adv30, 9.61331))"
+        " ** rank(correlation(ts_rank((high + low) / 2, 3.70596), ts_rank(volume, 10.1595), 7.11408))"
+    ),
+    "alpha86": (
+        "(ts_rank(correlation(close, sum(adv20, 14.7444), 6.00049), 20.4195)"
+        " < rank(open + close - (vwap + open))) * -1"
+    ),
+    "alpha88": (
+        "min(rank(decay_linear(rank(open) + rank(low) - (rank(high) + rank(close)), 8.06882)),"
+        " ts_rank(decay_linear(correlation(ts_rank(close, 8.44728), ts_rank(adv60, 20.6966), 8.01266), 6.65053),"
+        " 2.61957))"
+    ),
+    "alpha92": (
+        "min(ts_rank(decay_linear((high + low) / 2 + close < low + open, 14.7221), 18.8683),"
+        " ts_rank(decay_linear(correlation(rank(low), rank(adv30), 7.58555), 6.94024), 6.80584))"
+    ),
+    "alpha94": (
+        "rank(vwap - ts_min(vwap, 11.5783))"
+        " ** ts_rank(correlation(ts_rank(vwap, 19.6462), ts_rank(adv60, 4.02992), 18.0926), 2.70756) * -1"
+    ),
+    "alpha95": (
+        "rank(open - ts_min(open, 12.4105))"
+        " < ts_rank(signedpower(rank(correlation(sum((high + low) / 2, 19.1351), sum(adv40, 19.1351), 12.8742)), 5),"
+        " 11.7584)"
+    ),
+    "alpha96": (
+        "max(ts_rank(decay_linear(correlation(rank(vwap), rank(volume), 3.83878), 4.16783), 8.38151),"
+        " ts_rank(decay_linear(ts_argmax(correlation(ts_rank(close, 7.45404), ts_rank(adv60, 4.13242), 3.65459),"
+        " 12.6556), 14.0365), 13.4143)) * -1"
+    ),
+    "alpha98": (
+        "rank(decay_linear(correlation(vwap, sum(adv5, 26.4719), 4.58418), 7.18088))"
+        " - rank(decay_linear(ts_rank(ts_argmin(correlation(rank(open), rank(adv15), 20.8187), 8.62571), 6.95668),"
+        " 8.07206))"
+    ),
+    "alpha99": (
+        "(rank(correlation(sum((high + low) / 2, 19.8975), sum(adv60, 19.8975), 8.8136))"
+        " < rank(correlation(low, volume, 6.28259))) * -1"
+    ),
+    "alpha101": "(close - open) / (high - low + 0.001)",
+}
+
+
+def evaluate_alphas(data: Mapping, names: Iterable[str] | None = None) -> dict:
+    """Evaluate the named alphas (all of them by default) in one shared pass over ``data``."""
+
+    names = list(names) if names is not None else list(ALPHA_FORMULAS)
+    unknown = [name for name in names if name not in ALPHA_FORMULAS]
+    if unknown:
+        raise KeyError(f"No formula for: {', '.join(unknown)}")
+    return compile_alphas({name: ALPHA_FORMULAS[name] for name in names}).evaluate(data)
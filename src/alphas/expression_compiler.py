@@ -0,0 +1,261 @@
+import ast
+import logging
+import operator
+import re
+from dataclasses import dataclass, field
+from typing import Mapping
+
+import numpy as np
+import pandas as pd
+
+from src.utils.functions_and_operators import (
+    abs_val,
+    correlation,
+    covariance,
+    decay_linear,
+    delay,
+    delta,
+    log,
+    product,
+    rank,
+    scale,
+    sign,
+    signedpower,
+    stddev,
+    sum_ts,
+    ts_argmax,
+    ts_argmin,
+    ts_max,
+    ts_min,
+    ts_rank,
+)
+
+logger = logging.getLogger(__name__)
+
+# Alpha Expression Compiler
+#
+# Alpha formulas are written as Python-style expression strings over the data
+# fields, e.g. "-1 * correlation(rank(open), rank(volume), 10)". compile_alphas
+# parses a batch of them into a single DAG in which structurally identical
+# subexpressions are one node, so delta(close, 1), adv20 or rank(volume) are
+# evaluated once per run no matter how many alphas use them.
+
+
+def _where(condition, if_true, if_false):
+    values = np.where(condition, if_true, if_false)
+    for template in (condition, if_true, if_false):
+        if isinstance(template, pd.DataFrame):
+            return pd.DataFrame(values, index=template.index, columns=template.columns)
+        if isinstance(template, pd.Series):
+            return pd.Series(values, index=template.index)
+    return values
+
+
+# name -> (operator, position of the window argument or None)
+_FUNCTIONS = {
+    "abs": (abs_val, None),
+    "log": (log, None),
+    "sign": (sign, None),
+    "rank": (rank, None),
+    "scale": (scale, None),
+    "signedpower": (signedpower, None),
+    "where": (_where, None),
+    "delay": (delay, 1),
+    "delta": (delta, 1),
+    "correlation": (correlation, 2),
+    "covariance": (covariance, 2),
+    "decay_linear": (decay_linear, 1),
+    "ts_min": (ts_min, 1),
+    "ts_max": (ts_max, 1),
+    "ts_argmax": (ts_argmax, 1),
+    "ts_argmin": (ts_argmin, 1),
+    "ts_rank": (ts_rank, 1),
+    "sum": (sum_ts, 1),
+    "product": (product, 1),
+    "stddev": (stddev, 1),
+}
+
+_BINARY_OPS = {
+    ast.Add: ("add", operator.add),
+    ast.Sub: ("sub", operator.sub),
+    ast.Mult: ("mul", operator.mul),
+    ast.Div: ("div", operator.truediv),
+    ast.Pow: ("pow", signedpower),
+    ast.BitAnd: ("and", operator.and_),
+    ast.BitOr: ("or", operator.or_),
+}
+
+_COMPARE_OPS = {
+    ast.Lt: ("lt", operator.lt),
+    ast.LtE: ("le", operator.le),
+    ast.Gt: ("gt", operator.gt),
+    ast.GtE: ("ge", operator.ge),
+    ast.Eq: ("eq", operator.eq),
+    ast.NotEq: ("ne", operator.ne),
+}
+
+_COMMUTATIVE = {"add", "mul", "and", "or", "eq", "ne", "max", "min"}
+
+_OPERATORS = {
+    **{name: (fn,) for name, (fn, _) in _FUNCTIONS.items()},
+    **{name: (fn,) for name, fn in _BINARY_OPS.values()},
+    **{name: (fn,) for name, fn in _COMPARE_OPS.values()},
+    "neg": (operator.neg,),
+    "max": (np.maximum,),
+    "min": (np.minimum,),
+}
+
+_ADV = re.compile(r"^adv(\d+)$")
+
+
+def _field(data: Mapping, name: str):
+    if name in data:
+        return data[name]
+    # advN that was not precomputed: N-day mean of dollar volume, the same
+    # definition calculate_metrics uses for adv20/adv50/adv100.
+    match = _ADV.match(name)
+    if match and "volume" in data and "vwap" in data:
+        return sum_ts(data["volume"] * data["vwap"], int(match.group(1))) / int(match.group(1))
+    raise KeyError(f"Field '{name}' is not available in the data")
+
+
+@dataclass(frozen=True)
+class Node:
+    """One operation in the DAG; ``args`` are the ids of the child nodes."""
+
+    op: str
+    args: tuple = ()
+    value: object = None
+
+
+@dataclass
+class AlphaProgram:
+    """A batch of alphas compiled into one deduplicated, topologically ordered DAG."""
+
+    nodes: list[Node] = field(default_factory=list)
+    outputs: dict[str, int] = field(default_factory=dict)
+    _index: dict[Node, int] = field(default_factory=dict, repr=False)
+
+    def __len__(self) -> int:
+        return len(self.nodes)
+
+    def _add(self, node: Node) -> int:
+        if node.op in _COMMUTATIVE:
+            node = Node(node.op, tuple(sorted(node.args)), node.value)
+        existing = self._index.get(node)
+        if existing is not None:
+            return existing
+        self.nodes.append(node)
+        self._index[node] = len(self.nodes) - 1
+        return len(self.nodes) - 1
+
+    def _constant(self, node_id: int):
+        node = self.nodes[node_id]
+        return node.value if node.op == "const" else None
+
+    def _compile(self, tree: ast.AST, formula: str) -> int:
+        if isinstance(tree, ast.Constant) and isinstance(tree.value, (int, float)):
+            return self._add(Node("const", value=tree.value))
+
+        if isinstance(tree, ast.Name):
+            return self._add(Node("field", value=tree.id))
+
+        if isinstance(tree, ast.UnaryOp) and isinstance(tree.op, (ast.USub, ast.UAdd)):
+            operand = self._compile(tree.operand, formula)
+            if isinstance(tree.op, ast.UAdd):
+                return operand
+            constant = self._constant(operand)
+            if constant is not None:
+                return self._add(Node("const", value=-constant))
+            return self._add(Node("neg", (operand,)))
+
+        if isinstance(tree, ast.BinOp) and type(tree.op) in _BINARY_OPS:
+            name, fn = _BINARY_OPS[type(tree.op)]
+            left = self._compile(tree.left, formula)
+            right = self._compile(tree.right, formula)
+            if self._constant(left) is not None and self._constant(right) is not None:
+                return self._add(Node("const", value=fn(self._constant(left), self._constant(right))))
+            return self._add(Node(name, (left, right)))
+
+        if isinstance(tree, ast.Compare) and len(tree.ops) == 1 and type(tree.ops[0]) in _COMPARE_OPS:
+            name, _ = _COMPARE_OPS[type(tree.ops[0])]
+            left = self._compile(tree.left, formula)
+            right = self._compile(tree.comparators[0], formula)
+            return self._add(Node(name, (left, right)))
+
+        if isinstance(tree, ast.IfExp):
+            args = tuple(self._compile(part, formula) for part in (tree.test, tree.body, tree.orelse))
+            return self._add(Node("where", args))
+
+        if isinstance(tree, ast.Call) and isinstance(tree.func, ast.Name) and not tree.keywords:
+            return self._compile_call(tree.func.id, tree.args, formula)
+
+        raise ValueError(f"Unsupported expression '{ast.unparse(tree)}' in alpha formula: {formula}")
+
+    def _compile_call(self, name: str, arg_trees: list, formula: str) -> int:
+        args = [self._compile(arg, formula) for arg in arg_trees]
+
+        # min/max follow the 101 Formulaic Alphas convention: with a constant
+        # second argument they are time-series operators, otherwise elementwise.
+        if name in ("min", "max") and len(args) == 2:
+            if self._constant(args[1]) is None:
+                return self._add(Node(name, tuple(args)))
+            name = f"ts_{name}"
+
+        if name not in _FUNCTIONS:
+            raise ValueError(f"Unknown function '{name}' in alpha formula: {formula}")
+
+        window_position = _FUNCTIONS[name][1]
+        if window_position is not None:
+            if len(args) <= window_position or self._constant(args[window_position]) is None:
+                raise ValueError(f"'{name}' needs a constant window argument in alpha formula: {formula}")
+            # Non-integer windows are floored, as in the original alpha definitions.
+            window = int(np.floor(self._constant(args[window_position])))
+            args[window_position] = self._add(Node("const", value=window))
+
+        return self._add(Node(name, tuple(args)))
+
+    def add_alpha(self, name: str, formula: str) -> int:
+        try:
+            tree = ast.parse(formula.strip(), mode="eval").body
+        except SyntaxError as exc:
+            raise ValueError(f"Could not parse alpha formula for {name}: {formula}") from exc
+        self.outputs[name] = self._compile(tree, formula)
+        return self.outputs[name]
+
+    def evaluate(self, data: Mapping) -> dict:
+        """Evaluate every alpha on ``data``, a mapping of field name to series or panel.
+
+        Each node is computed once; intermediate results are released as soon as
+        their last consumer has run.
+        """
+
+        needed = set(self.outputs.values())
+        last_use = {}
+        for node_id, node in enumerate(self.nodes):
+            for arg in node.args:
+                last_use[arg] = node_id
+
+        values = {}
+        for node_id, node in enumerate(self.nodes):
+            if node.op == "const":
+                values[node_id] = node.value
+            elif node.op == "field":
+                values[node_id] = _field(data, node.value)
+            else:
+                values[node_id] = _OPERATORS[node.op][0](*(values[arg] for arg in node.args))
+            for arg in set(node.args):
+                if last_use[arg] == node_id and arg not in needed:
+                    del values[arg]
+
+        return {name: values[node_id] for name, node_id in self.outputs.items()}
+
+
+def compile_alphas(formulas: Mapping[str, str]) -> AlphaProgram:
+    """Compile a batch of named alpha formulas into one shared program."""
+
+    program = AlphaProgram()
+    for name, formula in formulas.items():
+        program.add_alpha(name, formula)
+    logger.debug("Compiled %s alphas into %s nodes", len(program.outputs), len(program))
+    return program
@@ -2,14 +2,17 @@ import logging
 import multiprocessing
 import os
 import time
-from typing import Callable, Tuple
+from typing import Callable, Sequence, Tuple
 
 import numpy as np
 import pandas as pd
 
 from src.alphas.all_alphas import *
+from src.alphas.alpha_formulas import evaluate_alphas
 from src.backtest.config import BacktestConfig
+from src.data_store.market_data_store import market_data_store
 from src.dataparsers.alpha_input_data_helpers import calculate_metrics, calculate_signals
+from src.strategies.portfolio import run_threshold_strategy
 from src.visualizations.generic_visualizations import (
     calculate_and_print_metrics,
     calculate_mean_sharpe_ratio_from_metrics,
@@ -112,24 +115,66 @@ def backtest(data: pd.DataFrame, config: BacktestConfig | None = None) -> pd.Dat
     return portfolio
 
 
-def get_data_for_backtest(stock_ticker: str, exchange: str, config: BacktestConfig | None = None) -> pd.DataFrame:
+def prepare_data_for_backtest(data: pd.DataFrame, config: BacktestConfig | None = None) -> pd.DataFrame:
+    """Normalize raw daily bars and add the metrics and signals the strategies expect."""
+
     config = config or BacktestConfig()
+    data = _normalize_columns(data)
+    data = _ensure_required_columns(data, config)
+    if data.empty:
+        return pd.DataFrame()
+
+    data_with_metrics = calculate_metrics(data)
+    data_with_metrics_and_signals = calculate_signals(data_with_metrics)
+    return data_with_metrics_and_signals
+
+
+def get_data_for_backtest(stock_ticker: str, exchange: str, config: BacktestConfig | None = None) -> pd.DataFrame:
     try:
-        path = f"../data/baseline_data/{exchange}/{stock_ticker}_baseline.csv"
-        data = pd.read_csv(path)
-        data = _normalize_columns(data)
-        data = _ensure_required_columns(data, config)
-        if data.empty:
-            return pd.DataFrame()
-
-        data_with_metrics = calculate_metrics(data)
-        data_with_metrics_and_signals = calculate_signals(data_with_metrics)
-        return data_with_metrics_and_signals
+        data = market_data_store.read_ticker(exchange, stock_ticker)
+        return prepare_data_for_backtest(data, config)
     except Exception as exc:  # pragma: no cover - defensive logging
         logger.exception("Error getting data for %s: %s", stock_ticker, exc)
         return pd.DataFrame()
 
 
+def get_panel_for_exchange(
+    exchange: str,
+    columns: list[str] | None = None,
+    config: BacktestConfig | None = None,
+) -> dict[str, pd.DataFrame]:
+    """Load every ticker on an exchange as wide (dates x tickers) frames, one per column.
+
+    This is the input shape for the panel mode of ``functions_and_operators``,
+    where cross-sectional operators rank across tickers on each date.
+    """
+
+    config = config or BacktestConfig()
+    stocks = get_stocks_for_exchange(exchange)
+    stocks.sort()
+
+    per_ticker = {}
+    for stock in stocks:
+        data = get_data_for_backtest(stock, exchange, config)
+        if data.empty or "date" not in data.columns:
+            continue
+        per_ticker[stock] = data.set_index(pd.to_datetime(data["date"])).drop(columns="date")
+
+    if not per_ticker:
+        return {}
+
+    if columns is None:
+        sample = next(iter(per_ticker.values()))
+        columns = [col for col in sample.columns if pd.api.types.is_numeric_dtype(sample[col])]
+
+    panel = {}
+    for column in columns:
+        panel[column] = pd.DataFrame(
+            {stock: data[column] for stock, data in per_ticker.items() if column in data.columns}
+        ).sort_index()
+    return panel
+
+
 def backtest_stock(
     stock_ticker: str,
     exchange: str,
@@ -150,12 +195,117 @@ def backtest_stock(
     return stock_portfolio_long, stock_portfolio_short, metrics_long, metrics_short
 
 
+def _alpha_name(alpha: str | Callable) -> str:
+    return alpha if isinstance(alpha, str) else alpha.__name__
+
+
+def compute_alpha_matrix(data: pd.DataFrame, alphas: Sequence[str | Callable]) -> pd.DataFrame:
+    """Compute every alpha once on ``data`` and return one column per alpha.
+
+    Strings are names from ``ALPHA_FORMULAS`` and are evaluated together so they
+    share subexpressions. Callables are the ``all_alphas`` functions; those that
+    return the whole frame have their own column picked out.
+    """
+
+    names = [_alpha_name(alpha) for alpha in alphas]
+    duplicates = sorted({name for name in names if names.count(name) > 1})
+    if duplicates:
+        raise ValueError(f"Alpha names must be unique, got duplicates: {', '.join(duplicates)}")
+
+    matrix = pd.DataFrame(index=data.index)
+
+    formula_names = [alpha for alpha in alphas if isinstance(alpha, str)]
+    if formula_names:
+        fields = {column: data[column] for column in data.columns}
+        for name, values in evaluate_alphas(fields, formula_names).items():
+            matrix[name] = values
+
+    for alpha in alphas:
+        if isinstance(alpha, str):
+            continue
+        # all_alphas functions add scratch columns (and alpha7 overwrites adv20),
+        # so each one gets its own copy.
+        values = alpha(data.copy())
+        if isinstance(values, pd.DataFrame):
+            values = values[alpha.__name__]
+        if not isinstance(values, pd.Series):
+            values = pd.Series(np.asarray(values, dtype=np.float64), index=data.index)
+        matrix[alpha.__name__] = values
+
+    return matrix[names]
+
+
+def backtest_stock_batch(
+    stock_ticker: str,
+    exchange: str,
+    alphas: Sequence[str | Callable],
+    upper_bound: float,
+    lower_bound: float,
+    config: BacktestConfig | None = None,
+):
+    """Backtest the long and short threshold strategy of every alpha from one data load.
+
+    Returns ``{alpha_name: (portfolio_long, portfolio_short, metrics_long, metrics_short)}``.
+    """
+
+    logger.info("Backtesting %s alphas on %s", len(alphas), stock_ticker)
+    data = get_data_for_backtest(stock_ticker, exchange, config)
+    if data.empty:
+        return None
+
+    alpha_matrix = compute_alpha_matrix(data, alphas)
+    results = {}
+    for name in alpha_matrix.columns:
+        stock_portfolio_long = run_threshold_strategy(data, alpha_matrix[name], upper_bound, "long")
+        stock_portfolio_short = run_threshold_strategy(data, alpha_matrix[name], lower_bound, "short")
+        metrics_long = calculate_and_print_metrics(stock_portfolio_long, stock_ticker, False, data)
+        metrics_short = calculate_and_print_metrics(stock_portfolio_short, stock_ticker, False, data)
+        results[name] = (stock_portfolio_long, stock_portfolio_short, metrics_long, metrics_short)
+    return results
+
+
+def run_backtest_batch(
+    alphas: Sequence[str | Callable],
+    upper_bound: float,
+    lower_bound: float,
+    exchange: str,
+    config: BacktestConfig | None = None,
+):
+    """Batch counterpart of ``run_backtest``: one pass over each ticker for all alphas.
+
+    Returns ``{alpha_name: (portfolios_long, portfolios_short, metrics_long, metrics_short)}``
+    in the same shape ``run_backtest`` returns for a single alpha.
+    """
+
+    config = config or BacktestConfig()
+    stocks = get_stocks_for_exchange(exchange)
+    stocks.sort()
+
+    num_processes = multiprocessing.cpu_count()
+    logger.info("Using %s processes", num_processes)
+
+    with multiprocessing.Pool(num_processes) as pool:
+        results = pool.starmap(
+            backtest_stock_batch,
+            [(stock, exchange, alphas, upper_bound, lower_bound, config) for stock in stocks],
+        )
+
+    results = [result for result in results if result is not None]
+
+    batch = {}
+    for alpha in alphas:
+        name = _alpha_name(alpha)
+        per_stock = [result[name] for result in results]
+        if not per_stock:
+            batch[name] = ([], [], [], [])
+            continue
+        portfolios_long, portfolios_short, metrics_long, metrics_short = zip(*per_stock)
+        batch[name] = (portfolios_long, portfolios_short, metrics_long, metrics_short)
+    return batch
+
+
 def run_backtest_for_all_exchanges(alpha_name: str, alpha_function: Callable):
-    exchanges = [
-        name
-        for name in os.listdir("../data/baseline_data")
-        if os.path.isdir(os.path.join("../data/baseline_data", name))
-    ]
+    exchanges = market_data_store.exchanges()
     try:
         for exchange in exchanges:
             run_backtest(alpha_name, alpha_function, exchange)
@@ -203,9 +353,7 @@ def save_backtest_results(portfolios: list[Tuple[pd.DataFrame, str]], exchange:
 
 
 def get_stocks_for_exchange(exchange: str = "NASDAQ"):
-    stocks = os.listdir(f"../data/baseline_data/{exchange}")
-    stock_tickers = [extract_ticker_from_filename(stock) for stock in stocks]
-    return stock_tickers
+    return market_data_store.tickers(exchange)
 
 
 def extract_ticker_from_filename(filename: str):
@@ -297,11 +445,7 @@ def optimize_alpha_for_bounds_all_exchanges(
     step_size: float,
     exchange: str,
 ):
-    exchanges = [
-        name
-        for name in os.listdir("../data/baseline_data")
-        if os.path.isdir(os.path.join("../data/baseline_data", name))
-    ]
+    exchanges = market_data_store.exchanges()
     try:
         for exchange in exchanges:
             optimize_alpha_for_bounds_by_exchange(
@@ -0,0 +1,147 @@
+import logging
+import multiprocessing
+import os
+import time
+from typing import Callable
+
+import numpy as np
+import pandas as pd
+
+from src.backtest.backtester import compute_alpha_matrix, get_data_for_backtest, get_stocks_for_exchange
+from src.backtest.config import BacktestConfig
+from src.strategies.portfolio import run_threshold_strategy, threshold_returns
+from src.visualizations.generic_visualizations import calculate_and_print_metrics, create_df_from_metrics
+
+logger = logging.getLogger(__name__)
+
+# Columns kept per ticker after the sweep, enough to rebuild the full metrics
+# (ATR, RSI, SMAs) for the winning bound without reading the CSV again.
+_METRIC_COLUMNS = ["open", "high", "low", "close"]
+
+
+def _sharpe_ratios(returns: np.ndarray) -> np.ndarray:
+    """Column-wise Sharpe ratio, matching ``calculate_and_print_metrics``."""
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = np.nanmean(returns, axis=0)
+        volatility = np.nanstd(returns, axis=0, ddof=1)
+        return np.where(volatility != 0, np.sqrt(252) * mean / volatility, np.nan)
+
+
+def _sweep_stock(
+    stock_ticker: str,
+    exchange: str,
+    alpha: str | Callable,
+    bounds: np.ndarray,
+    config: BacktestConfig,
+):
+    data = get_data_for_backtest(stock_ticker, exchange, config)
+    if data.empty:
+        return None
+    alpha_values = compute_alpha_matrix(data, [alpha]).iloc[:, 0].to_numpy(dtype=np.float64)
+    sharpe_long = _sharpe_ratios(threshold_returns(data, alpha_values, bounds, "long"))
+    sharpe_short = _sharpe_ratios(threshold_returns(data, alpha_values, -bounds, "short"))
+    cached = data[_METRIC_COLUMNS].assign(alpha=alpha_values)
+    return stock_ticker, sharpe_long, sharpe_short, cached
+
+
+def _metrics_for_bound(cached: dict[str, pd.DataFrame], bound: float, side: str) -> list:
+    metrics = []
+    for stock_ticker, data in cached.items():
+        portfolio = run_threshold_strategy(data, data["alpha"], bound, side)
+        metrics.append(calculate_and_print_metrics(portfolio, stock_ticker, False, data))
+    return metrics
+
+
+def sweep_alpha_bounds_by_exchange(
+    alpha_name: str,
+    alpha: str | Callable,
+    range: tuple,
+    step_size: float,
+    exchange: str,
+    config: BacktestConfig | None = None,
+):
+    """Cached counterpart of ``optimize_alpha_for_bounds_by_exchange``.
+
+    Every ticker is loaded and its alpha computed once; all bounds in
+    ``np.arange(range[0], range[1], step_size)`` are then tested against the
+    cached alpha in one broadcasted comparison. ``alpha`` is an
+    ``ALPHA_FORMULAS`` name or an ``all_alphas`` function.
+
+    Writes the same long/short metric CSVs for the best bounds and returns
+    ``(best_upper_bound, best_metric_upper, best_lower_bound, best_metric_lower, sharpe_table)``
+    where ``sharpe_table`` holds the mean Sharpe ratio of every bound.
+    """
+
+    config = config or BacktestConfig()
+    start = time.time()
+    bounds = np.arange(range[0], range[1], step_size)
+    stocks = get_stocks_for_exchange(exchange)
+    stocks.sort()
+
+    num_processes = multiprocessing.cpu_count()
+    logger.info(
+        "Sweeping %s bounds for %s on %s using %s processes", len(bounds), alpha_name, exchange, num_processes
+    )
+    with multiprocessing.Pool(num_processes) as pool:
+        results = pool.starmap(
+            _sweep_stock,
+            [(stock, exchange, alpha, bounds, config) for stock in stocks],
+        )
+
+    results = [result for result in results if result is not None]
+    if not results:
+        logger.warning("No data returned for %s on %s", alpha_name, exchange)
+        return None, -np.inf, None, -np.inf, pd.DataFrame()
+
+    tickers, sharpe_long, sharpe_short, cached = zip(*results)
+    cached = dict(zip(tickers, cached))
+    sharpe_long = pd.DataFrame(np.vstack(sharpe_long), index=tickers, columns=bounds)
+    sharpe_short = pd.DataFrame(np.vstack(sharpe_short), index=tickers, columns=-bounds)
+
+    sharpe_table = pd.DataFrame(
+        {
+            "Upper Bound": bounds,
+            "Long Sharpe Ratio": sharpe_long.mean(axis=0).to_numpy(),
+            "Lower Bound": -bounds,
+            "Short Sharpe Ratio": sharpe_short.mean(axis=0).to_numpy(),
+        }
+    )
+
+    best_metric_upper = -np.inf
+    best_metric_lower = -np.inf
+    best_upper_bound = None
+    best_lower_bound = None
+    for row in sharpe_table.itertuples(index=False):
+        if row[1] > best_metric_upper:
+            best_metric_upper, best_upper_bound = row[1], row[0]
+        if row[3] > best_metric_lower:
+            best_metric_lower, best_lower_bound = row[3], row[2]
+
+    os.makedirs(f"../data/backtest_results/{exchange}/{alpha_name}", exist_ok=True)
+
+    if best_upper_bound is not None:
+        create_df_from_metrics(_metrics_for_bound(cached, best_upper_bound, "long"), best_upper_bound).to_csv(
+            f"../data/backtest_results/{exchange}/{alpha_name}/long_metrics.csv"
+        )
+    if best_lower_bound is not None:
+        create_df_from_metrics(_metrics_for_bound(cached, best_lower_bound, "short"), best_lower_bound).to_csv(
+            f"../data/backtest_results/{exchange}/{alpha_name}/short_metrics.csv"
+        )
+
+    logger.info(
+        "Best upper bound for %s on %s: %s, sharpe ratio: %s",
+        alpha_name,
+        exchange,
+        best_upper_bound,
+        best_metric_upper,
+    )
+    logger.info(
+        "Best lower bound for %s on %s: %s, sharpe ratio: %s",
+        alpha_name,
+        exchange,
+        best_lower_bound,
+        best_metric_lower,
+    )
+    logger.info("Completed bound sweep in %.2fs", time.time() - start)
+    return best_upper_bound, best_metric_upper, best_lower_bound, best_metric_lower, sharpe_table
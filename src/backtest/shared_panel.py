@@ -0,0 +1,266 @@
+import logging
+import multiprocessing
+from dataclasses import dataclass
+from multiprocessing import shared_memory
+from typing import Callable
+
+import numpy as np
+import pandas as pd
+
+from src.backtest.backtester import prepare_data_for_backtest
+from src.backtest.config import BacktestConfig
+from src.data_store.market_data_store import market_data_store
+from src.visualizations.generic_visualizations import calculate_and_print_metrics
+
+logger = logging.getLogger(__name__)
+
+# Shared Panel
+#
+# The exchange is loaded and prepared once in the parent and copied into two
+# shared memory blocks: a float64 (rows x columns) block with every ticker's
+# rows stacked one after the other, and an int64 block with the matching dates.
+# Workers attach by name and see each ticker as a zero-copy DataFrame over its
+# slice. Instead of pickling portfolios back to the parent, every worker writes
+# one compact metric row per ticker and side into a preallocated shared result
+# array.
+
+# Scalar metrics kept per ticker and side, in the order of create_df_from_metrics.
+METRIC_FIELDS = (
+    "Sharpe Ratio",
+    "Max Drawdown",
+    "Max Drawdown Duration",
+    "Annualized Return",
+    "Total Return",
+    "Average True Range",
+)
+
+
+@dataclass(frozen=True)
+class SharedArraySpec:
+    """Everything a process needs to attach to a shared array."""
+
+    name: str
+    shape: tuple
+    dtype: str
+
+
+def _create_array(shape: tuple, dtype: str, fill=None):
+    size = max(int(np.prod(shape)) * np.dtype(dtype).itemsize, 1)
+    segment = shared_memory.SharedMemory(create=True, size=size)
+    array = np.ndarray(shape, dtype=dtype, buffer=segment.buf)
+    if fill is not None:
+        array.fill(fill)
+    return segment, array, SharedArraySpec(segment.name, tuple(shape), dtype)
+
+
+# Segments attached by this process, keyed by name, so a worker attaches once
+# however many tickers it is handed.
+_attached: dict[str, tuple] = {}
+
+
+def _attach_array(spec: SharedArraySpec, writeable: bool = False) -> np.ndarray:
+    if spec.name not in _attached:
+        segment = shared_memory.SharedMemory(name=spec.name)
+        _attached[spec.name] = (segment, np.ndarray(spec.shape, dtype=spec.dtype, buffer=segment.buf))
+    array = _attached[spec.name][1].view()
+    array.flags.writeable = writeable
+    return array
+
+
+@dataclass(frozen=True)
+class SharedPanelSpec:
+    """Picklable description of a SharedPanel; ``offsets`` delimit each ticker's rows."""
+
+    values: SharedArraySpec
+    dates: SharedArraySpec
+    columns: tuple
+    tickers: tuple
+    offsets: tuple
+
+
+class SharedPanel:
+    """Prepared backtest data for a whole exchange, held in shared memory."""
+
+    def __init__(self, spec: SharedPanelSpec, values: np.ndarray, dates: np.ndarray, segments=()):
+        self.spec = spec
+        self.values = values
+        self.dates = dates
+        self._segments = segments
+
+    @classmethod
+    def create(cls, frames: dict[str, pd.DataFrame]) -> "SharedPanel":
+        """Copy prepared per-ticker frames into new shared memory blocks.
+
+        Only numeric columns shared by every frame are kept, plus ``date``.
+        """
+
+        frames = {ticker: data for ticker, data in frames.items() if not data.empty}
+        columns = None
+        for data in frames.values():
+            numeric = [col for col in data.columns if col != "date" and pd.api.types.is_numeric_dtype(data[col])]
+            columns = numeric if columns is None else [col for col in columns if col in numeric]
+        columns = columns or []
+
+        offsets = np.concatenate([[0], np.cumsum([len(data) for data in frames.values()])]).astype(int)
+        values_segment, values, values_spec = _create_array((int(offsets[-1]), len(columns)), "float64")
+        dates_segment, dates, dates_spec = _create_array((int(offsets[-1]),), "int64")
+
+        for (start, end), data in zip(zip(offsets[:-1], offsets[1:]), frames.values()):
+            values[start:end] = data[columns].to_numpy(dtype=np.float64)
+            dates[start:end] = pd.to_datetime(data["date"]).to_numpy(dtype="datetime64[ns]").view("int64")
+
+        spec = SharedPanelSpec(
+            values_spec,
+            dates_spec,
+            tuple(columns),
+            tuple(frames),
+            tuple(int(offset) for offset in offsets),
+        )
+        logger.info("Shared %s rows for %s tickers (%.1f MB)", offsets[-1], len(frames), values.nbytes / 1e6)
+        return cls(spec, values, dates, (values_segment, dates_segment))
+
+    @classmethod
+    def from_exchange(cls, exchange: str, config: BacktestConfig | None = None) -> "SharedPanel":
+        """Read the exchange in one pass from the market data store and share it."""
+
+        config = config or BacktestConfig()
+        data = market_data_store.read_exchange(exchange)
+        frames = {}
+        if not data.empty:
+            for ticker, bars in data.groupby("ticker", sort=True):
+                try:
+                    frames[ticker] = prepare_data_for_backtest(bars.drop(columns="ticker").reset_index(drop=True), config)
+                except Exception as exc:  # pragma: no cover - defensive logging
+                    logger.exception("Error getting data for %s: %s", ticker, exc)
+        return cls.create(frames)
+
+    @classmethod
+    def attach(cls, spec: SharedPanelSpec) -> "SharedPanel":
+        """Read-only view of a panel created by another process."""
+
+        return cls(spec, _attach_array(spec.values), _attach_array(spec.dates))
+
+    @property
+    def tickers(self) -> tuple:
+        return self.spec.tickers
+
+    def frame(self, index: int) -> pd.DataFrame:
+        """The rows of the ``index``-th ticker as a DataFrame over the shared block."""
+
+        start, end = self.spec.offsets[index], self.spec.offsets[index + 1]
+        data = pd.DataFrame(self.values[start:end], columns=list(self.spec.columns), copy=False)
+        data.insert(0, "date", pd.to_datetime(self.dates[start:end]))
+        return data
+
+    def close(self) -> None:
+        """Release the blocks; the creating process also frees them."""
+
+        # The arrays are views on the segments and must go before they can close.
+        self.values = self.dates = None
+        for segment in self._segments:
+            segment.close()
+            segment.unlink()
+        self._segments = ()
+
+    def __enter__(self) -> "SharedPanel":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+# Per-worker state set once by the pool initializer, so each task is just an index.
+_worker: dict = {}
+
+
+def _init_worker(panel_spec, results_spec, alpha_function_long, alpha_function_short, upper_bound, lower_bound):
+    _worker.update(
+        panel=SharedPanel.attach(panel_spec),
+        results=_attach_array(results_spec, writeable=True),
+        alpha_function_long=alpha_function_long,
+        alpha_function_short=alpha_function_short,
+        upper_bound=upper_bound,
+        lower_bound=lower_bound,
+    )
+
+
+def _metric_row(metrics: list) -> list:
+    # The ATR series is reduced to its latest value to keep the row scalar.
+    average_true_range = metrics[6]
+    if isinstance(average_true_range, pd.Series):
+        average_true_range = average_true_range.iloc[-1] if len(average_true_range) else np.nan
+    return [*metrics[1:6], average_true_range]
+
+
+def _backtest_shared_stock(index: int) -> bool:
+    panel, results = _worker["panel"], _worker["results"]
+    stock_ticker = panel.tickers[index]
+    logger.info("Backtesting %s", stock_ticker)
+    try:
+        data = panel.frame(index)
+        stock_portfolio_long = _worker["alpha_function_long"](data.copy(), _worker["upper_bound"])
+        stock_portfolio_short = _worker["alpha_function_short"](data.copy(), _worker["lower_bound"])
+        results[index, 0] = _metric_row(calculate_and_print_metrics(stock_portfolio_long, stock_ticker, False, data))
+        results[index, 1] = _metric_row(calculate_and_print_metrics(stock_portfolio_short, stock_ticker, False, data))
+        return True
+    except Exception as exc:  # pragma: no cover - defensive logging
+        logger.exception("Error backtesting %s: %s", stock_ticker, exc)
+        return False
+
+
+def _metrics_from_rows(tickers, rows: np.ndarray) -> list:
+    metrics = []
+    for stock_ticker, row in zip(tickers, rows):
+        row = row.tolist()
+        duration = row[2]
+        row[2] = int(duration) if not np.isnan(duration) else duration
+        metrics.append([stock_ticker, *row])
+    return metrics
+
+
+def run_backtest_shared(
+    alpha_function_long: Callable,
+    alpha_function_short: Callable,
+    upper_bound: float,
+    lower_bound: float,
+    exchange: str,
+    config: BacktestConfig | None = None,
+    panel: SharedPanel | None = None,
+):
+    """Shared-memory counterpart of ``run_backtest`` that returns only the metrics.
+
+    Returns ``(metrics_long, metrics_short)``, one ``[ticker, *METRIC_FIELDS]`` row
+    per ticker, which ``create_df_from_metrics`` and
+    ``calculate_mean_sharpe_ratio_from_metrics`` accept as they are. Pass a
+    ``panel`` from ``SharedPanel.from_exchange`` to reuse one load across calls,
+    e.g. over a bound sweep.
+    """
+
+    owns_panel = panel is None
+    if owns_panel:
+        panel = SharedPanel.from_exchange(exchange, config)
+
+    try:
+        tickers = panel.tickers
+        if not tickers:
+            return [], []
+
+        results_segment, results, results_spec = _create_array((len(tickers), 2, len(METRIC_FIELDS)), "float64", np.nan)
+        try:
+            num_processes = multiprocessing.cpu_count()
+            logger.info("Using %s processes", num_processes)
+            initargs = (panel.spec, results_spec, alpha_function_long, alpha_function_short, upper_bound, lower_bound)
+            with multiprocessing.Pool(num_processes, initializer=_init_worker, initargs=initargs) as pool:
+                completed = np.array(pool.map(_backtest_shared_stock, range(len(tickers))), dtype=bool)
+
+            done = [ticker for ticker, ok in zip(tickers, completed) if ok]
+            metrics_long = _metrics_from_rows(done, results[completed, 0])
+            metrics_short = _metrics_from_rows(done, results[completed, 1])
+        finally:
+            del results
+            results_segment.close()
+            results_segment.unlink()
+        return metrics_long, metrics_short
+    finally:
+        if owns_panel:
+            panel.close()
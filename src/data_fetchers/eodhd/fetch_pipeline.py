@@ -0,0 +1,374 @@
+import asyncio
+import datetime
+import json
+import logging
+import os
+import random
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from dataclasses import dataclass, field
+from typing import Callable, Iterable
+
+import pandas as pd
+
+from src.data_store.market_data_store import MarketDataStore, market_data_store
+
+logger = logging.getLogger(__name__)
+
+# EODHD Fetch Pipeline
+#
+# Concurrent replacement for the sequential baseline, daily bulk and intraday
+# pulls. Jobs go through a queue to a pool of async workers. Every request
+# first takes tokens from a shared token bucket sized to the API quota.
+# Throttled and failed requests are retried with exponential backoff. Finished
+# jobs are appended to a checkpoint file, so a rerun skips them and resumes
+# where the last run stopped, on whatever day it is rerun. The default
+# checkpoints are named after the job parameters (from date, bulk date,
+# interval and range). A run that finishes with no failures deletes its
+# checkpoint, so the next run with the same parameters fetches everything again.
+#
+# Daily bars go straight into the market data store, one append per ticker or
+# bulk response, so backtests and the signal service see them. An exchange
+# still on CSVs is migrated before its first write. Intraday bars are still one
+# CSV per ticker. Requests run on the stdlib HTTP client in worker threads;
+# base_url can point at a local stub server for testing.
+
+EODHD_BASE_URL = "https://eodhd.com/api"
+
+# EODHD allows 1000 API calls a minute; an intraday request costs 5 calls.
+DEFAULT_CALLS_PER_MINUTE = 1000
+EOD_CALL_COST = 1
+INTRADAY_CALL_COST = 5
+# A bulk request for a whole exchange costs 100 calls
+BULK_CALL_COST = 100
+
+# Columns kept from each daily bar, in the order of the baseline data
+BAR_COLUMNS = ["date", "open", "high", "low", "close", "adjusted_close", "volume"]
+
+_RETRY_STATUS = {429, 500, 502, 503, 504}
+
+
+class TokenBucket:
+    """Async token bucket: ``rate`` tokens per second, bursting up to ``capacity``."""
+
+    def __init__(self, rate: float, capacity: float | None = None):
+        if rate <= 0:
+            raise ValueError(f"Rate must be positive, got {rate}")
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else rate
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self, tokens: float = 1) -> None:
+        if tokens > self.capacity:
+            raise ValueError(f"Cannot take {tokens} tokens from a bucket of {self.capacity}")
+        # Waiters queue on the lock, so tokens are handed out in arrival order.
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                await asyncio.sleep((tokens - self._tokens) / self.rate)
+
+
+class Checkpoint:
+    """Append-only record of finished job keys, one per line."""
+
+    def __init__(self, path: str | None):
+        self.path = path
+        self.done = set()
+        if path and os.path.exists(path):
+            with open(path) as f:
+                self.done = {line.strip() for line in f if line.strip()}
+
+    def mark(self, key: str) -> None:
+        self.done.add(key)
+        if self.path:
+            with open(self.path, "a") as f:
+                f.write(f"{key}\n")
+
+    def clear(self) -> None:
+        self.done = set()
+        if self.path and os.path.exists(self.path):
+            os.remove(self.path)
+
+
+@dataclass
+class FetchJob:
+    """One API request and what to do with its JSON response."""
+
+    key: str
+    endpoint: str
+    params: dict = field(default_factory=dict)
+    handle: Callable | None = None
+    cost: int = EOD_CALL_COST
+
+
+class FetchPipeline:
+    def __init__(
+        self,
+        api_token: str,
+        base_url: str = EODHD_BASE_URL,
+        workers: int = 8,
+        calls_per_minute: float = DEFAULT_CALLS_PER_MINUTE,
+        max_retries: int = 5,
+        backoff: float = 1.0,
+        timeout: float = 30.0,
+        checkpoint_path: str | None = None,
+    ):
+        self.api_token = api_token
+        self.base_url = base_url.rstrip("/")
+        self.workers = workers
+        self.calls_per_minute = calls_per_minute
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.checkpoint = Checkpoint(checkpoint_path)
+
+    def _url(self, job: FetchJob) -> str:
+        params = {**job.params, "api_token": self.api_token, "fmt": "json"}
+        return f"{self.base_url}/{job.endpoint}?{urllib.parse.urlencode(params)}"
+
+    def _get(self, url: str):
+        with urllib.request.urlopen(url, timeout=self.timeout) as response:
+            return json.loads(response.read())
+
+    async def _fetch(self, job: FetchJob, bucket: TokenBucket):
+        url = self._url(job)
+        for attempt in range(self.max_retries + 1):
+            # Retries count against the quota too, so every attempt takes tokens.
+            await bucket.acquire(job.cost)
+            try:
+                return await asyncio.to_thread(self._get, url)
+            except urllib.error.HTTPError as exc:
+                if exc.code not in _RETRY_STATUS or attempt == self.max_retries:
+                    raise
+                retry_after = exc.headers.get("Retry-After") if exc.headers else None
+                delay = float(retry_after) if retry_after and retry_after.isdigit() else self.backoff * 2**attempt
+            except (urllib.error.URLError, TimeoutError, ConnectionError):
+                if attempt == self.max_retries:
+                    raise
+                delay = self.backoff * 2**attempt
+            delay += random.uniform(0, delay / 2)
+            logger.warning("Retrying %s in %.1fs (attempt %s)", job.key, delay, attempt + 1)
+            await asyncio.sleep(delay)
+
+    async def _worker(self, queue: asyncio.Queue, bucket: TokenBucket, summary: dict) -> None:
+        while True:
+            job = await queue.get()
+            try:
+                data = await self._fetch(job, bucket)
+                if job.handle is not None:
+                    await asyncio.to_thread(job.handle, data)
+                self.checkpoint.mark(job.key)
+                summary["completed"] += 1
+                logger.info("Fetched %s", job.key)
+            except Exception as exc:
+                summary["failed"][job.key] = repr(exc)
+                logger.error("Failed to fetch %s: %s", job.key, exc)
+            finally:
+                queue.task_done()
+
+    async def run(self, jobs: Iterable[FetchJob]) -> dict:
+        """Run every job not already in the checkpoint.
+
+        The checkpoint is deleted once every job has succeeded. Returns a summary with ``completed`` and ``skipped`` counts and a
+        ``failed`` mapping of job key to error.
+        """
+
+        summary = {"completed": 0, "skipped": 0, "failed": {}}
+        queue = asyncio.Queue()
+        max_cost = EOD_CALL_COST
+        for job in jobs:
+            if job.key in self.checkpoint.done:
+                summary["skipped"] += 1
+            else:
+                queue.put_nowait(job)
+                max_cost = max(max_cost, job.cost)
+        # Room for the most expensive request even when the per-second rate is lower
+        bucket = TokenBucket(self.calls_per_minute / 60, capacity=max(self.calls_per_minute / 60, max_cost))
+
+        workers = [asyncio.create_task(self._worker(queue, bucket, summary)) for _ in range(self.workers)]
+        try:
+            await queue.join()
+        finally:
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+        if not summary["failed"]:
+            # Nothing left to resume
+            self.checkpoint.clear()
+        logger.info(
+            "Fetched %s jobs, skipped %s, failed %s",
+            summary["completed"],
+            summary["skipped"],
+            len(summary["failed"]),
+        )
+        return summary
+
+
+def _write_csv(path: str) -> Callable:
+    def handle(data) -> None:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        # Write next to the target first so an interrupted run never leaves a partial file.
+        pd.DataFrame(data).to_csv(f"{path}.tmp", index=False)
+        os.replace(f"{path}.tmp", path)
+
+    return handle
+
+
+def bars_frame(data, ticker: str | None = None) -> pd.DataFrame:
+    """Long-format daily bars from an eod (one ticker) or bulk (``code`` per row) response."""
+
+    frame = pd.DataFrame(data)
+    if frame.empty:
+        return pd.DataFrame(columns=["ticker"] + BAR_COLUMNS)
+    frame = frame.assign(ticker=ticker) if ticker is not None else frame.rename(columns={"code": "ticker"})
+    return frame[["ticker"] + [column for column in BAR_COLUMNS if column in frame.columns]]
+
+
+def _append_bars(store: MarketDataStore, exchange: str, lock: threading.Lock, ticker: str | None = None,
+                 new_tickers: bool = True) -> Callable:
+    def handle(data) -> None:
+        bars = bars_frame(data, ticker)
+        if bars.empty:
+            return
+        # Handlers run on worker threads; appends read and rewrite the exchange's last-date index.
+        with lock:
+            store.append_bars(exchange, bars, new_tickers=new_tickers)
+
+    return handle
+
+
+def _prepare_store(store: MarketDataStore, exchanges: Iterable[str]) -> None:
+    # An exchange still on CSVs is converted before its first Parquet write;
+    # once it has Parquet parts the store no longer reads its CSVs
+    for exchange in exchanges:
+        if not store.has_exchange(exchange):
+            store.migrate_from_csv([exchange])
+
+
+def group_tickers_by_exchange(tickers_json_path: str) -> dict[str, list[str]]:
+    with open(tickers_json_path, "r") as f:
+        tickers_data = json.load(f)
+    tickers_by_exchange = {}
+    for ticker_data in tickers_data:
+        tickers_by_exchange.setdefault(ticker_data["Exchange"], []).append(ticker_data["Code"])
+    return tickers_by_exchange
+
+
+def baseline_jobs(tickers_by_exchange: dict[str, list[str]], store: MarketDataStore, from_date: str) -> list[FetchJob]:
+    """Daily history per ticker, appended to the exchange in the market data store."""
+
+    lock = threading.Lock()
+    return [
+        FetchJob(
+            key=f"eod:{exchange}:{ticker}",
+            endpoint=f"eod/{ticker}",
+            params={"from": from_date},
+            handle=_append_bars(store, exchange, lock, ticker=ticker),
+        )
+        for exchange, tickers in tickers_by_exchange.items()
+        for ticker in tickers
+    ]
+
+
+def bulk_jobs(exchanges: list[str], store: MarketDataStore, date: str) -> list[FetchJob]:
+    """One day of bars for every ticker of each exchange, appended to the store in one write."""
+
+    lock = threading.Lock()
+    return [
+        FetchJob(
+            key=f"bulk:{exchange}:{date}",
+            endpoint=f"eod-bulk-last-day/{exchange}",
+            params={"date": date},
+            handle=_append_bars(store, exchange, lock, new_tickers=False),
+            cost=BULK_CALL_COST,
+        )
+        for exchange in exchanges
+    ]
+
+
+def intraday_jobs(
+    tickers: list[str],
+    output_folder: str,
+    interval: str = "1m",
+    from_timestamp: int | None = None,
+    to_timestamp: int | None = None,
+) -> list[FetchJob]:
+    """Intraday bars per US ticker into {output_folder}/{ticker}{interval}.csv."""
+
+    params = {"interval": interval}
+    if from_timestamp is not None:
+        params["from"] = from_timestamp
+    if to_timestamp is not None:
+        params["to"] = to_timestamp
+    return [
+        FetchJob(
+            key=f"intraday:{interval}:{ticker}:{from_timestamp}:{to_timestamp}",
+            endpoint=f"intraday/{ticker}.US",
+            params=params,
+            handle=_write_csv(os.path.join(output_folder, f"{ticker}{interval}.csv")),
+            cost=INTRADAY_CALL_COST,
+        )
+        for ticker in tickers
+    ]
+
+
+async def fetch_baseline_data(
+    api_token: str,
+    tickers_json_path: str,
+    from_date: str | None = None,
+    store: MarketDataStore = market_data_store,
+    **kwargs,
+):
+    """Daily history for every ticker in the list into the market data store, resumable via a checkpoint.
+
+    from_date defaults to 910 days ago, as in get_baseline. Each ticker is
+    appended as it arrives and every exchange is compacted at the end.
+    """
+
+    os.makedirs(store.root, exist_ok=True)
+    kwargs.setdefault(
+        "checkpoint_path", os.path.join(store.root, f".baseline_{from_date or 'default'}.checkpoint")
+    )
+    from_date = from_date or (datetime.date.today() - datetime.timedelta(days=910)).isoformat()
+    tickers_by_exchange = group_tickers_by_exchange(tickers_json_path)
+    _prepare_store(store, tickers_by_exchange)
+    pipeline = FetchPipeline(api_token, **kwargs)
+    summary = await pipeline.run(baseline_jobs(tickers_by_exchange, store, from_date))
+    if summary["completed"]:
+        for exchange in tickers_by_exchange:
+            store.compact(exchange)
+    return summary
+
+
+async def fetch_bulk_data(api_token: str, exchanges: list[str], date: str,
+                          store: MarketDataStore = market_data_store, **kwargs):
+    """One day's bars for every stored ticker of each exchange, appended to the market data store."""
+
+    os.makedirs(store.root, exist_ok=True)
+    kwargs.setdefault("checkpoint_path", os.path.join(store.root, f".bulk_{date}.checkpoint"))
+    _prepare_store(store, exchanges)
+    pipeline = FetchPipeline(api_token, **kwargs)
+    return await pipeline.run(bulk_jobs(exchanges, store, date))
+
+
+async def fetch_tick_data(api_token: str, tickers: list[str], output_folder: str, interval: str = "1m", **kwargs):
+    """Intraday bars for every ticker, one CSV each, resumable via a checkpoint."""
+
+    from_timestamp = kwargs.pop("from_timestamp", None)
+    to_timestamp = kwargs.pop("to_timestamp", None)
+    kwargs.setdefault(
+        "checkpoint_path",
+        os.path.join(output_folder, f".intraday_{interval}_{from_timestamp}_{to_timestamp}.checkpoint"),
+    )
+    pipeline = FetchPipeline(api_token, **kwargs)
+    return await pipeline.run(intraday_jobs(tickers, output_folder, interval, from_timestamp, to_timestamp))
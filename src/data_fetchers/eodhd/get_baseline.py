@@ -1,50 +1,14 @@
-import json
-import os
-import pandas as pd
-from datetime import datetime, timedelta
-from eodhd import APIClient
+import asyncio
+from src.data_fetchers.eodhd.fetch_pipeline import fetch_baseline_data as fetch_baseline_pipeline
+from src.data_fetchers.eodhd.update_eod_data import get_store
 
 def fetch_baseline_data(api_token, tickers_json_path, output_folder):
-    # Initialize the EODHD client
-    eodhd_client = APIClient(api_token)
-    
+    # Blocking entry point kept for existing callers. The last 910 days of every
+    # ticker go through the fetch pipeline into the market data store next to
+    # output_folder, where backtests and the signal service read them
     print("Fetching baseline data...")
-    # Read tickers from the JSON file
-    with open(tickers_json_path, 'r') as f:
-        tickers_data = json.load(f)
-    
-    # Group tickers by exchange
-    tickers_by_exchange = {}
-    for ticker_data in tickers_data:
-        exchange = ticker_data['Exchange']
-        code = ticker_data['Code']
-        if exchange not in tickers_by_exchange:
-            tickers_by_exchange[exchange] = []
-        tickers_by_exchange[exchange].append(code)
-    
-    print(tickers_by_exchange)
-    # Calculate the date 2 years ago from today
-    two_years_ago = (datetime.now() - timedelta(days=910)).strftime('%Y-%m-%d')
-    print(two_years_ago)
-    # Fetch and save data for each ticker, grouped by exchange
-    for exchange, tickers in tickers_by_exchange.items():
-        print('exchange', exchange)
-        exchange_folder = os.path.join(output_folder, exchange)
-        os.makedirs(exchange_folder, exist_ok=True)
-        
-        for ticker in tickers:
-            print(f"Fetching data for {ticker} on {exchange}...")
-            
-            # Fetch data for the past 2 years
-            data = eodhd_client.get_eod_historical_stock_market_data(ticker, from_date=two_years_ago)
-
-            # Save to a CSV file
-            output_file_path = os.path.join(exchange_folder, f"{ticker}_baseline.csv")
-            # Convert to DataFrame
-            df = pd.DataFrame(data)
-
-            # Write to CSV
-            df.to_csv(output_file_path, index=False)
-            print(f"Data for {ticker} saved in {output_file_path}")
-
-
+    summary = asyncio.run(fetch_baseline_pipeline(api_token, tickers_json_path, store=get_store(output_folder)))
+    for job, error in summary['failed'].items():
+        print(f"An error occurred while fetching {job}: {error}")
+    print(f"Fetched {summary['completed']} tickers, skipped {summary['skipped']}")
+    return summary
@@ -5,6 +5,7 @@ from eod import EodHistoricalData
 import asyncio
 import json
 from dotenv import load_dotenv
+from src.data_fetchers.eodhd import fetch_pipeline
 import os
 
 load_dotenv()
@@ -17,18 +18,14 @@ client = EodHistoricalData(api_token)
 # Function to fetch and update data
 
 
-async def fetch_and_update_tick_data(tick_data_output_path, stock_universe, interval='1m'):
-    # Get the list of stock_universe based on existing folders
-
-    # Fetch bulk market data for each stock
-    while not stock_universe.empty():
-        stock = await stock_universe.get()
-        print(stock)
-        bulk_data = client.get_prices_intraday(
-            f'{stock}.US', interval=interval, fmt='csv',)
-        # Update CSV files for each ticker in the bulk data
-        pd.DataFrame(bulk_data).to_csv(
-            f'{tick_data_output_path}/{stock}{interval}.csv', index=False)
+async def fetch_and_update_tick_data(tick_data_output_path, stock_universe, interval='1m', **kwargs):
+    # Every stock goes through the fetch pipeline: concurrent, rate limited,
+    # retried and resumable. Writes {tick_data_output_path}/{stock}{interval}.csv
+    summary = await fetch_pipeline.fetch_tick_data(
+        api_token, list(stock_universe), tick_data_output_path, interval, **kwargs)
+    for job, error in summary['failed'].items():
+        print(f"An error occurred while fetching {job}: {error}")
+    return summary
 
 
 async def fetch_tick_data(tick_data_output_path, stock, interval='1m'):
@@ -57,11 +54,7 @@ async def main(tick_data_output_path, from_to, interval='1m'):
         # 'DDOG'
     ]
     print(stock_universe)
-    work_queue = asyncio.Queue()
-    for stock in stock_universe:
-        await work_queue.put(stock)
-
-    await asyncio.gather(
-        asyncio.create_task(fetch_and_update_tick_data(
-            tick_data_output_path, work_queue, from_to, interval)),
-    )
+    from_timestamp, to_timestamp = from_to or (None, None)
+    return await fetch_and_update_tick_data(
+        tick_data_output_path, stock_universe, interval,
+        from_timestamp=from_timestamp, to_timestamp=to_timestamp)
@@ -0,0 +1,273 @@
+import glob
+import json
+import logging
+import os
+from datetime import datetime
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_STORE_ROOT = "../data/market_data"
+DEFAULT_CSV_ROOT = "../data/baseline_data"
+
+# Market Data Store
+#
+# Daily bars are kept per exchange as a directory of Parquet part files in long
+# format (ticker, date, open, high, low, close, ...). Every part is sorted by
+# ticker then date and written in small row groups, so the min/max statistics
+# let a reader skip everything but the requested ticker and date range, and
+# only the requested columns are decoded. The migration writes one "baseline"
+# part per exchange; daily updates append one small part per exchange next to
+# it, and compact() folds them back into a single part. A JSON index with the
+# last stored date per ticker lets appends skip rows already on disk without
+# reading the history.
+#
+# Exchanges that have not been migrated yet are read from the old
+# baseline_data/{exchange}/{ticker}_baseline.csv tree, so this module is the
+# single read path either way. pyarrow is only needed once Parquet is used.
+
+_ROW_GROUP_SIZE = 4096
+_INDEX_FILE = "_last_dates.json"
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.dataset
+        import pyarrow.parquet
+    except ImportError as exc:  # pragma: no cover - depends on the environment
+        raise ImportError("The Parquet market data store needs pyarrow: pip install pyarrow") from exc
+    return pyarrow
+
+
+def _as_date(value):
+    return pd.Timestamp(value).date() if value is not None else None
+
+
+class MarketDataStore:
+    def __init__(self, root: str = DEFAULT_STORE_ROOT, csv_root: str = DEFAULT_CSV_ROOT):
+        self.root = root
+        self.csv_root = csv_root
+
+    def _exchange_dir(self, exchange: str) -> str:
+        return os.path.join(self.root, exchange)
+
+    def _index_path(self, exchange: str) -> str:
+        return os.path.join(self._exchange_dir(exchange), _INDEX_FILE)
+
+    def _write_index(self, exchange: str, index: dict[str, str]) -> None:
+        path = self._index_path(exchange)
+        with open(f"{path}.tmp", "w") as f:
+            json.dump(index, f, sort_keys=True)
+        os.replace(f"{path}.tmp", path)
+
+    def _parts(self, exchange: str) -> list[str]:
+        return sorted(glob.glob(os.path.join(self._exchange_dir(exchange), "*.parquet")))
+
+    def has_exchange(self, exchange: str) -> bool:
+        """True once the exchange has been migrated to Parquet."""
+
+        return bool(self._parts(exchange))
+
+    def exchanges(self) -> list[str]:
+        names = set()
+        for root in (self.root, self.csv_root):
+            if os.path.isdir(root):
+                names.update(name for name in os.listdir(root) if os.path.isdir(os.path.join(root, name)))
+        return sorted(names)
+
+    def tickers(self, exchange: str) -> list[str]:
+        if not self.has_exchange(exchange):
+            files = os.listdir(os.path.join(self.csv_root, exchange))
+            return sorted(filename.split("_")[0] for filename in files)
+        table = self._dataset(exchange).to_table(columns=["ticker"])
+        return sorted(table.column("ticker").unique().to_pylist())
+
+    def _dataset(self, exchange: str):
+        pa = _pyarrow()
+        return pa.dataset.dataset(self._parts(exchange), format="parquet")
+
+    def _filter(self, tickers=None, start=None, end=None):
+        pa = _pyarrow()
+        field = pa.dataset.field
+        expression = None
+        conditions = []
+        if tickers is not None:
+            conditions.append(field("ticker").isin(list(tickers)))
+        if start is not None:
+            conditions.append(field("date") >= _as_date(start))
+        if end is not None:
+            conditions.append(field("date") <= _as_date(end))
+        for condition in conditions:
+            expression = condition if expression is None else expression & condition
+        return expression
+
+    def read_exchange(
+        self,
+        exchange: str,
+        columns: list[str] | None = None,
+        start=None,
+        end=None,
+        tickers: list[str] | None = None,
+    ) -> pd.DataFrame:
+        """Long-format bars for an exchange, filtered by ticker and date and projected to ``columns``.
+
+        The result always carries ``ticker`` and ``date`` and is sorted by both.
+        """
+
+        if not self.has_exchange(exchange):
+            frames = []
+            for ticker in tickers or self.tickers(exchange):
+                data = self._read_csv(exchange, ticker, columns, start, end)
+                if not data.empty:
+                    frames.append(data.assign(ticker=ticker))
+            return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+
+        projection = None
+        if columns is not None:
+            projection = ["ticker", "date"] + [col for col in columns if col not in ("ticker", "date")]
+        table = self._dataset(exchange).to_table(columns=projection, filter=self._filter(tickers, start, end))
+        data = table.to_pandas(date_as_object=False)
+        if data.empty:
+            return data
+        data["ticker"] = data["ticker"].astype(str)
+        # Later parts win when a (ticker, date) pair was written twice.
+        data = data.drop_duplicates(["ticker", "date"], keep="last")
+        return data.sort_values(["ticker", "date"], kind="stable").reset_index(drop=True)
+
+    def read_ticker(
+        self,
+        exchange: str,
+        ticker: str,
+        columns: list[str] | None = None,
+        start=None,
+        end=None,
+    ) -> pd.DataFrame:
+        """Daily bars for one ticker in date order, in the shape of the old baseline CSV."""
+
+        if not self.has_exchange(exchange):
+            return self._read_csv(exchange, ticker, columns, start, end)
+        data = self.read_exchange(exchange, columns, start, end, tickers=[ticker])
+        if data.empty:
+            return data
+        return data.drop(columns="ticker")
+
+    def _read_csv(self, exchange: str, ticker: str, columns=None, start=None, end=None) -> pd.DataFrame:
+        path = os.path.join(self.csv_root, exchange, f"{ticker}_baseline.csv")
+        usecols = None if columns is None else lambda col: col == "date" or col in columns
+        data = pd.read_csv(path, usecols=usecols)
+        if "date" in data.columns:
+            data["date"] = pd.to_datetime(data["date"])
+            if start is not None:
+                data = data[data["date"] >= pd.Timestamp(start)]
+            if end is not None:
+                data = data[data["date"] <= pd.Timestamp(end)]
+        return data.reset_index(drop=True)
+
+    def write_part(self, exchange: str, data: pd.DataFrame, name: str | None = None) -> str:
+        """Write long-format bars (must include ``ticker`` and ``date``) as a new part file."""
+
+        pa = _pyarrow()
+        data = data.copy()
+        data["date"] = pd.to_datetime(data["date"]).dt.date
+        for column in data.columns:
+            if column not in ("ticker", "date"):
+                data[column] = pd.to_numeric(data[column], errors="coerce").astype("float64")
+        data = data.sort_values(["ticker", "date"], kind="stable")
+
+        table = pa.Table.from_pandas(data, preserve_index=False)
+        table = table.set_column(
+            table.schema.get_field_index("ticker"), "ticker", table.column("ticker").dictionary_encode()
+        )
+
+        # Part names start with the write time so that sorting them gives write
+        # order, which is what lets later parts override earlier ones on read.
+        stem = datetime.now().strftime("%Y%m%dT%H%M%S%f")
+        if name:
+            stem = f"{stem}-{name}"
+        os.makedirs(self._exchange_dir(exchange), exist_ok=True)
+        path = os.path.join(self._exchange_dir(exchange), f"part-{stem}.parquet")
+        pa.parquet.write_table(table, path, row_group_size=_ROW_GROUP_SIZE, compression="zstd")
+
+        # Keep the last-date index current once it exists; last_dates() builds it otherwise.
+        if os.path.exists(self._index_path(exchange)):
+            index = self.last_dates(exchange)
+            for ticker, date in data.groupby("ticker", sort=False)["date"].max().items():
+                date = date.strftime("%Y-%m-%d")
+                index[ticker] = max(index.get(ticker, date), date)
+            self._write_index(exchange, index)
+        return path
+
+    def last_dates(self, exchange: str) -> dict[str, str]:
+        """Latest stored date (YYYY-MM-DD) per ticker, read from the index next to the parts."""
+
+        path = self._index_path(exchange)
+        if os.path.exists(path):
+            with open(path) as f:
+                return json.load(f)
+        if not self.has_exchange(exchange):
+            return {}
+        data = self._dataset(exchange).to_table(columns=["ticker", "date"]).to_pandas(date_as_object=False)
+        last = data.groupby(data["ticker"].astype(str))["date"].max()
+        index = {ticker: date.strftime("%Y-%m-%d") for ticker, date in last.items()}
+        self._write_index(exchange, index)
+        return index
+
+    def append_bars(self, exchange: str, data: pd.DataFrame, new_tickers: bool = False) -> int:
+        """Append long-format bars for an exchange in a single part write.
+
+        Rows on or before a ticker's last stored date are dropped using the
+        last-date index, so re-running an update is a no-op. Tickers the store
+        does not know yet are skipped unless ``new_tickers`` is set. Returns the
+        number of rows written.
+        """
+
+        index = self.last_dates(exchange)
+        data = data.assign(date=pd.to_datetime(data["date"]))
+        last = pd.to_datetime(data["ticker"].map(index))
+        known = last.notna()
+        if not new_tickers and (~known).any():
+            logger.info("Skipping %s rows for tickers not stored on %s", int((~known).sum()), exchange)
+        keep = (data["date"] > last) if not new_tickers else (~known | (data["date"] > last))
+        fresh = data[keep].drop_duplicates(["ticker", "date"], keep="last")
+        if fresh.empty:
+            return 0
+        self.write_part(exchange, fresh, name="update")
+        return len(fresh)
+
+    def compact(self, exchange: str) -> str | None:
+        """Rewrite all parts of an exchange as one part, dropping overridden rows."""
+
+        parts = self._parts(exchange)
+        if len(parts) < 2:
+            return parts[0] if parts else None
+        path = self.write_part(exchange, self.read_exchange(exchange), name="compacted")
+        for part in parts:
+            os.remove(part)
+        return path
+
+    def migrate_from_csv(self, exchanges: list[str] | None = None) -> None:
+        """One-time conversion of baseline_data/{exchange}/{ticker}_baseline.csv into Parquet."""
+
+        for exchange in exchanges or sorted(os.listdir(self.csv_root)):
+            if not os.path.isdir(os.path.join(self.csv_root, exchange)):
+                continue
+            if self.has_exchange(exchange):
+                logger.info("%s is already migrated, skipping", exchange)
+                continue
+            frames = []
+            for ticker in self.tickers(exchange):
+                try:
+                    frames.append(self._read_csv(exchange, ticker).assign(ticker=ticker))
+                except Exception as exc:  # pragma: no cover - defensive logging
+                    logger.exception("Could not read %s on %s: %s", ticker, exchange, exc)
+            frames = [frame for frame in frames if not frame.empty]
+            if not frames:
+                continue
+            path = self.write_part(exchange, pd.concat(frames, ignore_index=True), name="baseline")
+            logger.info("Migrated %s tickers on %s to %s", len(frames), exchange, path)
+
+
+# Shared instance with the default ../data paths used by the backtester and paper trading.
+market_data_store = MarketDataStore()
@@ -1,12 +1,87 @@
 from alpaca.trading.client import TradingClient
 from alpaca.trading.requests import GetAssetsRequest, MarketOrderRequest, LimitOrderRequest, StopOrderRequest, StopLimitOrderRequest, GetOrdersRequest, ClosePositionRequest
-from alpaca.trading.enums import OrderSide, TimeInForce, OrderClass
+from alpaca.trading.enums import OrderSide, TimeInForce, OrderClass, PositionSide
 from alpaca.common.enums import BaseURL
 from src.paper_trading.position_sizing import calculate_position_sizes, calculate_position_size, adjust_position_for_volatility
 from dotenv import load_dotenv
 import os
 from alpaca.trading.stream import TradingStream
+from alpaca.trading.enums import TradeEvent
 import asyncio
+import datetime
+import threading
+import time
+
+# Broker state cache
+#
+# The account, the market clock and the open positions are cached. The hot
+# path (on_signal_buy, on_signal_sell, the bots' position lookups) reads the
+# cache and makes no REST call while an entry is within its TTL. Fills from the
+# trade updates stream are applied to the cache directly: the symbol's
+# position takes the update's position_qty and an averaged entry price, and
+# buying power moves by the fill's notional. Other order events change
+# nothing. REST stays the source of truth: reconcile() refetches every entry
+# as it expires, in the background, and readers get the last value meanwhile.
+# Without reconcile(), an expired entry is refetched on the next read. An
+# invalidated entry is always refetched on the next read; the class only
+# invalidates after its own orders when the trade updates stream is not
+# running. Call invalidate() to force a refetch after acting outside it.
+
+# Seconds each entry is trusted before it is refetched
+ACCOUNT_TTL = 30
+CLOCK_TTL = 300
+POSITIONS_TTL = 30
+
+_FILL_EVENTS = (TradeEvent.FILL.value, TradeEvent.PARTIAL_FILL.value)
+
+
+class CachedPosition:
+    """A position as the cache knows it after a fill, with Alpaca's field names and string values."""
+
+    def __init__(self, symbol, quantity, entry_price, price):
+        self.symbol = symbol
+        # Signed: negative for shorts
+        self.quantity = quantity
+        self.entry_price = entry_price
+        self.price = price
+
+    @property
+    def qty(self):
+        return str(abs(self.quantity))
+
+    @property
+    def side(self):
+        return PositionSide.LONG if self.quantity > 0 else PositionSide.SHORT
+
+    @property
+    def avg_entry_price(self):
+        return str(self.entry_price)
+
+    @property
+    def current_price(self):
+        return str(self.price)
+
+    @property
+    def market_value(self):
+        return str(self.quantity * self.price)
+
+    @property
+    def cost_basis(self):
+        return str(self.quantity * self.entry_price)
+
+    @property
+    def unrealized_pl(self):
+        return str(self.quantity * (self.price - self.entry_price))
+
+    def __repr__(self):
+        return f"CachedPosition({self.symbol} qty={self.quantity} entry={self.entry_price} price={self.price})"
+
+
+def _signed_qty(position):
+    if position is None:
+        return 0.0
+    qty = abs(float(position.qty))
+    return -qty if getattr(position.side, 'value', position.side) == PositionSide.SHORT.value else qty
 
 
 class AlpacaManager:
@@ -14,7 +89,7 @@ class AlpacaManager:
     ALPACA_SECRET_KEY = os.getenv("ALPACA_SECRET_KEY")
     ALPACA_API_KEY = os.getenv("ALPACA_API_KEY")
 
-    def __init__(self, stock_list):
+    def __init__(self, stock_list, account_ttl=ACCOUNT_TTL, clock_ttl=CLOCK_TTL, positions_ttl=POSITIONS_TTL):
         print('in alpaca manager init',
               self.ALPACA_API_KEY, self.ALPACA_SECRET_KEY)
         self.api = TradingClient(
@@ -22,29 +97,156 @@ class AlpacaManager:
         self.websocket = TradingStream(
             self.ALPACA_API_KEY, self.ALPACA_SECRET_KEY, paper=True)
 
-        self.account = self.api.get_account()
         self.positions = {}
         for stock in stock_list:
             self.positions[stock] = None
 
+        self.ttls = {'account': account_ttl,
+                     'clock': clock_ttl, 'positions': positions_ttl}
+        self._fetchers = {'account': self.api.get_account,
+                          'clock': self.api.get_clock, 'positions': self.get_positions}
+        # name -> (value, monotonic fetch time, or None once invalidated)
+        self._cache = {}
+        self._cache_lock = threading.Lock()
+        self._reconciling = False
+        # Buying power moved by fills since the account was last fetched
+        self._buying_power_change = 0.0
+        self._trade_updates_thread = None
+        self.trade_update_handlers = []
+
+        self.account = self.refresh('account')
+
+    def refresh(self, name):
+        """Refetch one cached entry ('account', 'clock' or 'positions') now."""
+        value = self._fetchers[name]()
+        with self._cache_lock:
+            self._cache[name] = (value, time.monotonic())
+            if name == 'account':
+                self.account = value
+                self._buying_power_change = 0.0
+            elif name == 'positions':
+                held = {position.symbol: position for position in value}
+                for symbol in set(self.positions) | set(held):
+                    self.positions[symbol] = held.get(symbol)
+        return value
+
+    def invalidate(self, *names):
+        """Mark cached entries stale; with no names, all of them."""
+        with self._cache_lock:
+            for name in names or tuple(self._cache):
+                if name in self._cache:
+                    self._cache[name] = (self._cache[name][0], None)
+
+    def _is_fresh(self, name):
+        entry = self._cache.get(name)
+        return entry is not None and entry[1] is not None and time.monotonic() - entry[1] < self.ttls[name]
+
+    def _cached(self, name):
+        with self._cache_lock:
+            entry = self._cache.get(name)
+            fresh = self._is_fresh(name)
+        # Only an expired entry is served while reconcile() refetches it; an
+        # invalidated one is known to be wrong, e.g. after an order placed with
+        # no trade updates stream to report its fill
+        if entry is not None and (fresh or self._reconciling and entry[1] is not None):
+            return entry[0]
+        return self.refresh(name)
+
+    async def reconcile(self, interval=5, trade_updates=True):
+        """Keep the cache fresh in the background; only one loop runs per manager."""
+        if self._reconciling:
+            return
+        self._reconciling = True
+        if trade_updates:
+            self.start_trade_updates()
+        try:
+            while True:
+                for name in self._fetchers:
+                    with self._cache_lock:
+                        fresh = self._is_fresh(name)
+                    if not fresh:
+                        try:
+                            await asyncio.to_thread(self.refresh, name)
+                        except Exception as e:
+                            print('error refreshing', name, e)
+                await asyncio.sleep(interval)
+        finally:
+            self._reconciling = False
+
+    def start_trade_updates(self):
+        """Run the trade updates stream on a background thread."""
+        if self._trade_updates_thread is not None:
+            return
+        self.websocket.subscribe_trade_updates(self.on_trade_updates)
+        self._trade_updates_thread = threading.Thread(
+            target=self.websocket.run, daemon=True, name='alpaca-trade-updates')
+        self._trade_updates_thread.start()
+
+    def subscribe_trade_updates(self, handler):
+        """Also call handler(trade) for every trade update, after the cache has seen it."""
+        self.trade_update_handlers.append(handler)
+
     def connect_websocket(self):
-        self.websocket.run()
         self.websocket.subscribe_trade_updates(self.on_trade_updates)
+        self.websocket.run()
 
-    def on_trade_updates(self, trade):
+    async def on_trade_updates(self, trade):
         print('trade update', trade)
+        self.apply_trade_update(trade)
+
+    def apply_trade_update(self, trade):
+        event = getattr(trade.event, 'value', trade.event)
+        if event in _FILL_EVENTS and trade.price is not None:
+            self.apply_fill(trade)
+        for handler in self.trade_update_handlers:
+            try:
+                handler(trade)
+            except Exception as e:
+                print('error in trade update handler', e)
+
+    def apply_fill(self, trade):
+        """Update the cached position and buying power from one fill, with no REST call."""
+        symbol = trade.order.symbol
+        price = float(trade.price)
+        fill_qty = float(trade.qty) if trade.qty is not None else 0.0
+        if getattr(trade.order.side, 'value', trade.order.side) == OrderSide.SELL.value:
+            fill_qty = -fill_qty
+        with self._cache_lock:
+            position = self.positions.get(symbol)
+            old_qty = _signed_qty(position)
+            entry_price = float(position.avg_entry_price) if position is not None else price
+            # The broker's position size is the source of truth
+            new_qty = float(trade.position_qty) if trade.position_qty is not None else old_qty + fill_qty
+            if old_qty == 0 or old_qty * fill_qty > 0:
+                # Opening or adding: average the entry price
+                entry_price = (entry_price * old_qty + price * fill_qty) / new_qty if new_qty else price
+            elif new_qty * old_qty < 0:
+                # Flipped through zero: the remainder opens at this price
+                entry_price = price
+            self.positions[symbol] = CachedPosition(symbol, new_qty, entry_price, price) if new_qty else None
+            # Opening exposure uses buying power and closing it frees it
+            self._buying_power_change -= (abs(new_qty) - abs(old_qty)) * price
 
     def is_market_open(self):
-        return self.api.get_clock().is_open
+        clock = self._cached('clock')
+        now = datetime.datetime.now(datetime.timezone.utc)
+        # The cached clock says when the market next opens or closes, so the
+        # answer stays right between refreshes
+        if clock.is_open and now >= clock.next_close or not clock.is_open and now >= clock.next_open:
+            self.invalidate('clock')
+            return not clock.is_open
+        return clock.is_open
 
     def get_account(self):
-        return self.account
+        return self._cached('account')
 
     def get_is_account_blocked(self):
-        return self.account.trading_blocked
+        return self.get_account().trading_blocked
 
     def get_buying_power(self):
-        return float(self.account.buying_power)
+        account = self.get_account()
+        with self._cache_lock:
+            return float(account.buying_power) + self._buying_power_change
 
     def get_all_assets(self):
         return self.api.get_assets()
@@ -59,29 +261,39 @@ class AlpacaManager:
         return self.api.get_orders()
 
     def get_order_by_id(self, order_id):
-        return self.api.get_order(order_id)
+        return self.api.get_order_by_id(order_id)
+
+    def cancel_order_by_id(self, order_id):
+        return self.api.cancel_order_by_id(order_id)
+
+    def get_order_by_client_id(self, client_id):
+        return self.api.get_order_by_client_id(client_id)
 
     async def get_and_store_positions(self):
-        while True:
-            await asyncio.sleep(5)
-            try:
-                positions = self.get_positions()
-                for position in positions:
-                    self.positions[position.symbol] = position
-            except Exception as e:
-                print('error getting positions', e)
+        await self.reconcile()
 
     def get_positions(self):
         return self.api.get_all_positions()
 
     def get_position_by_symbol(self, symbol):
-        return self.api.get_open_position(symbol)
+        """The cached open position in symbol, or None."""
+        self._cached('positions')
+        return self.positions.get(symbol)
+
+    def _after_order(self, *names):
+        # With the trade updates stream running its fills keep the cache current
+        if self._trade_updates_thread is None:
+            self.invalidate(*names)
 
     def close_all_positions(self):
-        return self.api.close_all_positions(True)
+        response = self.api.close_all_positions(True)
+        self._after_order('positions', 'account')
+        return response
 
     def close_position_by_symbol(self, symbol):
-        return self.api.close_position(symbol)
+        response = self.api.close_position(symbol)
+        self._after_order('positions', 'account')
+        return response
 
     def create_market_order(self, symbol, qty, side, time_in_force, take_profit=None, stop_loss=None):
         return MarketOrderRequest(symbol=symbol, qty=qty, side=side, time_in_force=time_in_force, take_profit=take_profit, stop_loss=stop_loss)
@@ -90,13 +302,17 @@ class AlpacaManager:
         return MarketOrderRequest(symbol=symbol, notional=notional, side=side, time_in_force=time_in_force, take_profit=take_profit, stop_loss=stop_loss, order_class=order_class)
 
     def create_oco_order(self, symbol, qty, time_in_force, take_profit=None, stop_loss=None):
-        return LimitOrderRequest(symbol=symbol, qty=qty, side=OrderSide.SELL, time_in_force=time_in_force, take_profit=take_profit, stop_loss=stop_loss, type=OrderClass.OCO)
+        # An OCO's own limit price is its take profit leg
+        limit_price = take_profit['limit_price'] if take_profit else None
+        return LimitOrderRequest(symbol=symbol, qty=qty, side=OrderSide.SELL, time_in_force=time_in_force, limit_price=limit_price, take_profit=take_profit, stop_loss=stop_loss, order_class=OrderClass.OCO)
 
     def create_limit_order(self, symbol, qty, side, time_in_force, limit_price, take_profit=None, stop_loss=None, order_class=OrderClass.SIMPLE):
         return LimitOrderRequest(symbol=symbol, qty=qty, side=side, time_in_force=time_in_force, limit_price=limit_price, take_profit=take_profit, stop_loss=stop_loss, order_class=order_class)
 
     def submit_order(self, order):
-        return self.api.submit_order(order)
+        response = self.api.submit_order(order)
+        self._after_order('positions', 'account')
+        return response
 
     def on_signal_buy(self, symbol, ask_price, ask_size, limit_price):
         position = None
@@ -9,11 +9,16 @@ from dotenv import load_dotenv
 import pandas as pd
 import os
 from src.paper_trading.order_templating import get_orders_from_position_sizes
+from src.paper_trading.order_pipeline import OrderPipeline, write_log
 from alpaca.trading.enums import OrderSide, TimeInForce
 from src.websockets.eodhd_websocket import EodHd_Websocket
 
 MAX_DECIMALS = 2
 
+# Orders in flight at once and submissions per minute at the open
+ORDER_CONCURRENCY = 8
+ORDERS_PER_MINUTE = 200
+
 
 class TradingServer:
     # Initialize the AlpacaManager with your API keys
@@ -83,28 +88,30 @@ class TradingServer:
         short_prepared_orders = pd.read_csv(
             f'../logs/prepared_orders/{exchange}/short/{datetime.now().strftime("%Y-%m-%d")}.csv')
 
-        submitted_orders = []
         # # Execute trades and log them
-        for [index, data] in long_prepared_orders.iterrows():
+        orders_to_send = []
+        for ticker, size in zip(long_prepared_orders['Stock'], long_prepared_orders['Size']):
             # qty = self.eodhd_websocket.convert_dollar_values_to_qty(
             #     ticker, dollar_value)
             # Get the price of the stock from websocket
-            ticker = data['Stock']
-            dollar_value = round(data['Size'], 2)
-            print('ticker', ticker)
-            print('dollar value', dollar_value)
+            dollar_value = round(size, 2)
             try:
-                order_to_send = self.alpaca_manager.create_notional_market_order(
-                    ticker, dollar_value, OrderSide.BUY, TimeInForce.DAY)
-                submitted_order = self.alpaca_manager.submit_order(
-                    order_to_send)
-                submitted_orders.append(submitted_order)
-                print(submitted_order)
+                orders_to_send.append(self.alpaca_manager.create_notional_market_order(
+                    ticker, dollar_value, OrderSide.BUY, TimeInForce.DAY))
             except Exception as e:
-                print('Order submission failed', e)
-        submitted_orders_df = pd.DataFrame(submitted_orders)
-        submitted_orders_df.to_csv(
-            f'../logs/submitted_orders/{exchange}/long/{datetime.now().strftime("%Y-%m-%d")}.csv')
+                print('Order creation failed', ticker, e)
+
+        # Client order ids are the batch id plus symbol and side, so rerunning
+        # today's batch never places an order twice, even if the list changed
+        today = datetime.now().strftime("%Y-%m-%d")
+        pipeline = OrderPipeline(
+            self.alpaca_manager, concurrency=ORDER_CONCURRENCY, orders_per_minute=ORDERS_PER_MINUTE)
+        results = pipeline.submit_batch(
+            orders_to_send, batch_id=f'{exchange}-long-{today}')
+        print(results[['symbol', 'status', 'attempts',
+              'latency_ms', 'error']].to_string())
+        write_log(
+            results, f'../logs/submitted_orders/{exchange}/long/{today}.parquet')
 
         # short_submitted_orders = []
         # for [index, data] in short_prepared_orders.iterrows():
@@ -0,0 +1,263 @@
+import threading
+import time
+from collections import deque
+
+from alpaca.trading.enums import OrderSide, PositionSide, TimeInForce
+
+# Exit Engine
+#
+# Manages exits from the quote stream instead of polling positions over REST.
+# Open positions live in a local book. It is seeded once from get_positions()
+# and then kept current from trade updates (fills, partial fills and the
+# resulting position_qty). The book also tracks which exit orders are open.
+#
+# Every incoming quote is checked against the ExitRules for that symbol's
+# position. That is a dict lookup and a fixed set of comparisons, so the cost
+# per quote does not grow with the number of symbols or positions. Longs are
+# valued at the bid and shorts at the ask.
+#
+# Each position has at most one exit order in flight. The symbol is marked as
+# closing before the order is sent. It is cleared when the order fills, is
+# canceled, rejected or expires. If no terminal update arrives within
+# close_timeout seconds, the order is looked up: one still open is canceled
+# first, and the mark is cleared only once the order is known to be done. A
+# lost trade update therefore cannot block exits forever, and a resting exit
+# order is never doubled.
+
+_TERMINAL_EVENTS = ("fill", "canceled", "rejected", "expired", "done_for_day")
+_TERMINAL_STATUSES = ("filled", "canceled", "rejected", "expired", "done_for_day", "replaced")
+_FILL_EVENTS = ("fill", "partial_fill")
+
+
+def _value(field):
+    return getattr(field, "value", field)
+
+
+class ExitRules:
+    """Exit thresholds; any left as None is not checked.
+
+    take_profit_pct / stop_loss_pct: move from the entry price, e.g. .005 for 0.5%.
+    take_profit_pl / stop_loss_pl: unrealized dollars, e.g. 15 and 10.
+    max_take_profit_value: only take the dollar profit below this market value.
+    rsi_exits: {indicator name: level}; longs exit above the level and shorts
+        below 100 - level.
+    partial_take_profit: on a take profit larger than the bid (ask) size, sell
+        only what is quoted, with a limit order at the quote.
+    """
+
+    def __init__(self, take_profit_pct=None, stop_loss_pct=None, take_profit_pl=None, stop_loss_pl=None,
+                 max_take_profit_value=None, rsi_exits=None, partial_take_profit=False):
+        self.take_profit_pct = take_profit_pct
+        self.stop_loss_pct = stop_loss_pct
+        self.take_profit_pl = take_profit_pl
+        self.stop_loss_pl = stop_loss_pl
+        self.max_take_profit_value = max_take_profit_value
+        self.rsi_exits = rsi_exits or {}
+        self.partial_take_profit = partial_take_profit
+
+
+class ExitPosition:
+    def __init__(self, symbol, qty, entry_price):
+        self.symbol = symbol
+        # Signed: negative for shorts
+        self.qty = qty
+        self.entry_price = entry_price
+        self.opened_at = time.monotonic()
+        # The open exit order: (order id, client order id, monotonic send time)
+        self.closing = None
+
+    @property
+    def is_long(self):
+        return self.qty > 0
+
+
+class ExitEngine:
+    def __init__(self, alpaca_manager, rules, indicators=None, close_timeout=30):
+        # alpaca_manager: AlpacaManager or SimulatedBroker
+        # indicators: an IndicatorEngine with the columns named in rules.rsi_exits
+        self.alpaca_manager = alpaca_manager
+        self.rules = rules
+        self.indicators = indicators
+        self.close_timeout = close_timeout
+        self.positions = {}
+        self.exits = []
+        # Recently finished order ids, for updates that beat the order's own response
+        self._finished = deque(maxlen=1000)
+        self._lock = threading.Lock()
+
+    def start(self):
+        """Seed the book with one positions request and follow trade updates from then on."""
+        self.load_positions(self.alpaca_manager.get_positions())
+        self.alpaca_manager.subscribe_trade_updates(self.on_trade_update)
+        self.alpaca_manager.start_trade_updates()
+
+    def load_positions(self, positions):
+        with self._lock:
+            self.positions = {}
+            for position in positions:
+                self.positions[position.symbol] = self._from_broker(position)
+
+    @staticmethod
+    def _from_broker(position):
+        qty = float(position.qty)
+        if _value(position.side) == PositionSide.SHORT.value:
+            qty = -abs(qty)
+        return ExitPosition(position.symbol, qty, float(position.avg_entry_price))
+
+    # Trade updates
+
+    def on_trade_update(self, trade):
+        event = _value(trade.event)
+        order = trade.order
+        with self._lock:
+            position = self.positions.get(order.symbol)
+            if event in _FILL_EVENTS and trade.qty is not None:
+                position = self._apply_fill(order.symbol, position, trade)
+            if event in _TERMINAL_EVENTS:
+                self._finished.append(str(order.id))
+            if position is not None and position.closing is not None and event in _TERMINAL_EVENTS:
+                order_id, client_order_id, _ = position.closing
+                if str(order.id) == order_id or order.client_order_id == client_order_id:
+                    position.closing = None
+
+    def _apply_fill(self, symbol, position, trade):
+        fill_qty = float(trade.qty)
+        if _value(trade.order.side) == OrderSide.SELL.value:
+            fill_qty = -fill_qty
+        price = float(trade.price)
+        if position is None:
+            position = self.positions[symbol] = ExitPosition(symbol, 0.0, price)
+
+        new_qty = position.qty + fill_qty
+        if trade.position_qty is not None:
+            # The broker's position size is the source of truth
+            new_qty = float(trade.position_qty)
+        if position.qty == 0 or position.qty * fill_qty > 0:
+            position.entry_price = (position.entry_price * position.qty + price * fill_qty) / new_qty
+        elif new_qty * position.qty < 0:
+            position.entry_price = price
+        position.qty = new_qty
+
+        if abs(new_qty) < 1e-9:
+            del self.positions[symbol]
+            return None
+        return position
+
+    # Quotes
+
+    def on_quote(self, symbol, quote):
+        """Check one symbol's position against the rules; returns the exit taken, if any."""
+        position = self.positions.get(symbol)
+        if position is None or quote is None:
+            return None
+        if position.closing is not None:
+            if time.monotonic() - position.closing[2] < self.close_timeout:
+                return None
+            position = self._release_stale_exit(position)
+            if position is None:
+                return None
+
+        if position.is_long:
+            price, size = quote['bid_price'], quote['bid_size']
+        else:
+            price, size = quote['ask_price'], quote['ask_size']
+        if price is None:
+            return None
+        reason = self.exit_reason(position, float(price))
+        if reason is None:
+            return None
+        return self._exit(position, reason, float(price), size)
+
+    def _release_stale_exit(self, position):
+        """Called once close_timeout passes with no terminal update for the exit order.
+
+        A live order (e.g. a resting partial take profit) is canceled and the
+        claim kept until the cancel is confirmed. An order that already
+        finished releases the claim; the position is then reread from the
+        broker, since the fill's update never arrived. Returns the position to
+        check against the rules, or None.
+        """
+        order_id, client_order_id, _ = position.closing
+        if order_id is None:
+            # The order request has not returned yet
+            return None
+        try:
+            order = self.alpaca_manager.get_order_by_id(order_id)
+            if _value(order.status) not in _TERMINAL_STATUSES:
+                print('no update for exit order, canceling it', position.symbol, order_id)
+                self.alpaca_manager.cancel_order_by_id(order_id)
+                # The canceled update releases the claim; if it is lost too, the next check does
+                position.closing = (order_id, client_order_id, time.monotonic())
+                return None
+            held = [held for held in self.alpaca_manager.get_positions() if held.symbol == position.symbol]
+        except Exception as e:
+            print('error checking exit order', position.symbol, e)
+            position.closing = (order_id, client_order_id, time.monotonic())
+            return None
+
+        print('exit order finished without an update', position.symbol, order_id)
+        with self._lock:
+            if self.positions.get(position.symbol) is not position:
+                return None
+            if not held:
+                del self.positions[position.symbol]
+                return None
+            position.qty = self._from_broker(held[0]).qty
+            position.closing = None
+        return position
+
+    def exit_reason(self, position, price):
+        rules = self.rules
+        direction = 1 if position.is_long else -1
+        change = direction * (price - position.entry_price) / position.entry_price
+        pl = (price - position.entry_price) * position.qty
+        market_value = abs(price * position.qty)
+
+        if rules.take_profit_pct is not None and change > rules.take_profit_pct:
+            return 'take_profit'
+        if rules.stop_loss_pct is not None and change < -rules.stop_loss_pct:
+            return 'stop_loss'
+        if rules.take_profit_pl is not None and pl > rules.take_profit_pl and (
+                rules.max_take_profit_value is None or market_value < rules.max_take_profit_value):
+            return 'take_profit'
+        if rules.stop_loss_pl is not None and pl < -rules.stop_loss_pl:
+            return 'stop_loss'
+        if self.indicators is not None:
+            for name, level in rules.rsi_exits.items():
+                rsi = self.indicators.get(position.symbol, name)
+                if rsi is not None and (rsi > level if position.is_long else rsi < 100 - level):
+                    return 'rsi'
+        return None
+
+    def _exit(self, position, reason, price, size):
+        with self._lock:
+            if position.closing is not None or self.positions.get(position.symbol) is not position:
+                return None
+            # Claim the position before the request so no other quote can send a second order
+            position.closing = (None, None, time.monotonic())
+
+        qty = abs(position.qty)
+        partial = (reason == 'take_profit' and self.rules.partial_take_profit
+                   and size is not None and 0 < float(size) < qty)
+        try:
+            if partial:
+                side = OrderSide.SELL if position.is_long else OrderSide.BUY
+                order = self.alpaca_manager.submit_order(self.alpaca_manager.create_limit_order(
+                    position.symbol, int(size), side, TimeInForce.DAY, round(price, 2)))
+            else:
+                order = self.alpaca_manager.close_position_by_symbol(position.symbol)
+        except Exception as e:
+            print('error exiting position', position.symbol, e)
+            position.closing = None
+            return None
+
+        with self._lock:
+            if str(order.id) in self._finished:
+                position.closing = None
+            elif position.closing is not None:
+                position.closing = (str(order.id), order.client_order_id, position.closing[2])
+        exit = {'symbol': position.symbol, 'reason': reason, 'price': price,
+                'qty': int(size) if partial else qty, 'partial': partial}
+        self.exits.append(exit)
+        print('exiting position', exit)
+        return exit
@@ -1,9 +1,8 @@
 from src.backtest.backtester import optimize_alpha_for_bounds_by_exchange
-from src.paper_trading.paper_strategies.alpha_1_paper import generate_alpha_1_paper_long_signal, generate_alpha_1_paper_short_signal
 import pandas as pd
 
 
-from src.dataparsers.alpha_input_data_helpers import calculate_metrics, calculate_signals
+from src.paper_trading.signal_service import SignalService
 
 
 def get_signals_for_exchange(exchange, alpha_name):
@@ -36,52 +35,19 @@ def get_signals_for_exchange(exchange, alpha_name):
     # Split the balance into 5% chunks
 
     # Generate Signals
-
-    long_signals = []
-
-    for stock in top_stocks.iterrows():
-        # Get the data for the stock
-        print('klfshdkla')
-
-        ticker = stock[1]['Stock']
-
-        boundary = stock[1]['Bound']
-        print(boundary)
-        # adjusted_boundary = boundary * 1.1
-        df = pd.read_csv(
-            f'../data/baseline_data/{exchange}/{ticker}_baseline.csv')
-        df_with_metrics = calculate_metrics(df)
-        df_with_metrics_and_signals = calculate_signals(df_with_metrics)
-
-        long_signals.append([ticker, generate_alpha_1_paper_long_signal(
-            df_with_metrics_and_signals, boundary, ticker)])
-        buys = 0
-        for signal in long_signals:
-            if signal[1]:
-                buys = buys + 1
-        print(buys)
-
-    short_signals = []
-    for stock in top_stocks_short.iterrows():
-        # Get the data for the stock
-        print('klfshdkla')
-
-        ticker = stock[1]['Stock']
-
-        boundary = stock[1]['Bound']
-        print(boundary)
-        # adjusted_boundary = boundary * 1.1
-        df = pd.read_csv(
-            f'../data/baseline_data/{exchange}/{ticker}_baseline.csv')
-        df_with_metrics = calculate_metrics(df)
-        df_with_metrics_and_signals = calculate_signals(df_with_metrics)
-
-        short_signals.append([ticker, generate_alpha_1_paper_short_signal(
-            df_with_metrics_and_signals, boundary, ticker)])
-        buys = 0
-        for signal in short_signals:
-            if signal[1]:
-                buys = buys + 1
-        print(buys)
+    # Only the newest alpha per ticker is needed: keep rolling state between
+    # days and read just the bars that arrived since the last run
+    long_bounds = pd.Series(top_stocks['Bound'].to_numpy(), index=top_stocks['Stock'])
+    short_bounds = pd.Series(top_stocks_short['Bound'].to_numpy(), index=top_stocks_short['Stock'])
+    universe = list(dict.fromkeys([*long_bounds.index, *short_bounds.index]))
+
+    service = SignalService(exchange, alpha_name, universe)
+    service.catch_up()
+    service.snapshot()
+    long_flags, short_flags = service.evaluate(long_bounds, short_bounds)
+
+    long_signals = [[ticker, signal] for ticker, signal in long_flags.items()]
+    short_signals = [[ticker, signal] for ticker, signal in short_flags.items()]
+    print('longs', int(long_flags.sum()), 'shorts', int(short_flags.sum()))
 
     return [long_signals, short_signals]
@@ -1,41 +1,211 @@
-import pandas as pd
+import math
+
+import numpy as np
+
+# Bollinger Bands
+#
+# Prices go into a fixed-size ring buffer and the window mean and sum of squared
+# deviations (M2) are kept with Welford's update. While the window fills, each
+# price is a plain Welford step. Once full, the new price replaces the oldest
+# one in a single sliding step. Every price is O(1), and the sample standard
+# deviation (ddof=1) matches pandas' rolling().std(). With compensated=True the
+# mean and M2 updates use Kahan summation, which helps over long sessions of
+# near-constant prices. Either way the state is rebuilt from the buffer every
+# _RESYNC_EVERY prices so rounding error cannot build up.
+
+_RESYNC_EVERY = 10_000
+
+
+def _compensated_add(total, compensation, value):
+    adjusted = value - compensation
+    new_total = total + adjusted
+    return new_total, (new_total - total) - adjusted
 
 
 class BollingerBandsCalculator:
-    def __init__(self, period=20, num_std_dev=2):
+    def __init__(self, period=20, num_std_dev=2, compensated=False):
+        if period < 2:
+            raise ValueError(f"Period must be at least 2, got {period}")
         self.period = period
         self.num_std_dev = num_std_dev
-        self.price_data = pd.DataFrame()
-        self.metrics = None
+        self.compensated = compensated
+        self.buffer = [0.0] * period
+        self.count = 0
+        self.position = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self._mean_compensation = 0.0
+        self._m2_compensation = 0.0
+        self._updates = 0
         self.current_support = None
         self.current_resistance = None
         self.current_moving_avg = None
 
-    def add_price(self, price, symbol):
-        # Add the new price to the DataFrame
-        new_data = pd.DataFrame({'price': [price]}, index=[symbol])
-        self.price_data = pd.concat([self.price_data, new_data])
+    def _add(self, attribute, value):
+        compensation = f"_{attribute}_compensation"
+        if self.compensated:
+            total, error = _compensated_add(getattr(self, attribute), getattr(self, compensation), value)
+            setattr(self, attribute, total)
+            setattr(self, compensation, error)
+        else:
+            setattr(self, attribute, getattr(self, attribute) + value)
+
+    def _resync(self):
+        window = self.buffer[:self.count]
+        self.mean = math.fsum(window) / self.count
+        self.m2 = math.fsum((price - self.mean) ** 2 for price in window)
+        self._mean_compensation = 0.0
+        self._m2_compensation = 0.0
+
+    def add_price(self, price, symbol=None):
+        # symbol is accepted for compatibility; use BollingerBandsBank for several symbols
+        price = float(price)
+        old_mean = self.mean
+        if self.count < self.period:
+            self.count += 1
+            delta = price - old_mean
+            self._add("mean", delta / self.count)
+            self._add("m2", delta * (price - self.mean))
+        else:
+            oldest = self.buffer[self.position]
+            self._add("mean", (price - oldest) / self.period)
+            self._add("m2", (price - oldest) * (price - self.mean + oldest - old_mean))
+        self.buffer[self.position] = price
+        self.position = (self.position + 1) % self.period
 
-        # Ensure we only keep the last 'period' prices
-        if len(self.price_data) > self.period:
-            self.price_data = self.price_data[-self.period:]
+        self._updates += 1
+        if self._updates % _RESYNC_EVERY == 0:
+            self._resync()
 
         # Calculate Bollinger Bands if we have enough data
-        if len(self.price_data) == self.period:
+        if self.count == self.period:
             return self.calculate_bollinger_bands()
-        else:
-            return None
+        return None
 
     def calculate_bollinger_bands(self):
-        moving_avg = self.price_data['price'].rolling(
-            window=self.period).mean()
-        moving_std_dev = self.price_data['price'].rolling(
-            window=self.period).std()
-
-        upper_band = moving_avg + (moving_std_dev * self.num_std_dev)
-        lower_band = moving_avg - (moving_std_dev * self.num_std_dev)
-        self.current_support = lower_band.iloc[-1]
-        self.current_resistance = upper_band.iloc[-1]
-        self.current_moving_avg = moving_avg.iloc[-1]
-
-        return lower_band.iloc[-1], upper_band.iloc[-1], moving_avg.iloc[-1]
+        std_dev = math.sqrt(max(self.m2, 0.0) / (self.count - 1))
+        self.current_moving_avg = self.mean
+        self.current_support = self.mean - std_dev * self.num_std_dev
+        self.current_resistance = self.mean + std_dev * self.num_std_dev
+
+        return self.current_support, self.current_resistance, self.current_moving_avg
+
+
+class BollingerBandsBank:
+    """Bollinger Bands for many symbols, keyed by symbol id.
+
+    Same ring buffer and Welford update as BollingerBandsCalculator, with one row
+    of numpy state per symbol. ``update`` takes a price per symbol (NaN for no new
+    price) and updates every symbol in one call.
+    """
+
+    _state_fields = ("buffer", "count", "position", "mean", "m2", "_mean_compensation",
+                     "_m2_compensation", "lower", "upper", "mid")
+
+    def __init__(self, symbols, period=20, num_std_dev=2, compensated=False):
+        if period < 2:
+            raise ValueError(f"Period must be at least 2, got {period}")
+        self.symbols = list(symbols)
+        self.symbol_ids = {symbol: index for index, symbol in enumerate(self.symbols)}
+        self.period = period
+        self.num_std_dev = num_std_dev
+        self.compensated = compensated
+
+        count = len(self.symbols)
+        self.buffer = np.zeros((count, period))
+        self.count = np.zeros(count, dtype=np.int64)
+        self.position = np.zeros(count, dtype=np.int64)
+        self.mean = np.zeros(count)
+        self.m2 = np.zeros(count)
+        self._mean_compensation = np.zeros(count)
+        self._m2_compensation = np.zeros(count)
+        self._updates = 0
+        self.lower = np.full(count, np.nan)
+        self.upper = np.full(count, np.nan)
+        self.mid = np.full(count, np.nan)
+        self._rows = np.arange(count)
+
+    def _add(self, total, compensation, rows, values):
+        if self.compensated:
+            adjusted = values - compensation[rows]
+            new_total = total[rows] + adjusted
+            compensation[rows] = (new_total - total[rows]) - adjusted
+            total[rows] = new_total
+        else:
+            total[rows] += values
+
+    def _resync(self):
+        full = self.count == self.period
+        # Only full windows are resynced; filling windows are exact Welford steps
+        self.mean[full] = self.buffer[full].mean(axis=1)
+        self.m2[full] = ((self.buffer[full] - self.mean[full, None]) ** 2).sum(axis=1)
+        self._mean_compensation[full] = 0.0
+        self._m2_compensation[full] = 0.0
+
+    def update(self, prices):
+        """Returns (lower, upper, mid) arrays, NaN until a symbol's window is full."""
+
+        prices = np.asarray(prices, dtype=np.float64)
+        rows = self._rows[~np.isnan(prices)]
+        return self.update_rows(rows, prices[rows])
+
+    def update_rows(self, rows, price):
+        """update() for only the given symbol ids, with one price per id."""
+
+        old_mean = self.mean[rows]
+
+        filling = self.count[rows] < self.period
+        grow = rows[filling]
+        self.count[grow] += 1
+        delta = price[filling] - old_mean[filling]
+        self._add(self.mean, self._mean_compensation, grow, delta / self.count[grow])
+        self._add(self.m2, self._m2_compensation, grow, delta * (price[filling] - self.mean[grow]))
+
+        slide = rows[~filling]
+        oldest = self.buffer[slide, self.position[slide]]
+        new = price[~filling]
+        self._add(self.mean, self._mean_compensation, slide, (new - oldest) / self.period)
+        self._add(self.m2, self._m2_compensation, slide,
+                  (new - oldest) * (new - self.mean[slide] + oldest - old_mean[~filling]))
+
+        self.buffer[rows, self.position[rows]] = price
+        self.position[rows] = (self.position[rows] + 1) % self.period
+
+        self._updates += 1
+        if self._updates % _RESYNC_EVERY == 0:
+            self._resync()
+
+        ready = rows[self.count[rows] == self.period]
+        std_dev = np.sqrt(np.maximum(self.m2[ready], 0.0) / (self.period - 1))
+        self.mid[ready] = self.mean[ready]
+        self.lower[ready] = self.mean[ready] - std_dev * self.num_std_dev
+        self.upper[ready] = self.mean[ready] + std_dev * self.num_std_dev
+        return self.lower, self.upper, self.mid
+
+    def reset(self, rows):
+        """Clear the state of the given symbol ids, e.g. at a session boundary."""
+
+        self.buffer[rows] = 0
+        self.count[rows] = 0
+        self.position[rows] = 0
+        self.mean[rows] = 0
+        self.m2[rows] = 0
+        self._mean_compensation[rows] = 0
+        self._m2_compensation[rows] = 0
+        self.lower[rows] = np.nan
+        self.upper[rows] = np.nan
+        self.mid[rows] = np.nan
+
+    def add_price(self, price, symbol):
+        """Update one symbol; returns its (lower, upper, mid) or None while warming up."""
+
+        prices = np.full(len(self.symbols), np.nan)
+        prices[self.symbol_ids[symbol]] = price
+        self.update(prices)
+        return self.get_bands(symbol)
+
+    def get_bands(self, symbol):
+        index = self.symbol_ids[symbol]
+        if self.count[index] < self.period:
+            return None
+        return float(self.lower[index]), float(self.upper[index]), float(self.mid[index])
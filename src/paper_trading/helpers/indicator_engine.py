@@ -0,0 +1,196 @@
+import datetime
+import json
+import logging
+from zoneinfo import ZoneInfo
+
+import numpy as np
+import pandas as pd
+
+from src.paper_trading.helpers.bollinger_band_helper import BollingerBandsBank
+from src.paper_trading.helpers.rsi_crossover_helpers import RSIBank
+from src.paper_trading.helpers.vwap_helper import VWAPBank
+
+logger = logging.getLogger(__name__)
+
+# Streaming Indicator Engine
+#
+# One place for the live bots to keep their indicators. Register the
+# indicators once (add_rsi, add_bollinger, add_vwap). Then push each bar or
+# trade once with update(), or push all symbols at a time with update_many().
+# Every indicator is a bank holding one row of numpy state per symbol, so
+# table() gives the values of every indicator for every symbol as columns.
+#
+# Sessions are exchange-local trading days starting at session_start. The
+# first price of a new session resets VWAP for that symbol, plus any indicator
+# registered with session_reset=True. RSI and Bollinger Bands carry across
+# sessions by default.
+#
+# snapshot() saves all state to a .npz file and restore() loads it back,
+# matching rows by symbol, so a restarted bot can carry on without refetching
+# history.
+
+
+class IndicatorEngine:
+    def __init__(self, symbols, timezone="America/New_York", session_start="00:00"):
+        self.symbols = list(symbols)
+        self.symbol_ids = {symbol: index for index, symbol in enumerate(self.symbols)}
+        self.timezone = ZoneInfo(timezone)
+        hours, minutes = (int(part) for part in session_start.split(":"))
+        self.session_offset = datetime.timedelta(hours=hours, minutes=minutes)
+
+        # name -> (kind, bank, params)
+        self.indicators = {}
+        self.session_reset = set()
+        self._columns = {}
+        self.session = np.full(len(self.symbols), -1, dtype=np.int64)
+        self.last_timestamp = np.full(len(self.symbols), -1, dtype=np.int64)
+        # [start_ms, end_ms) of the last session looked up, to skip time zone math per tick
+        self._session_bounds = (0, 0, -1)
+
+    def _register(self, name, kind, bank, params, session_reset):
+        if name in self.indicators:
+            raise ValueError(f"Indicator {name} is already registered")
+        self.indicators[name] = (kind, bank, params)
+        if session_reset:
+            self.session_reset.add(name)
+        self._columns = self.columns()
+        return self
+
+    def add_rsi(self, name, period=14, mode="sma", session_reset=False):
+        params = {"period": period, "mode": mode}
+        return self._register(name, "rsi", RSIBank(self.symbols, period, mode), params, session_reset)
+
+    def add_bollinger(self, name, period=20, num_std_dev=2, session_reset=False):
+        params = {"period": period, "num_std_dev": num_std_dev}
+        bank = BollingerBandsBank(self.symbols, period, num_std_dev)
+        return self._register(name, "bollinger", bank, params, session_reset)
+
+    def add_vwap(self, name="vwap"):
+        return self._register(name, "vwap", VWAPBank(self.symbols), {}, True)
+
+    def _to_ms(self, timestamp):
+        if timestamp is None:
+            return int(datetime.datetime.now(datetime.timezone.utc).timestamp() * 1000)
+        if isinstance(timestamp, datetime.datetime):
+            if timestamp.tzinfo is None:
+                timestamp = timestamp.replace(tzinfo=self.timezone)
+            return int(timestamp.timestamp() * 1000)
+        # Epoch numbers: EODHD sends milliseconds, anything smaller is seconds
+        return int(timestamp if timestamp > 1e11 else timestamp * 1000)
+
+    def session_of(self, timestamp_ms):
+        """Session key (a day ordinal) for an epoch millisecond timestamp."""
+
+        start, end, key = self._session_bounds
+        if start <= timestamp_ms < end:
+            return key
+        local = datetime.datetime.fromtimestamp(timestamp_ms / 1000, self.timezone) - self.session_offset
+        day = local.date()
+        opens = datetime.datetime.combine(day, datetime.time(), self.timezone) + self.session_offset
+        closes = datetime.datetime.combine(day + datetime.timedelta(days=1), datetime.time(), self.timezone) \
+            + self.session_offset
+        key = day.toordinal()
+        self._session_bounds = (int(opens.timestamp() * 1000), int(closes.timestamp() * 1000), key)
+        return key
+
+    def _start_sessions(self, rows, key):
+        new_session = rows[(self.session[rows] != key) & (self.session[rows] >= 0)]
+        if new_session.size:
+            for name in self.session_reset:
+                self.indicators[name][1].reset(new_session)
+        self.session[rows] = key
+
+    def update_many(self, prices, volumes=None, timestamp=None):
+        """Push one price (and volume) per symbol at one timestamp; NaN prices are skipped."""
+
+        prices = np.asarray(prices, dtype=np.float64)
+        rows = np.flatnonzero(~np.isnan(prices))
+        volumes = np.zeros(rows.size) if volumes is None else np.asarray(volumes, dtype=np.float64)[rows]
+        self._update_rows(rows, prices[rows], volumes, timestamp)
+
+    def update(self, symbol, price, volume=0.0, timestamp=None):
+        """Push one bar close or trade for one symbol."""
+
+        if np.isnan(price):
+            return
+        # Only this symbol's row is touched, so a tick costs the same for any number of symbols
+        rows = np.array([self.symbol_ids[symbol]])
+        self._update_rows(rows, np.array([price], dtype=np.float64), np.array([volume], dtype=np.float64),
+                          timestamp)
+
+    def _update_rows(self, rows, prices, volumes, timestamp):
+        timestamp_ms = self._to_ms(timestamp)
+        self._start_sessions(rows, self.session_of(timestamp_ms))
+        self.last_timestamp[rows] = timestamp_ms
+
+        for kind, bank, _ in self.indicators.values():
+            if kind == "vwap":
+                bank.update_rows(rows, prices, volumes)
+            else:
+                bank.update_rows(rows, prices)
+
+    def columns(self):
+        """Column name -> value array, one entry per symbol. The arrays update in place."""
+
+        columns = {}
+        for name, (kind, bank, _) in self.indicators.items():
+            if kind == "rsi":
+                columns[name] = bank.rsi
+            elif kind == "vwap":
+                columns[name] = bank.vwap
+            else:
+                columns[f"{name}_lower"] = bank.lower
+                columns[f"{name}_upper"] = bank.upper
+                columns[f"{name}_mid"] = bank.mid
+        return columns
+
+    def table(self):
+        """All indicator values as a DataFrame indexed by symbol."""
+
+        return pd.DataFrame({column: values.copy() for column, values in self.columns().items()},
+                            index=pd.Index(self.symbols, name="symbol"))
+
+    def get(self, symbol, column):
+        """Current value of one column for one symbol, or None while warming up."""
+
+        value = self._columns[column][self.symbol_ids[symbol]]
+        return None if np.isnan(value) else float(value)
+
+    def get_bands(self, symbol, name):
+        """(lower, upper, mid) for a Bollinger indicator, or None while warming up."""
+
+        return self.indicators[name][1].get_bands(symbol)
+
+    def snapshot(self, path):
+        arrays = {"session": self.session, "last_timestamp": self.last_timestamp}
+        for name, (_, bank, _) in self.indicators.items():
+            for field in bank._state_fields:
+                arrays[f"{name}.{field}"] = getattr(bank, field)
+            arrays[f"{name}._updates"] = np.array(getattr(bank, "_updates", 0))
+        meta = {
+            "symbols": self.symbols,
+            "indicators": {name: [kind, params] for name, (kind, _, params) in self.indicators.items()},
+        }
+        np.savez(path, __meta__=np.array(json.dumps(meta)), **arrays)
+
+    def restore(self, path):
+        """Load a snapshot. Symbols and indicators missing from it keep fresh state."""
+
+        with np.load(path) as saved:
+            meta = json.loads(str(saved["__meta__"]))
+            old_ids = {symbol: index for index, symbol in enumerate(meta["symbols"])}
+            shared = [symbol for symbol in self.symbols if symbol in old_ids]
+            new_rows = np.array([self.symbol_ids[symbol] for symbol in shared], dtype=np.int64)
+            old_rows = np.array([old_ids[symbol] for symbol in shared], dtype=np.int64)
+
+            self.session[new_rows] = saved["session"][old_rows]
+            self.last_timestamp[new_rows] = saved["last_timestamp"][old_rows]
+            for name, (kind, bank, params) in self.indicators.items():
+                if meta["indicators"].get(name) != [kind, params]:
+                    logger.warning("Snapshot %s has no matching state for indicator %s", path, name)
+                    continue
+                for field in bank._state_fields:
+                    getattr(bank, field)[new_rows] = saved[f"{name}.{field}"][old_rows]
+                if hasattr(bank, "_updates"):
+                    bank._updates = int(saved[f"{name}._updates"])
+        return self
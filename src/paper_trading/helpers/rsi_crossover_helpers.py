@@ -1,53 +1,230 @@
 from collections import deque
+import math
+
 import numpy as np
 
+# RSI modes:
+#   sma    - mean gain / mean loss over the last `period` price changes (the original behaviour)
+#   wilder - Wilder's smoothing, avg = (avg * (period - 1) + value) / period, seeded with the SMA
+#   ema    - exponential smoothing with alpha = 2 / (period + 1), seeded with the SMA
+RSI_MODES = ("sma", "wilder", "ema")
+
+# Running sums are rebuilt from the buffers this often to stop rounding drift
+_RESYNC_EVERY = 10_000
+
+
+def _rsi_from_averages(avg_gain, avg_loss):
+    rs = avg_gain / avg_loss if avg_loss != 0 else 0
+    return 100 - (100 / (1 + rs))
+
 
 class RSI_Calculator:
-    def __init__(self, period=14):
+    def __init__(self, period=14, mode="sma"):
+        if mode not in RSI_MODES:
+            raise ValueError(f"Unknown RSI mode: {mode}")
         self.period = period
+        self.mode = mode
+        self.alpha = 1 / period if mode == "wilder" else 2 / (period + 1)
         self.price_buffer = deque(maxlen=period)
         self.gain_buffer = deque(maxlen=period)
         self.loss_buffer = deque(maxlen=period)
         self.current_rsi = None
 
+        # Running state, updated in constant time per price
+        self.gain_sum = 0.0
+        self.loss_sum = 0.0
+        self.avg_gain = None
+        self.avg_loss = None
+        self._previous_averages = None
+        self._updates = 0
+
+    def _push_change(self, gain, loss):
+        if len(self.gain_buffer) == self.period:
+            self.gain_sum -= self.gain_buffer[0]
+            self.loss_sum -= self.loss_buffer[0]
+        self.gain_buffer.append(gain)
+        self.loss_buffer.append(loss)
+        self.gain_sum += gain
+        self.loss_sum += loss
+
+        self._updates += 1
+        if self._updates % _RESYNC_EVERY == 0:
+            self.gain_sum = math.fsum(self.gain_buffer)
+            self.loss_sum = math.fsum(self.loss_buffer)
+
+        if self.mode != "sma":
+            self._previous_averages = (self.avg_gain, self.avg_loss)
+            if self.avg_gain is None:
+                # Seed the smoothing with the simple average of the first `period` changes
+                if len(self.gain_buffer) == self.period:
+                    self.avg_gain = self.gain_sum / self.period
+                    self.avg_loss = self.loss_sum / self.period
+            else:
+                self.avg_gain += self.alpha * (gain - self.avg_gain)
+                self.avg_loss += self.alpha * (loss - self.avg_loss)
+
+    def _replace_last_change(self, gain, loss):
+        self.gain_sum += gain - self.gain_buffer[-1]
+        self.loss_sum += loss - self.loss_buffer[-1]
+        self.gain_buffer[-1] = gain
+        self.loss_buffer[-1] = loss
+
+        if self.mode != "sma" and self._previous_averages is not None:
+            previous_gain, previous_loss = self._previous_averages
+            if previous_gain is None:
+                if len(self.gain_buffer) == self.period:
+                    self.avg_gain = self.gain_sum / self.period
+                    self.avg_loss = self.loss_sum / self.period
+            else:
+                self.avg_gain = previous_gain + self.alpha * (gain - previous_gain)
+                self.avg_loss = previous_loss + self.alpha * (loss - previous_loss)
+
+    def _ready(self):
+        if self.mode == "sma":
+            return len(self.price_buffer) == self.period
+        return self.avg_gain is not None
+
     def add_price(self, price):
         if self.price_buffer:
             change = price - self.price_buffer[-1]
-            gain = max(change, 0)
-            loss = abs(min(change, 0))
-            self.gain_buffer.append(gain)
-            self.loss_buffer.append(loss)
+            self._push_change(max(change, 0), abs(min(change, 0)))
         self.price_buffer.append(price)
-        if len(self.price_buffer) == self.period:
+        if self._ready():
             self.current_rsi = self.calculate_rsi()
             return self.current_rsi
         return None
 
     def on_updated_price(self, price):
+        # Revises the latest price (e.g. a forming bar) instead of adding a new one
         if self.price_buffer:
             change = price - self.price_buffer[-1]
-            gain = max(change, 0)
-            loss = abs(min(change, 0))
-            self.gain_buffer[-1] = gain
-            self.loss_buffer[-1] = loss
-        self.price_buffer[-1] = price
-        if len(self.price_buffer) == self.period:
+            if self.gain_buffer:
+                self._replace_last_change(max(change, 0), abs(min(change, 0)))
+            self.price_buffer[-1] = price
+        if self._ready():
             self.current_rsi = self.calculate_rsi()
             return self.current_rsi
         return None
 
     def calculate_rsi(self):
-        avg_gain = np.mean(self.gain_buffer)
-        avg_loss = np.mean(self.loss_buffer)
-        print(f"Average Gain: {avg_gain}, Average Loss: {avg_loss}")
-        rs = avg_gain / avg_loss if avg_loss != 0 else 0
-        rsi = 100 - (100 / (1 + rs))
-        print(f"Calculated RSI: {rsi}")
-        return rsi
+        if self.mode == "sma":
+            count = len(self.gain_buffer)
+            if count == 0:
+                return _rsi_from_averages(0, 0)
+            return _rsi_from_averages(self.gain_sum / count, self.loss_sum / count)
+        return _rsi_from_averages(self.avg_gain, self.avg_loss)
 
     def get_rsi(self):
         return self.current_rsi
 
+
+class RSIBank:
+    """One RSI per symbol, all updated from an array of prices in a single call.
+
+    State is held in arrays indexed by symbol id; ``update`` takes a price per
+    symbol (NaN for symbols without a new price) and returns the RSI of every
+    symbol, NaN until it has enough history. Same modes and results as
+    RSI_Calculator.
+    """
+
+    _state_fields = ("last_price", "prices_seen", "changes_seen", "gains", "losses",
+                     "gain_sum", "loss_sum", "avg_gain", "avg_loss", "rsi")
+
+    def __init__(self, symbols, period=14, mode="sma"):
+        if mode not in RSI_MODES:
+            raise ValueError(f"Unknown RSI mode: {mode}")
+        self.symbols = list(symbols)
+        self.symbol_ids = {symbol: index for index, symbol in enumerate(self.symbols)}
+        self.period = period
+        self.mode = mode
+        self.alpha = 1 / period if mode == "wilder" else 2 / (period + 1)
+
+        count = len(self.symbols)
+        self.last_price = np.full(count, np.nan)
+        self.prices_seen = np.zeros(count, dtype=np.int64)
+        self.changes_seen = np.zeros(count, dtype=np.int64)
+        self.gains = np.zeros((count, period))
+        self.losses = np.zeros((count, period))
+        self.gain_sum = np.zeros(count)
+        self.loss_sum = np.zeros(count)
+        self.avg_gain = np.full(count, np.nan)
+        self.avg_loss = np.full(count, np.nan)
+        self.rsi = np.full(count, np.nan)
+        self._rows = np.arange(count)
+
+    def update(self, prices):
+        prices = np.asarray(prices, dtype=np.float64)
+        rows = self._rows[~np.isnan(prices)]
+        return self.update_rows(rows, prices[rows])
+
+    def update_rows(self, rows, prices):
+        """update() for only the given symbol ids, with one price per id."""
+
+        has_previous = self.prices_seen[rows] > 0
+        previous = rows[has_previous]
+        if previous.size:
+            change = prices[has_previous] - self.last_price[previous]
+            gain = np.maximum(change, 0)
+            loss = np.maximum(-change, 0)
+            slot = self.changes_seen[previous] % self.period
+            # The slot being overwritten holds the change that drops out of the window
+            self.gain_sum[previous] += gain - self.gains[previous, slot]
+            self.loss_sum[previous] += loss - self.losses[previous, slot]
+            self.gains[previous, slot] = gain
+            self.losses[previous, slot] = loss
+            self.changes_seen[previous] += 1
+
+            if self.mode != "sma":
+                seeded = ~np.isnan(self.avg_gain[previous])
+                smooth = previous[seeded]
+                self.avg_gain[smooth] += self.alpha * (gain[seeded] - self.avg_gain[smooth])
+                self.avg_loss[smooth] += self.alpha * (loss[seeded] - self.avg_loss[smooth])
+                seed = previous[~seeded & (self.changes_seen[previous] == self.period)]
+                self.avg_gain[seed] = self.gain_sum[seed] / self.period
+                self.avg_loss[seed] = self.loss_sum[seed] / self.period
+
+        self.last_price[rows] = prices
+        self.prices_seen[rows] += 1
+
+        if self.mode == "sma":
+            ready = rows[self.prices_seen[rows] >= self.period]
+            count = np.minimum(self.changes_seen[ready], self.period)
+            avg_gain = self.gain_sum[ready] / count
+            avg_loss = self.loss_sum[ready] / count
+        else:
+            ready = rows[~np.isnan(self.avg_gain[rows])]
+            avg_gain = self.avg_gain[ready]
+            avg_loss = self.avg_loss[ready]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            rs = np.where(avg_loss != 0, avg_gain / avg_loss, 0)
+        self.rsi[ready] = 100 - (100 / (1 + rs))
+        return self.rsi
+
+    def reset(self, rows):
+        """Clear the state of the given symbol ids, e.g. at a session boundary."""
+
+        self.last_price[rows] = np.nan
+        self.prices_seen[rows] = 0
+        self.changes_seen[rows] = 0
+        self.gains[rows] = 0
+        self.losses[rows] = 0
+        self.gain_sum[rows] = 0
+        self.loss_sum[rows] = 0
+        self.avg_gain[rows] = np.nan
+        self.avg_loss[rows] = np.nan
+        self.rsi[rows] = np.nan
+
+    def update_symbol(self, symbol, price):
+        """Update a single symbol; returns its RSI or None while warming up."""
+
+        index = self.symbol_ids[symbol]
+        rsi = self.update_rows(np.array([index]), np.array([price], dtype=np.float64))[index]
+        return None if np.isnan(rsi) else float(rsi)
+
+    def get_rsi(self, symbol):
+        rsi = self.rsi[self.symbol_ids[symbol]]
+        return None if np.isnan(rsi) else float(rsi)
+
 # Example usage
 # rsi_calculator = RSI_Calculator(period=14)
 
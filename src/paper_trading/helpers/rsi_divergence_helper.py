@@ -0,0 +1,132 @@
+import math
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+# RSI Divergence State
+#
+# Per-symbol state for the rsi_divergence bots. It produces the same values as
+# their batch formulas: calculate_rsi(df, rsi_window) with ema=True, and a
+# rolling(sma_window).mean() of that RSI. Each new bar costs constant time
+# instead of a recompute over the whole history.
+#
+# The RSI is ewm(com=rsi_window - 1, adjust=True).mean(up) / ...(down). With
+# adjust=True both averages share the same weight sum, so the RSI only needs
+# the two decayed sums of ups and downs. The RSI SMA is a running sum over a
+# ring of the last sma_window RSI values. Like pandas/polars rolling means, it
+# is NaN until the window holds sma_window non-NaN values.
+#
+# A bar with the same timestamp as the last one replaces it, as
+# df.loc[timestamp] = bar did. Only the last max_bars bars are kept.
+
+
+class RSIDivergenceState:
+    def __init__(self, rsi_window=14, sma_window=14, max_bars=1000):
+        self.rsi_window = rsi_window
+        self.sma_window = sma_window
+        self.decay = 1 - 1 / rsi_window
+        self.bars = deque(maxlen=max_bars)
+
+        self.last_close = None
+        self.last_timestamp = None
+        self.up_sum = 0.0
+        self.down_sum = 0.0
+        self.rsi = np.nan
+        self.rsi_sma = np.nan
+
+        self.rsi_values = [np.nan] * sma_window
+        self.position = 0
+        self.rsi_total = 0.0
+        self.nan_count = sma_window
+        # State before the last bar, so a revised bar can replace it
+        self._previous = None
+
+    def _push_rsi(self, value):
+        overwritten = self.rsi_values[self.position]
+        if math.isnan(overwritten):
+            self.nan_count -= 1
+        else:
+            self.rsi_total -= overwritten
+        if math.isnan(value):
+            self.nan_count += 1
+        else:
+            self.rsi_total += value
+        self.rsi_values[self.position] = value
+        self.position = (self.position + 1) % self.sma_window
+        if self.position == 0:
+            # Once per lap, rebuild the sum so rounding error cannot accumulate
+            self.rsi_total = math.fsum(v for v in self.rsi_values if not math.isnan(v))
+        return overwritten
+
+    def _pop_rsi(self, overwritten):
+        self.position = (self.position - 1) % self.sma_window
+        self._push_rsi(overwritten)
+        self.position = (self.position - 1) % self.sma_window
+
+    def _update(self, close):
+        if self.last_close is not None:
+            change = close - self.last_close
+            self.up_sum = self.up_sum * self.decay + max(change, 0.0)
+            self.down_sum = self.down_sum * self.decay + max(-change, 0.0)
+            if self.down_sum != 0:
+                self.rsi = 100 - (100 / (1 + self.up_sum / self.down_sum))
+            else:
+                # up / 0 is inf (RSI 100) and 0 / 0 is NaN, as in the batch formula
+                self.rsi = 100.0 if self.up_sum > 0 else np.nan
+        self.last_close = close
+
+        overwritten = self._push_rsi(self.rsi)
+        self.rsi_sma = self.rsi_total / self.sma_window if self.nan_count == 0 else np.nan
+        return overwritten
+
+    def add_close(self, close, timestamp=None):
+        """Add one close; returns (rsi, rsi_sma), NaN while warming up."""
+
+        close = float(close)
+        if timestamp is not None and timestamp == self.last_timestamp and self._previous is not None:
+            # Revised bar: roll back the last update before applying this one
+            overwritten, self.last_close, self.up_sum, self.down_sum, self.rsi, self.rsi_sma = self._previous
+            self._pop_rsi(overwritten)
+            if self.bars:
+                self.bars.pop()
+
+        previous = (self.last_close, self.up_sum, self.down_sum, self.rsi, self.rsi_sma)
+        overwritten = self._update(close)
+        self._previous = (overwritten, *previous)
+        self.last_timestamp = timestamp
+        return self.rsi, self.rsi_sma
+
+    def add_bar(self, bar):
+        """Add a bar dict with a 'close' and optionally a 'datetime' or 'timestamp'."""
+
+        timestamp = bar.get('datetime', bar.get('timestamp'))
+        result = self.add_close(bar['close'], timestamp)
+        self.bars.append(bar)
+        return result
+
+    def load(self, df):
+        """Warm up from a pandas or polars history frame, oldest bar first."""
+
+        tail = df.tail(self.bars.maxlen)
+        if isinstance(tail, pd.DataFrame):
+            records = tail.reset_index().to_dict('records')
+        else:
+            records = tail.to_dicts()
+
+        closes = df['close'].to_numpy()
+        for close in closes[:-1]:
+            self.add_close(close)
+        if len(closes):
+            # The last bar keeps its timestamp so a refetch of it replaces it
+            self.add_close(closes[-1], records[-1].get('datetime', records[-1].get('timestamp')))
+        self.bars.extend(records)
+        return self.rsi, self.rsi_sma
+
+    def last_bar(self):
+        return self.bars[-1] if self.bars else None
+
+    def frame(self):
+        """The buffered bars as a pandas DataFrame."""
+
+        return pd.DataFrame(list(self.bars))
@@ -1,3 +1,6 @@
+import numpy as np
+
+
 class VWAPCalculator:
     def __init__(self):
         self.cumulative_total_price_volume = 0
@@ -23,3 +26,43 @@ class VWAPCalculator:
         :return: The current VWAP or None if no data has been added.
         """
         return self.vwap
+
+
+class VWAPBank:
+    """
+    VWAP for many symbols, held in numpy arrays indexed by symbol id.
+    Call reset() with the symbols whose session just started.
+    """
+
+    _state_fields = ("price_volume", "volume", "vwap")
+
+    def __init__(self, symbols):
+        self.symbols = list(symbols)
+        self.symbol_ids = {symbol: index for index, symbol in enumerate(self.symbols)}
+        count = len(self.symbols)
+        self.price_volume = np.zeros(count)
+        self.volume = np.zeros(count)
+        self.vwap = np.full(count, np.nan)
+
+    def update(self, prices, volumes):
+        """
+        Add one tick per symbol; NaN prices are skipped.
+        :return: The VWAP of every symbol, NaN where no volume has traded.
+        """
+        prices = np.asarray(prices, dtype=np.float64)
+        volumes = np.asarray(volumes, dtype=np.float64)
+        rows = np.flatnonzero(~np.isnan(prices))
+        return self.update_rows(rows, prices[rows], volumes[rows])
+
+    def update_rows(self, rows, prices, volumes):
+        """update() for only the given symbol ids, with one price and volume per id."""
+        self.price_volume[rows] += prices * volumes
+        self.volume[rows] += volumes
+        traded = rows[self.volume[rows] != 0]
+        self.vwap[traded] = self.price_volume[traded] / self.volume[traded]
+        return self.vwap
+
+    def reset(self, rows):
+        self.price_volume[rows] = 0
+        self.volume[rows] = 0
+        self.vwap[rows] = np.nan
@@ -0,0 +1,255 @@
+import asyncio
+import logging
+import random
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+from src.data_fetchers.eodhd.fetch_pipeline import TokenBucket
+
+logger = logging.getLogger(__name__)
+
+# Order Pipeline
+#
+# Submits a batch of order requests concurrently instead of one blocking round
+# trip at a time. At most `concurrency` submissions are in flight, and a token
+# bucket holding up to a minute's allowance keeps the batch under the broker's
+# rate limit. Each submission runs
+# the broker's blocking submit_order on one of the pipeline's threads.
+#
+# Every order gets a deterministic client order ID before the first attempt,
+# from the batch ID, its symbol and its side, so the ID does not change when
+# a rerun's batch is filtered or reordered. Retries after
+# throttling, server errors or timeouts reuse that ID. If an earlier attempt
+# did reach the broker, the retry is rejected as a duplicate and the pipeline
+# looks the order up instead of placing it twice. For the same reason,
+# rerunning a batch ID never duplicates orders that were already placed.
+#
+# submit() returns one row per order as a DataFrame. The row holds the
+# acknowledgement, attempts, latency and error. write_log() stores it as
+# Parquet. MockBroker is a local stand-in with latency and injected failures,
+# for testing the pipeline without the network.
+
+# Alpaca allows 200 requests a minute per account
+DEFAULT_ORDERS_PER_MINUTE = 200
+
+_RETRY_STATUS = {429, 500, 502, 503, 504}
+
+LOG_COLUMNS = [
+    "client_order_id", "symbol", "side", "qty", "notional", "status", "order_id", "broker_status",
+    "attempts", "submitted_at", "acked_at", "latency_ms", "error",
+]
+
+
+def client_order_id(batch_id: str, symbol: str, side, repeat: int = 0) -> str:
+    # Alpaca caps client order IDs at 128 characters
+    key = f"{batch_id}-{symbol}-{_value(side)}" + (f"-{repeat + 1}" if repeat else "")
+    return key[-128:]
+
+
+def _value(field):
+    """Enum values as their plain string, everything else unchanged."""
+
+    return getattr(field, "value", field)
+
+
+def _is_duplicate(error) -> bool:
+    return getattr(error, "status_code", None) == 422 and "client_order_id" in str(error)
+
+
+def _is_retryable(error) -> bool:
+    if isinstance(error, (asyncio.TimeoutError, ConnectionError, OSError)):
+        return True
+    return getattr(error, "status_code", None) in _RETRY_STATUS
+
+
+class OrderPipeline:
+    def __init__(
+        self,
+        broker,
+        concurrency: int = 8,
+        orders_per_minute: float = DEFAULT_ORDERS_PER_MINUTE,
+        max_retries: int = 3,
+        backoff: float = 0.5,
+        timeout: float = 10.0,
+    ):
+        # broker: anything with submit_order(order) and get_order_by_client_id(client_id),
+        # such as AlpacaManager or MockBroker
+        self.broker = broker
+        self.concurrency = concurrency
+        self.orders_per_minute = orders_per_minute
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self._executor = None
+
+    async def _call(self, function, *args):
+        future = asyncio.get_running_loop().run_in_executor(self._executor, function, *args)
+        return await asyncio.wait_for(future, self.timeout)
+
+    async def _submit_one(self, order, bucket: TokenBucket, semaphore: asyncio.Semaphore) -> dict:
+        row = {
+            "client_order_id": order.client_order_id,
+            "symbol": order.symbol,
+            "side": _value(order.side),
+            "qty": getattr(order, "qty", None),
+            "notional": getattr(order, "notional", None),
+            "status": "failed",
+            "order_id": None,
+            "broker_status": None,
+            "attempts": 0,
+            "submitted_at": None,
+            "acked_at": None,
+            "latency_ms": None,
+            "error": None,
+        }
+        async with semaphore:
+            for attempt in range(self.max_retries + 1):
+                await bucket.acquire()
+                row["attempts"] += 1
+                started = time.time()
+                row["submitted_at"] = row["submitted_at"] or started
+                try:
+                    response = await self._call(self.broker.submit_order, order)
+                    row["status"] = "acked"
+                except Exception as error:
+                    if _is_duplicate(error):
+                        # An earlier attempt (or run) already placed this order
+                        try:
+                            response = await self._call(self.broker.get_order_by_client_id, order.client_order_id)
+                            row["status"] = "duplicate"
+                        except Exception as lookup_error:
+                            row["error"] = repr(lookup_error)
+                            return row
+                    elif _is_retryable(error) and attempt < self.max_retries:
+                        row["error"] = repr(error)
+                        delay = self.backoff * 2 ** attempt * (1 + random.random())
+                        logger.warning("Retrying %s in %.2fs after %r", order.client_order_id, delay, error)
+                        await asyncio.sleep(delay)
+                        continue
+                    else:
+                        row["status"] = "failed" if _is_retryable(error) else "rejected"
+                        row["error"] = repr(error)
+                        return row
+
+                acked = time.time()
+                row["order_id"] = str(getattr(response, "id", "")) or None
+                row["broker_status"] = _value(getattr(response, "status", None))
+                row["acked_at"] = acked
+                row["latency_ms"] = (acked - started) * 1000
+                row["error"] = None
+                return row
+        return row
+
+    async def submit(self, orders: list, batch_id: str | None = None) -> pd.DataFrame:
+        """Submit every order request and return one result row per order, in order."""
+
+        batch_id = batch_id or uuid.uuid4().hex
+        seen = {}
+        for order in orders:
+            if not getattr(order, "client_order_id", None):
+                key = (order.symbol, _value(order.side))
+                order.client_order_id = client_order_id(batch_id, order.symbol, order.side, seen.get(key, 0))
+                seen[key] = seen.get(key, 0) + 1
+
+        # A batch that fits in the per-minute allowance goes out at full concurrency;
+        # a larger one is paced at orders_per_minute once the allowance is spent
+        capacity = max(1, min(len(orders), self.orders_per_minute))
+        bucket = TokenBucket(self.orders_per_minute / 60, capacity=capacity)
+        semaphore = asyncio.Semaphore(self.concurrency)
+        started = time.monotonic()
+        # Own threads, so the default executor's size does not cap concurrency
+        self._executor = ThreadPoolExecutor(self.concurrency, thread_name_prefix="order-submit")
+        try:
+            rows = await asyncio.gather(*(self._submit_one(order, bucket, semaphore) for order in orders))
+        finally:
+            self._executor.shutdown(wait=False)
+        results = pd.DataFrame(rows, columns=LOG_COLUMNS)
+
+        counts = results["status"].value_counts().to_dict()
+        logger.info("Submitted %d orders in %.2fs: %s", len(results), time.monotonic() - started, counts)
+        return results
+
+    def submit_batch(self, orders: list, batch_id: str | None = None) -> pd.DataFrame:
+        """Blocking wrapper around submit() for synchronous callers."""
+
+        return asyncio.run(self.submit(orders, batch_id))
+
+
+def write_log(results: pd.DataFrame, path: str) -> None:
+    results.to_parquet(path, index=False)
+
+
+class MockBrokerError(Exception):
+    def __init__(self, status_code: int, message: str):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class _MockOrder:
+    def __init__(self, order):
+        self.id = uuid.uuid4()
+        self.client_order_id = order.client_order_id
+        self.symbol = order.symbol
+        self.side = order.side
+        self.status = "accepted"
+
+
+class MockBroker:
+    """In-process broker stand-in: acknowledges orders after a delay and can inject failures.
+
+    failure_rate is the chance of a retryable 503 and throttle_rate the chance
+    of a 429. lost_ack_rate is the chance that the order is accepted but the
+    response is lost, which shows up as a timeout to the caller.
+    """
+
+    def __init__(
+        self,
+        latency: float = 0.05,
+        failure_rate: float = 0.0,
+        throttle_rate: float = 0.0,
+        lost_ack_rate: float = 0.0,
+        seed: int | None = None,
+    ):
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.throttle_rate = throttle_rate
+        self.lost_ack_rate = lost_ack_rate
+        self.orders = {}
+        self.calls = 0
+        self.max_in_flight = 0
+        self._in_flight = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def submit_order(self, order):
+        with self._lock:
+            self.calls += 1
+            self._in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self._in_flight)
+            roll = self._random.random()
+        try:
+            time.sleep(self.latency)
+            if roll < self.throttle_rate:
+                raise MockBrokerError(429, "rate limit exceeded")
+            if roll < self.throttle_rate + self.failure_rate:
+                raise MockBrokerError(503, "service unavailable")
+            with self._lock:
+                if order.client_order_id in self.orders:
+                    raise MockBrokerError(422, '{"message": "client_order_id must be unique"}')
+                placed = self.orders[order.client_order_id] = _MockOrder(order)
+            if roll < self.throttle_rate + self.failure_rate + self.lost_ack_rate:
+                raise TimeoutError("response lost")
+            return placed
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+
+    def get_order_by_client_id(self, client_id):
+        with self._lock:
+            if client_id not in self.orders:
+                raise MockBrokerError(404, "order not found")
+            return self.orders[client_id]
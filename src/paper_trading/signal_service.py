@@ -0,0 +1,199 @@
+import json
+import logging
+import os
+
+import numpy as np
+import pandas as pd
+
+from src.data_store.market_data_store import market_data_store
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_STATE_ROOT = "../data/signal_state"
+
+# Signal Service
+#
+# Daily alpha signals from rolling state instead of the full history. The old
+# path reloaded each ticker's whole history, recomputed every metric and the
+# alpha over all of it, and then read the last value. That ran once for the
+# long list and once more for the short list.
+#
+# Each alpha has a state class. It holds exactly what the newest value needs,
+# as (tickers x window) arrays, and its update() takes one day's bars for the
+# whole universe in a single vectorized step. The service stores that state
+# per exchange and alpha. On each run it reads only the bars after the stored
+# date: one read for the whole universe. A ticker with no state is warmed up
+# from its history once. The long and short thresholds are then evaluated for
+# every ticker in one pass.
+
+
+class Alpha1State:
+    """Newest alpha1 value per ticker, identical to alpha1(calculate_metrics(df)).iloc[-1].
+
+    alpha1 = rank(ts_argmax(value ** 2, 5)) - 0.5, where value is the 20 day
+    stddev of returns on down days and the close otherwise. rank is a
+    percentile rank over the ticker's whole history. The argmax is always one
+    of 0..4, so a count per position is enough to rank the newest one.
+    """
+
+    columns = ["close"]
+    _state_fields = ("last_date", "last_close", "returns", "returns_seen", "values", "counts", "alpha")
+
+    def __init__(self, tickers, std_window=20, argmax_window=5):
+        self.tickers = list(tickers)
+        self.ticker_ids = {ticker: row for row, ticker in enumerate(self.tickers)}
+        self.std_window = std_window
+        self.argmax_window = argmax_window
+        n = len(self.tickers)
+        self.last_date = np.empty(n, dtype="datetime64[D]")
+        self.last_close = np.empty(n)
+        self.returns = np.empty((n, std_window))
+        self.returns_seen = np.empty(n, dtype=np.int64)
+        self.values = np.empty((n, argmax_window))
+        self.counts = np.empty((n, argmax_window), dtype=np.int64)
+        self.alpha = np.empty(n)
+        self.reset(np.arange(n))
+
+    def reset(self, rows):
+        self.last_date[rows] = np.datetime64("NaT")
+        self.last_close[rows] = np.nan
+        self.returns[rows] = np.nan
+        self.returns_seen[rows] = 0
+        self.values[rows] = np.nan
+        self.counts[rows] = 0
+        self.alpha[rows] = np.nan
+
+    def update(self, date, bars):
+        """Apply one day's bars (a DataFrame indexed by ticker) to the tickers that have one."""
+
+        return self.update_closes(date, bars["close"].reindex(self.tickers).to_numpy(dtype=np.float64))
+
+    def update_closes(self, date, close):
+        """update() with the closes already as an array in ticker order, NaN for no bar."""
+
+        date = np.datetime64(pd.Timestamp(date).date(), "D")
+        # Skip missing bars and bars already applied, e.g. when catching up twice
+        rows = np.flatnonzero(~np.isnan(close) & ~(self.last_date >= date))
+        if not len(rows):
+            return self.alpha
+        close = close[rows]
+
+        returns = close / self.last_close[rows] - 1
+        self.returns[rows] = np.roll(self.returns[rows], -1, axis=1)
+        self.returns[rows, -1] = returns
+        self.returns_seen[rows] += ~np.isnan(returns)
+        std = np.full(len(rows), np.nan)
+        full = self.returns_seen[rows] >= self.std_window
+        if full.any():
+            std[full] = self.returns[rows[full]].std(axis=1, ddof=1)
+        value = np.where(returns < 0, std, close)
+
+        self.values[rows] = np.roll(self.values[rows], -1, axis=1)
+        self.values[rows, -1] = value ** 2
+        windows = self.values[rows]
+        valid = ~np.isnan(windows).any(axis=1)
+        alpha = np.full(len(rows), np.nan)
+        if valid.any():
+            ranked = rows[valid]
+            argmax = windows[valid].argmax(axis=1)
+            self.counts[ranked, argmax] += 1
+            counts = self.counts[ranked]
+            below = np.where(np.arange(self.argmax_window) < argmax[:, None], counts, 0).sum(axis=1)
+            equal = counts[np.arange(len(ranked)), argmax]
+            # Average rank for ties, as Series.rank(pct=True)
+            alpha[valid] = (below + (equal + 1) / 2) / counts.sum(axis=1) - 0.5
+        self.alpha[rows] = alpha
+        self.last_close[rows] = close
+        self.last_date[rows] = date
+        return self.alpha
+
+
+ALPHA_STATES = {
+    "alpha_1": Alpha1State,
+}
+
+
+class SignalService:
+    def __init__(self, exchange, alpha_name, tickers, state_root=DEFAULT_STATE_ROOT, store=market_data_store):
+        self.exchange = exchange
+        self.alpha_name = alpha_name
+        self.store = store
+        self.path = os.path.join(state_root, exchange, f"{alpha_name}.npz")
+        self.state = ALPHA_STATES[alpha_name](tickers)
+        if os.path.exists(self.path):
+            self.restore()
+
+    @property
+    def tickers(self):
+        return self.state.tickers
+
+    def snapshot(self):
+        state = self.state
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        arrays = {field: getattr(state, field) for field in state._state_fields}
+        meta = {"alpha": self.alpha_name, "tickers": state.tickers}
+        np.savez(self.path, __meta__=np.array(json.dumps(meta)), **arrays)
+
+    def restore(self):
+        """Load saved state for the tickers it has; the rest keep fresh state."""
+
+        state = self.state
+        with np.load(self.path) as saved:
+            meta = json.loads(str(saved["__meta__"]))
+            if meta["alpha"] != self.alpha_name:
+                logger.warning("%s holds state for %s, not %s", self.path, meta["alpha"], self.alpha_name)
+                return self
+            old_ids = {ticker: row for row, ticker in enumerate(meta["tickers"])}
+            shared = [ticker for ticker in state.tickers if ticker in old_ids]
+            new_rows = np.array([state.ticker_ids[ticker] for ticker in shared], dtype=np.int64)
+            old_rows = np.array([old_ids[ticker] for ticker in shared], dtype=np.int64)
+            for field in state._state_fields:
+                getattr(state, field)[new_rows] = saved[field][old_rows]
+        return self
+
+    def catch_up(self):
+        """Apply every stored bar newer than the state, reading only those bars."""
+
+        state = self.state
+        fresh = np.isnat(state.last_date)
+        missing = [ticker for ticker, row_fresh in zip(state.tickers, fresh) if row_fresh]
+        known = [ticker for ticker, row_fresh in zip(state.tickers, fresh) if not row_fresh]
+        if missing:
+            logger.info("Warming up %s for %d tickers from their full history", self.alpha_name, len(missing))
+            self._apply(self.store.read_exchange(self.exchange, state.columns, tickers=missing))
+        if known:
+            start = state.last_date[~fresh].min() + 1
+            self._apply(self.store.read_exchange(self.exchange, state.columns, start=start, tickers=known))
+        return state.alpha
+
+    def _apply(self, bars):
+        if bars.empty:
+            return
+        bars = bars.dropna(subset=["close"]).drop_duplicates(["ticker", "date"], keep="last")
+        # One (dates x tickers) panel, applied a row at a time
+        closes = bars.pivot(index="date", columns="ticker", values="close").sort_index()
+        closes = closes.reindex(columns=self.state.tickers)
+        for date, row in zip(closes.index, closes.to_numpy(dtype=np.float64)):
+            self.state.update_closes(date, row)
+
+    def update(self, date, bars):
+        """Apply one new daily bar per ticker (a DataFrame indexed by ticker) as it arrives."""
+
+        return self.state.update(date, bars)
+
+    def alphas(self):
+        return pd.Series(self.state.alpha, index=self.state.tickers, name=self.alpha_name)
+
+    def evaluate(self, long_bounds, short_bounds):
+        """Long where alpha > its long bound and short where alpha < its short bound.
+
+        Bounds are Series indexed by ticker; returns the long and short booleans
+        in the order of each bounds Series.
+        """
+
+        alphas = self.alphas()
+        long_alpha = alphas.reindex(long_bounds.index).to_numpy()
+        short_alpha = alphas.reindex(short_bounds.index).to_numpy()
+        long_signals = pd.Series(long_alpha > long_bounds.to_numpy(dtype=np.float64), index=long_bounds.index)
+        short_signals = pd.Series(short_alpha < short_bounds.to_numpy(dtype=np.float64), index=short_bounds.index)
+        return long_signals, short_signals
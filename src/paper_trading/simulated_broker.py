@@ -0,0 +1,483 @@
+import datetime
+import random
+import threading
+import time
+import uuid
+from types import SimpleNamespace
+from zoneinfo import ZoneInfo
+
+import pandas as pd
+from alpaca.trading.enums import OrderClass, OrderSide, OrderStatus, OrderType, PositionSide, TradeEvent
+
+from src.paper_trading.alpaca_manager import AlpacaManager
+from src.paper_trading.order_pipeline import MockBrokerError
+from src.websockets.record_replay import read_log
+from src.websockets.websocket_class.messages import decode
+
+# Simulated Broker
+#
+# An in-process stand-in for AlpacaManager. Bots, the order pipeline and
+# backtests can run against it with no network. It inherits the order
+# builders and on_signal_buy/on_signal_sell. Submits, positions, the account
+# and the clock are simulated.
+#
+# Time is the timestamp of the market data being replayed. A submitted order
+# reaches the "exchange" after the latency model's delay. It then fills
+# against the first quote or bar at or after that time:
+# - market orders fill at the ask/bid, or the bar open, plus slippage;
+# - limit orders fill when the price reaches their limit;
+# - stop orders trigger when the price crosses their stop, then fill like
+#   market orders.
+# Bracket orders (and limit orders carrying take_profit/stop_loss, as
+# on_signal_buy builds them) open two OCO exit legs once the entry fills.
+# When one leg fills the other is cancelled.
+#
+# Drive it with on_quote()/on_bar(), or with the replay_* generators. They
+# apply each event and then yield it, so a strategy can react between events:
+#
+#     broker = SimulatedBroker(stock_list)
+#     for symbol, quote in broker.replay_log('session.log'):
+#         bot.handle_incoming_quote_for_position(symbol, quote)
+#
+# This runs as fast as the strategy can consume the events. fills_frame()
+# gives every fill with its simulated and wall-clock latency.
+
+_EASTERN = ZoneInfo("America/New_York")
+_MARKET_OPEN = datetime.time(9, 30)
+_MARKET_CLOSE = datetime.time(16, 0)
+_OPEN_STATUSES = (OrderStatus.NEW, OrderStatus.ACCEPTED, OrderStatus.HELD)
+
+
+def _value(field):
+    return getattr(field, "value", field)
+
+
+def _leg_price(leg, key):
+    if leg is None:
+        return None
+    price = leg.get(key) if isinstance(leg, dict) else getattr(leg, key, None)
+    return None if price is None else float(price)
+
+
+def _seconds(timestamp):
+    # EODHD sends epoch milliseconds; datetimes and epoch seconds are also accepted
+    if isinstance(timestamp, datetime.datetime):
+        return timestamp.timestamp()
+    return timestamp / 1000 if timestamp > 1e11 else float(timestamp)
+
+
+def _number(value):
+    # Alpaca returns quantities and prices as strings
+    return str(int(value)) if float(value).is_integer() else str(round(value, 9))
+
+
+class SimulatedOrder:
+    def __init__(self, symbol, side, order_type, qty=None, notional=None, limit_price=None, stop_price=None,
+                 client_order_id=None, order_class=OrderClass.SIMPLE, submitted_at=0.0, arrives_at=0.0):
+        self.id = uuid.uuid4()
+        self.client_order_id = client_order_id or str(self.id)
+        self.symbol = symbol
+        self.side = OrderSide(_value(side))
+        self.type = OrderType(_value(order_type))
+        self.order_class = OrderClass(_value(order_class) or OrderClass.SIMPLE.value)
+        self.qty = qty
+        self.notional = notional
+        self.limit_price = limit_price
+        self.stop_price = stop_price
+        self.status = OrderStatus.ACCEPTED
+        self.filled_qty = 0.0
+        self.filled_avg_price = None
+        self.submitted_at = submitted_at
+        self.arrives_at = arrives_at
+        self.filled_at = None
+        self.triggered = False
+        self.legs = []
+        # Exit legs waiting for this entry to fill, and the OCO sibling of a leg
+        self.pending_legs = []
+        self.sibling = None
+        self.wall_submitted_at = time.perf_counter()
+
+    def __repr__(self):
+        return (f"SimulatedOrder({self.symbol} {self.side.value} {self.type.value} qty={self.qty} "
+                f"notional={self.notional} status={self.status.value})")
+
+
+class SimulatedPosition:
+    """Open position with the same (string-valued) fields the bots read from Alpaca positions."""
+
+    def __init__(self, symbol):
+        self.symbol = symbol
+        self.quantity = 0.0
+        self.entry_price = 0.0
+        self.price = 0.0
+
+    @property
+    def qty(self):
+        return _number(abs(self.quantity))
+
+    @property
+    def side(self):
+        return PositionSide.LONG if self.quantity > 0 else PositionSide.SHORT
+
+    @property
+    def avg_entry_price(self):
+        return _number(self.entry_price)
+
+    @property
+    def current_price(self):
+        return _number(self.price)
+
+    @property
+    def market_value(self):
+        return _number(self.quantity * self.price)
+
+    @property
+    def cost_basis(self):
+        return _number(self.quantity * self.entry_price)
+
+    @property
+    def unrealized_pl(self):
+        return _number(self.quantity * (self.price - self.entry_price))
+
+    @property
+    def unrealized_plpc(self):
+        cost = abs(self.quantity * self.entry_price)
+        return _number(self.quantity * (self.price - self.entry_price) / cost if cost else 0.0)
+
+    def __repr__(self):
+        return f"SimulatedPosition({self.symbol} qty={self.quantity} entry={self.entry_price} price={self.price})"
+
+
+class SimulatedBroker(AlpacaManager):
+    def __init__(self, stock_list, cash=100_000.0, latency=0.05, latency_jitter=0.0, slippage_bps=1.0,
+                 margin_multiplier=1.0, market_hours=True, seed=None):
+        # No TradingClient or TradingStream: every broker call is answered locally
+        self.api = None
+        self.websocket = None
+        self.positions = {stock: None for stock in stock_list}
+        self.cash = float(cash)
+        self.latency = latency
+        self.latency_jitter = latency_jitter
+        self.slippage = slippage_bps / 10_000
+        self.margin_multiplier = margin_multiplier
+        self.market_hours = market_hours
+        self.now = 0.0
+
+        self.orders = {}
+        self.orders_by_client_id = {}
+        self.open_orders = []
+        self.fills = []
+        self.trade_update_handlers = []
+        self.marks = {}
+        self._holdings = {}
+        self._random = random.Random(seed)
+        # The order pipeline submits from several threads
+        self._lock = threading.RLock()
+
+    # Market data
+
+    def on_quote(self, symbol, bid_price, ask_price, timestamp, bid_size=None, ask_size=None):
+        with self._lock:
+            self.now = max(self.now, _seconds(timestamp))
+            self._mark(symbol, (bid_price + ask_price) / 2)
+            # A buy pays the ask and a sell gets the bid, for both triggering and filling
+            self._match(symbol, buy=ask_price, sell=bid_price, low_buy=ask_price, high_buy=ask_price,
+                        low_sell=bid_price, high_sell=bid_price)
+
+    def on_bar(self, symbol, open, high, low, close, timestamp, volume=None):
+        with self._lock:
+            self.now = max(self.now, _seconds(timestamp))
+            # Market orders fill at the open; limits and stops fill if the bar's range reaches them
+            self._match(symbol, buy=open, sell=open, low_buy=low, high_buy=high, low_sell=low, high_sell=high)
+            self._mark(symbol, close)
+
+    def _mark(self, symbol, price):
+        self.marks[symbol] = price
+        position = self._holdings.get(symbol)
+        if position is not None:
+            position.price = price
+
+    def _match(self, symbol, buy, sell, low_buy, high_buy, low_sell, high_sell):
+        for order in [order for order in self.open_orders if order.symbol == symbol]:
+            if order.arrives_at > self.now or order.status not in _OPEN_STATUSES:
+                continue
+            is_buy = order.side == OrderSide.BUY
+            market = buy * (1 + self.slippage) if is_buy else sell * (1 - self.slippage)
+            price = None
+            if order.type == OrderType.MARKET or order.triggered:
+                price = market
+            elif order.type == OrderType.LIMIT:
+                if is_buy and low_buy <= order.limit_price:
+                    price = min(order.limit_price, buy)
+                elif not is_buy and high_sell >= order.limit_price:
+                    price = max(order.limit_price, sell)
+            elif order.type == OrderType.STOP:
+                if is_buy and high_buy >= order.stop_price:
+                    price = max(order.stop_price, buy) * (1 + self.slippage)
+                elif not is_buy and low_sell <= order.stop_price:
+                    price = min(order.stop_price, sell) * (1 - self.slippage)
+            if price is not None:
+                self._fill(order, price)
+
+    # Orders
+
+    def _arrival(self):
+        return self.now + self.latency + self._random.uniform(0, self.latency_jitter)
+
+    def submit_order(self, order):
+        with self._lock:
+            return self._submit(order)
+
+    def _submit(self, order):
+        client_order_id = getattr(order, "client_order_id", None)
+        if client_order_id and client_order_id in self.orders_by_client_id:
+            raise MockBrokerError(422, '{"message": "client_order_id must be unique"}')
+
+        order_class = _value(getattr(order, "order_class", None)) or OrderClass.SIMPLE.value
+        take_profit = _leg_price(getattr(order, "take_profit", None), "limit_price")
+        stop_loss = _leg_price(getattr(order, "stop_loss", None), "stop_price")
+        limit_price = getattr(order, "limit_price", None)
+        stop_price = getattr(order, "stop_price", None)
+        order_type = _value(order.type)
+
+        if order_class == OrderClass.OCO.value:
+            # An OCO is just the two exit legs, with no entry order
+            placed = SimulatedOrder(order.symbol, order.side, OrderType.LIMIT, qty=order.qty,
+                                    limit_price=take_profit or limit_price, client_order_id=client_order_id,
+                                    order_class=OrderClass.OCO, submitted_at=self.now, arrives_at=self._arrival())
+            # Both legs reach the broker in the same request
+            stop = self._child(placed, OrderType.STOP, stop_price=stop_loss, side=order.side,
+                               arrives_at=placed.arrives_at)
+            placed.sibling, stop.sibling = stop, placed
+            placed.legs = [stop]
+            self._accept(placed)
+            self._accept(stop)
+            return placed
+
+        placed = SimulatedOrder(order.symbol, order.side, order_type, qty=getattr(order, "qty", None),
+                                notional=getattr(order, "notional", None),
+                                limit_price=None if limit_price is None else float(limit_price),
+                                stop_price=None if stop_price is None else float(stop_price),
+                                client_order_id=client_order_id, order_class=order_class,
+                                submitted_at=self.now, arrives_at=self._arrival())
+        exit_side = OrderSide.SELL if placed.side == OrderSide.BUY else OrderSide.BUY
+        if take_profit is not None:
+            placed.pending_legs.append((OrderType.LIMIT, take_profit, exit_side))
+        if stop_loss is not None:
+            placed.pending_legs.append((OrderType.STOP, stop_loss, exit_side))
+        self._accept(placed)
+        return placed
+
+    def _child(self, parent, order_type, limit_price=None, stop_price=None, side=None, qty=None, arrives_at=None):
+        # Legs placed by the broker itself, e.g. a bracket's exits, are live at once
+        return SimulatedOrder(parent.symbol, side or parent.side, order_type, qty=qty or parent.qty,
+                              limit_price=limit_price, stop_price=stop_price,
+                              client_order_id=f"{parent.client_order_id}-{order_type.value}",
+                              order_class=parent.order_class, submitted_at=self.now,
+                              arrives_at=self.now if arrives_at is None else arrives_at)
+
+    def _accept(self, order):
+        self.orders[str(order.id)] = order
+        self.orders_by_client_id[order.client_order_id] = order
+        self.open_orders.append(order)
+        self._publish(TradeEvent.NEW, order)
+
+    def _close_order(self, order, status):
+        order.status = status
+        if order in self.open_orders:
+            self.open_orders.remove(order)
+
+    def cancel_order(self, order, publish=True):
+        if order.status in _OPEN_STATUSES:
+            self._close_order(order, OrderStatus.CANCELED)
+            if publish:
+                self._publish(TradeEvent.CANCELED, order)
+
+    def _fill(self, order, price):
+        if order.type == OrderType.STOP and not order.triggered:
+            order.triggered = True
+        qty = float(order.qty) if order.qty is not None else float(order.notional) / price
+        signed = qty if order.side == OrderSide.BUY else -qty
+        # Exit legs skip the check only while they reduce a position (see _can_afford)
+        if not self._can_afford(order.symbol, signed, price):
+            self._close_order(order, OrderStatus.REJECTED)
+            self._publish(TradeEvent.REJECTED, order)
+            return
+
+        order.filled_qty = qty
+        order.filled_avg_price = price
+        order.filled_at = self.now
+        self._close_order(order, OrderStatus.FILLED)
+        position_qty = self._apply_fill(order.symbol, signed, price)
+        self.fills.append({
+            "client_order_id": order.client_order_id,
+            "symbol": order.symbol,
+            "side": order.side.value,
+            "type": order.type.value,
+            "qty": qty,
+            "price": price,
+            "submitted_at": order.submitted_at,
+            "filled_at": order.filled_at,
+            "latency": order.filled_at - order.submitted_at,
+            "wall_latency_ms": (time.perf_counter() - order.wall_submitted_at) * 1000,
+        })
+        self._publish(TradeEvent.FILL, order, position_qty=position_qty, price=price, qty=qty)
+
+        if order.sibling is not None:
+            self.cancel_order(order.sibling)
+        if order.pending_legs:
+            legs = [self._child(order, order_type, limit_price=level if order_type == OrderType.LIMIT else None,
+                                stop_price=level if order_type == OrderType.STOP else None, side=side, qty=qty)
+                    for order_type, level, side in order.pending_legs]
+            if len(legs) == 2:
+                legs[0].sibling, legs[1].sibling = legs[1], legs[0]
+            order.legs = legs
+            for leg in legs:
+                self._accept(leg)
+
+    def _can_afford(self, symbol, signed_qty, price):
+        held = self._holdings.get(symbol)
+        current = held.quantity if held else 0.0
+        # Orders that only reduce a position never need buying power
+        if abs(current + signed_qty) <= abs(current):
+            return True
+        return abs(signed_qty) * price <= self.get_buying_power() + 1e-9
+
+    def _apply_fill(self, symbol, signed_qty, price):
+        self.cash -= signed_qty * price
+        position = self._holdings.get(symbol)
+        if position is None:
+            position = self._holdings[symbol] = SimulatedPosition(symbol)
+        new_quantity = position.quantity + signed_qty
+        if position.quantity == 0 or position.quantity * signed_qty > 0:
+            # Opening or adding: average the entry price
+            position.entry_price = (position.entry_price * position.quantity + price * signed_qty) / new_quantity
+        elif new_quantity * position.quantity < 0:
+            # Flipped through zero: the remainder opens at this price
+            position.entry_price = price
+        position.quantity = new_quantity
+        position.price = price
+
+        if abs(position.quantity) < 1e-9:
+            del self._holdings[symbol]
+            self.positions[symbol] = None
+            return 0.0
+        self.positions[symbol] = position
+        return position.quantity
+
+    def _publish(self, event, order, position_qty=None, price=None, qty=None):
+        if not self.trade_update_handlers:
+            return
+        update = SimpleNamespace(event=event, order=order, timestamp=self.now, position_qty=position_qty,
+                                 price=price, qty=qty)
+        for handler in self.trade_update_handlers:
+            handler(update)
+
+    def subscribe_trade_updates(self, handler):
+        """Call handler(update) for every order event, like the trade updates stream."""
+        self.trade_update_handlers.append(handler)
+
+    # AlpacaManager surface
+
+    def get_orders(self):
+        return list(self.open_orders)
+
+    def get_order_by_id(self, order_id):
+        return self.orders[str(order_id)]
+
+    def cancel_order_by_id(self, order_id):
+        with self._lock:
+            if str(order_id) not in self.orders:
+                raise MockBrokerError(404, "order not found")
+            self.cancel_order(self.orders[str(order_id)])
+
+    def get_order_by_client_id(self, client_id):
+        if client_id not in self.orders_by_client_id:
+            raise MockBrokerError(404, "order not found")
+        return self.orders_by_client_id[client_id]
+
+    def get_positions(self):
+        return list(self._holdings.values())
+
+    def get_position_by_symbol(self, symbol):
+        return self._holdings.get(symbol)
+
+    def close_position_by_symbol(self, symbol):
+        with self._lock:
+            return self._close_position(symbol)
+
+    def _close_position(self, symbol):
+        position = self._holdings.get(symbol)
+        for order in [order for order in self.open_orders if order.symbol == symbol]:
+            self.cancel_order(order)
+        if position is None:
+            raise MockBrokerError(404, f"position does not exist: {symbol}")
+        side = OrderSide.SELL if position.quantity > 0 else OrderSide.BUY
+        return self.submit_order(self.create_market_order(symbol, abs(position.quantity), side, "day"))
+
+    def close_all_positions(self):
+        return [self.close_position_by_symbol(symbol) for symbol in list(self._holdings)]
+
+    def equity(self):
+        return self.cash + sum(position.quantity * position.price for position in self._holdings.values())
+
+    def get_account(self):
+        return SimpleNamespace(cash=_number(self.cash), equity=_number(self.equity()),
+                               buying_power=_number(self.get_buying_power()), trading_blocked=False)
+
+    def get_buying_power(self):
+        gross = sum(abs(position.quantity) * position.price for position in self._holdings.values())
+        return max(0.0, self.equity() * self.margin_multiplier - gross)
+
+    def is_market_open(self):
+        if not self.market_hours:
+            return True
+        local = datetime.datetime.fromtimestamp(self.now, _EASTERN)
+        return local.weekday() < 5 and _MARKET_OPEN <= local.time() < _MARKET_CLOSE
+
+    # The live cache and stream plumbing has nothing to do here
+    def refresh(self, name):
+        return None
+
+    def invalidate(self, *names):
+        pass
+
+    async def reconcile(self, interval=5, trade_updates=True):
+        pass
+
+    def start_trade_updates(self):
+        pass
+
+    def connect_websocket(self):
+        pass
+
+    # Replay
+
+    def replay_quotes(self, messages):
+        """Apply EODHD us-quote messages (s, ap, bp, as, bs, t), yielding (symbol, quote) after each."""
+        for message in messages:
+            if "s" not in message or "ap" not in message:
+                continue
+            self.on_quote(message["s"], message["bp"], message["ap"], message["t"],
+                          message.get("bs"), message.get("as"))
+            yield message["s"], {"ask_price": message["ap"], "bid_price": message["bp"], "timestamp": message["t"],
+                                 "ask_size": message.get("as"), "bid_size": message.get("bs")}
+
+    def replay_log(self, path):
+        """Replay a recorded websocket log (see record_replay) as quotes."""
+        return self.replay_quotes(decode(payload) for _, payload in read_log(path))
+
+    def replay_bars(self, bars):
+        """Apply a bars DataFrame (symbol, timestamp, open, high, low, close, volume) in time order,
+        yielding (symbol, bar dict) after each bar."""
+        time_column = "timestamp" if "timestamp" in bars.columns else "datetime"
+        for bar in bars.sort_values(time_column, kind="stable").to_dict("records"):
+            timestamp = bar[time_column]
+            if isinstance(timestamp, pd.Timestamp):
+                timestamp = timestamp.to_pydatetime()
+            self.on_bar(bar["symbol"], bar["open"], bar["high"], bar["low"], bar["close"], timestamp,
+                        bar.get("volume"))
+            yield bar["symbol"], bar
+
+    def fills_frame(self):
+        return pd.DataFrame(self.fills)
@@ -1,41 +1,18 @@
-import pandas as pd
 from src.alphas.all_alphas import alpha10
-from src.strategies.portfolio import initialize_portfolio, update_portfolio
+from src.strategies.portfolio import run_threshold_strategy
+
 
 def alpha10_strategy_long(df, upper_bound):
-    df = alpha10(df)  # Calculate alpha10 values
-    
-    # Initialize portfolio
-    portfolio = initialize_portfolio(df)
-    
-    # Implement strategy
-    for i in range(1, len(df)):
-        if df['alpha10'].iloc[i] > upper_bound:
-            # Buy at open, sell at close
-            daily_return = df['close'].iloc[i] / df['open'].iloc[i] - 1
-        else:
-            daily_return = 0  # No action
-            
-        # Update portfolio
-        portfolio = update_portfolio(portfolio, i, daily_return)
-        
-    return portfolio
+    # Calculate alpha10 values
+    df = alpha10(df)
+
+    # Buy at open, sell at close whenever alpha10 is above the bound
+    return run_threshold_strategy(df, df['alpha10'], upper_bound, 'long')
+
+
+def alpha10_strategy_short(df, lower_bound):
+    # Calculate alpha10 values
+    df = alpha10(df)
 
-def alpha10_strategy_short(df,  lower_bound):
-    df = alpha10(df)  # Calculate alpha10 values
-    
-    # Initialize portfolio
-    portfolio = initialize_portfolio(df)
-    
-    # Implement strategy
-    for i in range(1, len(df)):
-        if df['alpha10'].iloc[i] < lower_bound:
-            # Sell at open, buy at close (short)
-            daily_return = df['open'].iloc[i] / df['close'].iloc[i] - 1
-        else:
-            daily_return = 0  # No action
-            
-        # Update portfolio
-        portfolio = update_portfolio(portfolio, i, daily_return)
-        
-    return portfolio
\ No newline at end of file
+    # Sell at open, buy at close whenever alpha10 is below the bound
+    return run_threshold_strategy(df, df['alpha10'], lower_bound, 'short')
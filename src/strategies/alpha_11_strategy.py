@@ -1,44 +1,18 @@
 from src.alphas.all_alphas import alpha11
-import pandas as pd
-from src.strategies.portfolio import initialize_portfolio
+from src.strategies.portfolio import run_threshold_strategy
 
 
 def alpha11_strategy_long(df, upper_bound):
-    df = alpha11(df)  # Calculate alpha11 values
-    
-    # Initialize portfolio
-    portfolio = initialize_portfolio(df)
-    
-    # Implement strategy
-    for i in range(1, len(df)):
-        if df['alpha11'].iloc[i] > upper_bound:
-            # Buy at open, sell at close
-            daily_return = df['close'].iloc[i] / df['open'].iloc[i] - 1
-        else:
-            daily_return = 0  # No action
-            
-        # Update portfolio
-        portfolio.at[i, 'Returns'] = daily_return
-        portfolio.at[i, 'Total'] = portfolio.at[i-1, 'Total'] * (1 + daily_return)
-        
-    return portfolio
+    # Calculate alpha11 values
+    df = alpha11(df)
+
+    # Buy at open, sell at close whenever alpha11 is above the bound
+    return run_threshold_strategy(df, df['alpha11'], upper_bound, 'long')
+
 
 def alpha11_strategy_short(df, lower_bound):
-    df = alpha11(df)  # Calculate alpha11 values
-    
-    # Initialize portfolio
-    portfolio = initialize_portfolio(df)
-    
-    # Implement strategy
-    for i in range(1, len(df)):
-        if df['alpha11'].iloc[i] < lower_bound:
-            # Sell at open, buy at close (short)
-            daily_return = df['open'].iloc[i] / df['close'].iloc[i] - 1
-        else:
-            daily_return = 0  # No action
-            
-        # Update portfolio
-        portfolio.at[i, 'Returns'] = daily_return
-        portfolio.at[i, 'Total'] = portfolio.at[i-1, 'Total'] * (1 + daily_return)
-        
-    return portfolio
\ No newline at end of file
+    # Calculate alpha11 values
+    df = alpha11(df)
+
+    # Sell at open, buy at close whenever alpha11 is below the bound
+    return run_threshold_strategy(df, df['alpha11'], lower_bound, 'short')
@@ -1,43 +1,18 @@
 from src.alphas.all_alphas import alpha3
-import pandas as pd
-from src.strategies.portfolio import initialize_portfolio, update_portfolio
+from src.strategies.portfolio import run_threshold_strategy
+
 
 def alpha_3_strategy_long(df, upper_bound):
     # Calculate alpha3 values
     df['alpha3'] = alpha3(df)
-    
-    # Initialize portfolio
-    portfolio = initialize_portfolio(df)
-    
-    # Implement strategy
-    for i in range(1, len(df)):
-        if df['alpha3'].iloc[i] > upper_bound:
-            # Buy at open, sell at close
-            daily_return = df['close'].iloc[i] / df['open'].iloc[i] - 1
-        else:
-            daily_return = 0  # No action
-            
-        # Update portfolio
-        portfolio = update_portfolio(portfolio, i, daily_return)
-        
-    return portfolio
+
+    # Buy at open, sell at close whenever alpha3 is above the bound
+    return run_threshold_strategy(df, df['alpha3'], upper_bound, 'long')
+
 
 def alpha_3_strategy_short(df, lower_bound):
     # Calculate alpha3 values
     df['alpha3'] = alpha3(df)
-    
-    # Initialize portfolio
-    portfolio = initialize_portfolio(df)
-    
-    # Implement strategy
-    for i in range(1, len(df)):
-        if df['alpha3'].iloc[i] < lower_bound:
-            # Sell at open, buy at close (short)
-            daily_return = df['open'].iloc[i] / df['close'].iloc[i] - 1
-        else:
-            daily_return = 0  # No action
-            
-        # Update portfolio
-        portfolio = update_portfolio(portfolio, i, daily_return)
-        
-    return portfolio
\ No newline at end of file
+
+    # Sell at open, buy at close whenever alpha3 is below the bound
+    return run_threshold_strategy(df, df['alpha3'], lower_bound, 'short')
@@ -1,45 +1,18 @@
 from src.alphas.all_alphas import alpha5
-import pandas as pd
-from src.strategies.portfolio import initialize_portfolio
+from src.strategies.portfolio import run_threshold_strategy
+
 
 def alpha_5_strategy_long(df, upper_bound):
     # Calculate alpha5 values
     df['alpha5'] = alpha5(df)
-    
-    # Initialize portfolio
-    portfolio = initialize_portfolio(df)
-    
-    # Implement strategy
-    for i in range(1, len(df)):
-        if df['alpha5'].iloc[i] > upper_bound:
-            # Buy at open, sell at close
-            daily_return = df['close'].iloc[i] / df['open'].iloc[i] - 1
-        else:
-            daily_return = 0  # No action
-            
-        # Update portfolio
-        portfolio.at[i, 'Returns'] = daily_return
-        portfolio.at[i, 'Total'] = portfolio.at[i-1, 'Total'] * (1 + daily_return)
-        
-    return portfolio
+
+    # Buy at open, sell at close whenever alpha5 is above the bound
+    return run_threshold_strategy(df, df['alpha5'], upper_bound, 'long')
+
 
 def alpha_5_strategy_short(df, lower_bound):
     # Calculate alpha5 values
     df['alpha5'] = alpha5(df)
-    
-    # Initialize portfolio
-    portfolio = initialize_portfolio(df)
-    
-    # Implement strategy
-    for i in range(1, len(df)):
-        if df['alpha5'].iloc[i] < lower_bound:
-            # Sell at open, buy at close (short)
-            daily_return = df['open'].iloc[i] / df['close'].iloc[i] - 1
-        else:
-            daily_return = 0  # No action
-            
-        # Update portfolio
-        portfolio.at[i, 'Returns'] = daily_return
-        portfolio.at[i, 'Total'] = portfolio.at[i-1, 'Total'] * (1 + daily_return)
-        
-    return portfolio
\ No newline at end of file
+
+    # Sell at open, buy at close whenever alpha5 is below the bound
+    return run_threshold_strategy(df, df['alpha5'], lower_bound, 'short')
@@ -1,36 +1,18 @@
 from src.alphas.all_alphas import alpha7
-import pandas as pd
-from src.strategies.portfolio import initialize_portfolio
+from src.strategies.portfolio import run_threshold_strategy
 
 
 def alpha_7_strategy_long(df, upper_bound):
+    # Calculate alpha7 values
     df['alpha7'] = alpha7(df)
 
-    portfolio = initialize_portfolio(df)
-    
-    for i in range(1, len(df)):
-        if df['alpha7'].iloc[i] > upper_bound:
-            daily_return = df['close'].iloc[i] / df['open'].iloc[i] - 1
-        else:
-            daily_return = 0
-            
-        portfolio.at[i, 'Returns'] = daily_return
-        portfolio.at[i, 'Total'] = portfolio.at[i-1, 'Total'] * (1 + daily_return)
-        
-    return portfolio
+    # Buy at open, sell at close whenever alpha7 is above the bound
+    return run_threshold_strategy(df, df['alpha7'], upper_bound, 'long')
+
 
 def alpha_7_strategy_short(df, lower_bound):
+    # Calculate alpha7 values
     df['alpha7'] = alpha7(df)
 
-    portfolio = initialize_portfolio(df)
-    
-    for i in range(1, len(df)):
-        if df['alpha7'].iloc[i] < -lower_bound:
-            daily_return = df['open'].iloc[i] / df['close'].iloc[i] - 1
-        else:
-            daily_return = 0
-            
-        portfolio.at[i, 'Returns'] = daily_return
-        portfolio.at[i, 'Total'] = portfolio.at[i-1, 'Total'] * (1 + daily_return)
-        
-    return portfolio
+    # Sell at open, buy at close whenever alpha7 is below the negated bound
+    return run_threshold_strategy(df, df['alpha7'], -lower_bound, 'short')
@@ -11,4 +11,50 @@ def initialize_portfolio(df):
 def update_portfolio(portfolio, i, daily_return):
     portfolio.at[i, 'Returns'] = daily_return
     portfolio.at[i, 'Total'] = portfolio.at[i-1, 'Total'] * (1 + daily_return)
-    return portfolio
\ No newline at end of file
+    return portfolio
+
+def threshold_returns(df, alpha_values, bounds, side):
+    # Open-to-close returns of the threshold strategy for one or many bounds at once.
+    # Scalar bound -> shape (n,); array of bounds -> shape (n, len(bounds)), one column per bound.
+    if side not in ('long', 'short'):
+        raise ValueError(f"side must be 'long' or 'short', got {side}")
+    alpha_values = np.asarray(alpha_values, dtype=np.float64)
+    bounds = np.asarray(bounds, dtype=np.float64)
+    opens = df['open'].to_numpy(dtype=np.float64)
+    closes = df['close'].to_numpy(dtype=np.float64)
+
+    if bounds.ndim:
+        alpha_values = alpha_values[:, None]
+    if side == 'long':
+        # Buy at open, sell at close
+        signal = alpha_values > bounds
+        daily_return = closes / opens - 1
+    else:
+        # Sell at open, buy at close (short)
+        signal = alpha_values < bounds
+        daily_return = opens / closes - 1
+    if bounds.ndim:
+        daily_return = daily_return[:, None]
+
+    returns = np.where(signal, daily_return, 0.0)
+    if len(returns):
+        returns[0] = 0.0  # nothing is traded on the first day
+    return returns
+
+def apply_returns(portfolio, returns):
+    # Compounds a whole column of daily returns into 'Total' in one pass. The running
+    # product starts from the initial capital so every step multiplies in the same
+    # order as update_portfolio does row by row.
+    returns = np.asarray(returns, dtype=np.float64)
+    growth = 1 + returns
+    if len(growth):
+        growth[0] = portfolio['Total'].iloc[0] * growth[0]
+    portfolio['Returns'] = returns
+    portfolio['Total'] = np.cumprod(growth)
+    return portfolio
+
+def run_threshold_strategy(df, alpha_values, bound, side):
+    # Trades open-to-close on each day the precomputed alpha crosses the bound:
+    # side 'long' buys when alpha > bound, side 'short' sells when alpha < bound.
+    portfolio = initialize_portfolio(df)
+    return apply_returns(portfolio, threshold_returns(df, alpha_values, bound, side))
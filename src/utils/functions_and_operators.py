@@ -1,6 +1,72 @@
 import numpy as np
 import pandas as pd
 
+from src.utils.rolling_kernels import (
+    rolling_argmax,
+    rolling_argmin,
+    rolling_decay_linear,
+    rolling_product,
+    rolling_rank,
+)
+
+
+# Panel Mode
+#
+# Every operator also accepts a 2-D (dates x tickers) panel, either a wide
+# DataFrame or a 2-D NumPy array. In panel mode cross-sectional operators
+# (rank, scale) work across each row, i.e. across tickers on one date, and
+# time-series operators work down each column in a single vectorized call.
+# Results keep the input's type: DataFrame in, DataFrame out; ndarray in,
+# ndarray out.
+
+
+def _is_panel(x):
+    return isinstance(x, pd.DataFrame) or (isinstance(x, np.ndarray) and x.ndim == 2)
+
+
+def _as_frame(x):
+    return x if isinstance(x, pd.DataFrame) else pd.DataFrame(x)
+
+
+def _like(original, result):
+    if isinstance(original, pd.DataFrame):
+        return result
+    return result.to_numpy()
+
+
+# Wraps a kernel result back into the input's container: a Series carrying the
+# input's index and name (what the pandas rolling().apply() versions used to
+# return), or a panel of the input's type.
+def _rolling_result(x, kernel, d):
+    if _is_panel(x):
+        frame = _as_frame(x)
+        values = kernel(frame.to_numpy(dtype=np.float64), d)
+        return _like(x, pd.DataFrame(values, index=frame.index, columns=frame.columns))
+    x = pd.Series(x)
+    return pd.Series(kernel(x.to_numpy(dtype=np.float64), d), index=x.index, name=x.name)
+
+
+# Applies a pandas time-series method down each column of a panel, or to the
+# single series otherwise.
+def _time_series(x, method, *args, **kwargs):
+    if _is_panel(x):
+        return _like(x, getattr(_as_frame(x), method)(*args, **kwargs))
+    return getattr(pd.Series(x), method)(*args, **kwargs)
+
+
+def _rolling(x, d, method, *args):
+    if _is_panel(x):
+        return _like(x, getattr(_as_frame(x).rolling(window=d), method)(*args))
+    return getattr(pd.Series(x).rolling(window=d), method)(*args)
+
+
+def _rolling_pair(x, y, d, method):
+    if _is_panel(x):
+        result = getattr(_as_frame(x).rolling(window=d), method)(_as_frame(y))
+        return _like(x, result)
+    return getattr(pd.Series(x).rolling(window=d), method)(pd.Series(y))
+
+
 # Standard Functions
 
 # Absolute Value: Converts all negative numbers in array x to positive.
@@ -17,34 +83,41 @@ def sign(x):
     return np.sign(x)
 
 # Cross-sectional Rank: Ranks each element in array x and returns an array of ranks.
+# On a panel each date is ranked across tickers.
 # Useful for comparing elements to each other.
 def rank(x):
+    if _is_panel(x):
+        return _like(x, _as_frame(x).rank(axis=1, pct=True))
     return pd.Series(x).rank(pct=True)
 
 # Delay: Shifts array x by d days, filling the first d elements with NaN.
 # Useful for comparing a series with its own past values.
 def delay(x, d):
-    return pd.Series(x).shift(d)
+    return _time_series(x, 'shift', d)
 
 # Time-serial Correlation: Computes the correlation between arrays x and y over a rolling window of d days.
 # Useful for identifying how two series move in relation to each other.
 def correlation(x, y, d):
-    return pd.Series(x).rolling(window=d).corr(pd.Series(y))
+    return _rolling_pair(x, y, d, 'corr')
 
 # Time-serial Covariance: Computes the covariance between arrays x and y over a rolling window of d days.
 # Useful for identifying the directional relationship between two series.
 def covariance(x, y, d):
-    return pd.Series(x).rolling(window=d).cov(pd.Series(y))
+    return _rolling_pair(x, y, d, 'cov')
 
 # Scale: Scales array x so that the sum of its absolute values equals a.
+# On a panel each date is scaled across tickers, ignoring missing values.
 # Useful for normalization.
 def scale(x, a=1):
+    if _is_panel(x):
+        frame = _as_frame(x)
+        return _like(x, a * frame.div(frame.abs().sum(axis=1), axis=0))
     return a * (x / np.sum(np.abs(x)))
 
 # Delta: Computes the difference between each element in array x and its value d days ago.
 # Useful for identifying changes over time.
 def delta(x, d):
-    return pd.Series(x).diff(d)
+    return _time_series(x, 'diff', d)
 
 # Signed Power: Raises each element in array x to the power of a.
 # Useful for amplifying the magnitude of elements.
@@ -54,9 +127,7 @@ def signedpower(x, a):
 # Decay Linear: Computes a weighted moving average on array x with a linearly decaying window of d days.
 # Useful for smoothing data.
 def decay_linear(x, d):
-    weights = np.arange(1, d+1)
-    weights = weights / np.sum(weights)
-    return pd.Series(x).rolling(window=d).apply(lambda x: np.sum(weights * x))
+    return _rolling_result(x, rolling_decay_linear, d)
 
 # Industry Neutralize (Placeholder): Neutralizes array x against a given industry or sector grouping g.
 # Useful for removing sector-specific influences from data.
@@ -67,39 +138,39 @@ def indneutralize(x, g):
 # Time-series Min: Finds the minimum value in array x over a rolling window of d days.
 # Useful for identifying low points in data.
 def ts_min(x, d):
-    return pd.Series(x).rolling(window=d).min()
+    return _rolling(x, d, 'min')
 
 # Time-series Max: Finds the maximum value in array x over a rolling window of d days.
 # Useful for identifying high points in data.
 def ts_max(x, d):
-    return pd.Series(x).rolling(window=d).max()
+    return _rolling(x, d, 'max')
 
 # Time-series Argmax: Finds the day on which the maximum value occurred in array x over a rolling window of d days.
 # Useful for identifying when high points in data occurred.
 def ts_argmax(x, d):
-    return pd.Series(x).rolling(window=d).apply(np.argmax)
+    return _rolling_result(x, rolling_argmax, d)
 
 # Time-series Argmin: Finds the day on which the minimum value occurred in array x over a rolling window of d days.
 # Useful for identifying when low points in data occurred.
 def ts_argmin(x, d):
-    return pd.Series(x).rolling(window=d).apply(np.argmin)
+    return _rolling_result(x, rolling_argmin, d)
 
 # Time-series Rank: Ranks each element in array x over a rolling window of d days.
 # Useful for comparing elements to their past values.
 def ts_rank(x, d):
-    return pd.Series(x).rolling(window=d).apply(lambda x: rank(x)[-1])
+    return _rolling_result(x, rolling_rank, d)
 
 # Time-series Sum: Computes the sum of elements in array x over a rolling window of d days.
 # Useful for aggregating data over time.
 def sum_ts(x, d):
-    return pd.Series(x).rolling(window=d).sum()
+    return _rolling(x, d, 'sum')
 
 # Time-series Product: Computes the product of elements in array x over a rolling window of d days.
 # Useful for compound growth calculations.
 def product(x, d):
-    return pd.Series(x).rolling(window=d).apply(np.prod)
+    return _rolling_result(x, rolling_product, d)
 
 # Time-series Standard Deviation: Computes the standard deviation of elements in array x over a rolling window of d days.
 # Useful for measuring volatility.
 def stddev(x, d):
-    return pd.Series(x).rolling(window=d).std()
+    return _rolling(x, d, 'std')
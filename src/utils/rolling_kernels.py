@@ -0,0 +1,84 @@
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+# Rolling Kernels
+#
+# NumPy implementations of the rolling operators that used to go through
+# pd.Series.rolling().apply() with a Python callback per window. Every kernel
+# works along axis 0, so a 1-D series and a 2-D (dates x tickers) panel are
+# handled by the same call. Semantics follow pandas' defaults: the first d-1
+# rows and any window containing a NaN come back as NaN.
+
+
+def _windows(x, d):
+    # Returns a float copy of x and a read-only view of shape (n-d+1, ..., d),
+    # or None for the view when the series is shorter than the window.
+    x = np.asarray(x, dtype=np.float64)
+    if d < 1:
+        raise ValueError(f"Window must be a positive integer, got {d}")
+    if x.shape[0] < d:
+        return x, None
+    return x, sliding_window_view(x, d, axis=0)
+
+
+def _finish(x, d, values, windows):
+    # Pads the first d-1 rows with NaN and masks windows that contain a NaN.
+    out = np.full(x.shape, np.nan)
+    if windows is None:
+        return out
+    values = np.where(np.isnan(windows).any(axis=-1), np.nan, values)
+    out[d - 1:] = values
+    return out
+
+
+# Rolling Argmax: Position (0 = oldest) of the maximum inside each window of d rows.
+def rolling_argmax(x, d):
+    x, windows = _windows(x, d)
+    if windows is None:
+        return _finish(x, d, None, None)
+    return _finish(x, d, windows.argmax(axis=-1).astype(np.float64), windows)
+
+
+# Rolling Argmin: Position (0 = oldest) of the minimum inside each window of d rows.
+def rolling_argmin(x, d):
+    x, windows = _windows(x, d)
+    if windows is None:
+        return _finish(x, d, None, None)
+    return _finish(x, d, windows.argmin(axis=-1).astype(np.float64), windows)
+
+
+# Rolling Rank: Percentile rank of the newest value inside each window of d rows.
+# Ties share the average rank, matching Series.rank(pct=True).
+def rolling_rank(x, d):
+    x, windows = _windows(x, d)
+    if windows is None:
+        return _finish(x, d, None, None)
+    last = windows[..., -1:]
+    below = (windows < last).sum(axis=-1)
+    equal = (windows == last).sum(axis=-1)
+    return _finish(x, d, (below + (equal + 1) / 2) / d, windows)
+
+
+# Rolling Product: Product of the values inside each window of d rows.
+# Multiplied directly rather than via exp(sum(log)), so zeros and negative
+# values keep their exact sign and magnitude.
+def rolling_product(x, d):
+    x, windows = _windows(x, d)
+    if windows is None:
+        return _finish(x, d, None, None)
+    return _finish(x, d, windows.prod(axis=-1), windows)
+
+
+# Rolling Decay Linear: Weighted average over d rows with weights d, d-1, ..., 1
+# (newest heaviest), normalised to sum to one.
+def rolling_decay_linear(x, d):
+    x, windows = _windows(x, d)
+    if windows is None:
+        return _finish(x, d, None, None)
+    weights = np.arange(1, d + 1) / np.sum(np.arange(1, d + 1))
+    if x.ndim == 1:
+        values = np.convolve(x, weights[::-1], mode="valid")
+    else:
+        with np.errstate(invalid="ignore"):
+            values = windows @ weights
+    return _finish(x, d, values, windows)
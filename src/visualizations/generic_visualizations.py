@@ -4,6 +4,8 @@ import numpy as np
 import pandas as pd
 import os
 
+from src.data_store.market_data_store import market_data_store
+
 
 def plot_strategy(data, portfolio, strategy_name='Strategy'):
     fig, (ax1, ax2) = plt.subplots(2, 1, figsize=(16, 9))
@@ -51,8 +53,7 @@ def get_indicators_for_stock(stock_ticker, exchange=None, should_print=False, sh
     try:
         # read data from csv
         if exchange:
-            path = f'../data/baseline_data/{exchange}/{stock_ticker}_baseline.csv'
-            data = pd.read_csv(path)
+            data = market_data_store.read_ticker(exchange, stock_ticker)
         else:
             path = f'../data/tick_data/{stock_ticker}.csv'
             data = pd.read_csv(path)
@@ -6,7 +6,14 @@ import os
 from dotenv import load_dotenv
 from src.websockets.json_logger import JSONFormatter
 from src.websockets.logger_adapter import LoggerAdapter
-from src.websockets.websocket_class.ws_amended import WebSocketClient
+from src.websockets.websocket_class.ws_amended import MAX_SYMBOLS, WebSocketClient
+from src.websockets.websocket_class.async_client import AsyncWebSocketClient
+from src.websockets.websocket_class.dispatch import QuoteDispatcher
+import math
+import queue
+import signal
+import threading
+import time
 
 
 name = 'EodHd_Websocket'
@@ -16,12 +23,24 @@ class EodHd_Websocket:
     load_dotenv()
 
     api_key = os.getenv("EOD_HD_API_KEY")
+    # Set to e.g. ws://127.0.0.1:8765 to run against the local replay server
+    ws_url = os.getenv("EODHD_WS_URL")
 
-    def __init__(self, handle_incoming_quote_for_position):
+    def __init__(self, handle_incoming_quote_for_position, on_minute_bar=None, dispatch_workers=0, conflate_quotes=False):
         self.websocket_crypto = None
         self.websocket_quotes = None
         self.handle_incoming_quote_for_position = handle_incoming_quote_for_position
-        self.on_minute_bar = None
+        self.on_minute_bar = on_minute_bar
+        # Quote callbacks run on this many consumer threads instead of the receive thread (0 = inline)
+        self.dispatch_workers = dispatch_workers
+        self.conflate_quotes = conflate_quotes
+        # Set while stream_quotes() runs
+        self._quote_stream = None
+
+    def _url(self, endpoint):
+        if not self.ws_url:
+            return None
+        return f"{self.ws_url.rstrip('/')}/{endpoint}?api_token={self.api_key}"
 
     def connect_crypto(self, crypto_pairs):
         if len(crypto_pairs) == 0:
@@ -30,6 +49,7 @@ class EodHd_Websocket:
         self.websocket_crypto = WebSocketClient(
             api_key=self.api_key,
             endpoint="crypto",
+            url=self._url("crypto"),
             symbols=crypto_pairs,
             store_data=True,
             display_stream=False,
@@ -48,9 +68,11 @@ class EodHd_Websocket:
         if len(stock_tickers) == 0:
             print('no stock tickers to connect to')
             return
-        self.websocket_quotes = WebSocketClient(
+        # Sharded over as many connections as the symbol count needs
+        self.websocket_quotes = WebSocketPool(
             api_key=self.api_key,
             endpoint="us-quote",
+            url=self._url("us-quote"),
             symbols=stock_tickers,
             store_data=True,
             display_stream=False,
@@ -58,6 +80,8 @@ class EodHd_Websocket:
             display_candle_5m=False,
             display_candle_1h=False,
             quote_callback=self.handle_incoming_quote_for_position,
+            dispatch_workers=self.dispatch_workers,
+            conflate_quotes=self.conflate_quotes,
         )
         try:
             print('in connect quotes', self.websocket_quotes.running)
@@ -73,6 +97,7 @@ class EodHd_Websocket:
         self.websocket_quotes = WebSocketClient(
             api_key=self.api_key,
             endpoint="us",
+            url=self._url("us"),
             symbols=stock_tickers,
             store_data=False,
             display_stream=False,
@@ -139,8 +164,74 @@ class EodHd_Websocket:
 
         # await self.handle_message()
 
-    def get_latest_quote_stock(self, ticker):
+    async def stream_quotes(self, stock_tickers):
+        """Stream quotes on the running event loop, one async connection per 50 symbols.
+
+        handle_incoming_quote_for_position is called for every quote. The
+        calls run on dispatcher threads (at least one), not on the event loop,
+        so a callback that blocks on a REST call does not stall the sockets or
+        anything else on the loop. Each symbol's quotes are still handled in
+        order. Runs until the task is cancelled, even with no symbols yet.
+        Connections reconnect and resubscribe on their own, and
+        subscribe_quotes() adds symbols while it runs.
+        """
+        self.async_quote_clients = []
+        self._quote_consumers = set()
+        self.quote_dispatcher = QuoteDispatcher(
+            self.handle_incoming_quote_for_position, max(1, self.dispatch_workers), conflate=self.conflate_quotes)
+        self.quote_dispatcher.start()
+        # Fails with the first consumer error; otherwise waits for cancellation
+        self._quote_stream = asyncio.get_running_loop().create_future()
+        try:
+            await self.subscribe_quotes(stock_tickers)
+            await self._quote_stream
+        finally:
+            self._quote_stream = None
+            for task in self._quote_consumers:
+                task.cancel()
+            for client in self.async_quote_clients:
+                await client.close()
+            self.quote_dispatcher.stop(drain=False)
 
+    async def subscribe_quotes(self, stock_tickers):
+        """Add symbols to the running stream_quotes, filling open connections before opening new ones."""
+        if self._quote_stream is None:
+            raise RuntimeError('stream_quotes is not running')
+        streamed = {symbol for client in self.async_quote_clients for symbol in client.symbols}
+        symbols = [symbol for symbol in dict.fromkeys(stock_tickers) if symbol not in streamed]
+        for client in self.async_quote_clients:
+            room = MAX_SYMBOLS - len(client.symbols)
+            if symbols and room > 0:
+                await client.subscribe(symbols[:room])
+                symbols = symbols[room:]
+        for index in range(0, len(symbols), MAX_SYMBOLS):
+            client = AsyncWebSocketClient(
+                self.api_key, "us-quote", symbols[index:index + MAX_SYMBOLS], url=self._url("us-quote"))
+            self.async_quote_clients.append(client)
+            task = asyncio.create_task(self._consume_quotes(client))
+            self._quote_consumers.add(task)
+            task.add_done_callback(self._quote_consumer_done)
+
+    async def _consume_quotes(self, client):
+        async for message in client:
+            symbol = message.get('s')
+            if symbol in client.most_recent_quote:
+                # Handled later on a dispatcher thread, so it gets a snapshot
+                self.quote_dispatcher.submit(symbol, client.most_recent_quote[symbol].copy())
+
+    def _quote_consumer_done(self, task):
+        self._quote_consumers.discard(task)
+        if not task.cancelled() and task.exception() is not None and self._quote_stream is not None \
+                and not self._quote_stream.done():
+            self._quote_stream.set_exception(task.exception())
+
+    def get_latest_quote_stock(self, ticker):
+        if self.websocket_quotes is None:
+            for client in getattr(self, 'async_quote_clients', []):
+                if ticker in client.most_recent_quote:
+                    return client.get_most_recent_quote(ticker)
+            # No quote yet for this ticker on any async connection
+            return None
         return self.websocket_quotes.get_most_recent_quote(ticker)
 
     def convert_dollar_values_to_qty(self, ticker, dollar_value):
@@ -168,3 +259,198 @@ class EodHd_Websocket:
         print('in get quote for stock', stock_ticker)
         all_data = self.websocket_quotes.get_data()
         # await self.handle_message()
+
+
+class WebSocketPool:
+    """Spreads a symbol list over as many WebSocketClients as the 50-symbol limit needs.
+
+    Every connection feeds the same quote_callback/candle_callback, and, with
+    merge_queue=True, one queue of (symbol, quote) pairs. Symbols can be added
+    and removed while running: they are (un)subscribed on the open connections
+    and rebalance() evens out the load. The pool has the WebSocketClient
+    methods the bots use, so it can stand in for a single client.
+
+    The pool, not its clients, handles SIGINT/SIGTERM and stops every
+    connection. The handler is installed when the pool is created on the main
+    thread, since signal handlers can only be set there.
+    """
+
+    def __init__(
+        self,
+        api_key,
+        endpoint,
+        symbols,
+        quote_callback=None,
+        candle_callback=None,
+        max_symbols_per_connection=MAX_SYMBOLS,
+        merge_queue=False,
+        queue_size=0,
+        **client_kwargs,
+    ):
+        if len(symbols) == 0:
+            raise ValueError("No symbol(s) provided")
+        if not 0 < max_symbols_per_connection <= MAX_SYMBOLS:
+            raise ValueError(f"Symbols per connection must be between 1 and {MAX_SYMBOLS}")
+        self.api_key = api_key
+        self.endpoint = endpoint
+        self.quote_callback = quote_callback
+        self.candle_callback = candle_callback
+        self.max_symbols_per_connection = max_symbols_per_connection
+        self.client_kwargs = client_kwargs
+        self.queue = queue.Queue(queue_size) if merge_queue else None
+
+        self.clients = []
+        self.started = False
+        self._lock = threading.RLock()
+        self._rates = {}
+        self._started_at = time.monotonic()
+
+        symbols = list(dict.fromkeys(symbols))
+        connections = math.ceil(len(symbols) / max_symbols_per_connection)
+        for index in range(connections):
+            # Interleave so every connection starts with an even share
+            self.clients.append(self._new_client(symbols[index::connections]))
+
+        if threading.current_thread() is threading.main_thread():
+            signal.signal(signal.SIGINT, self._signal_handler)
+            signal.signal(signal.SIGTERM, self._signal_handler)
+
+    def _signal_handler(self, signum, frame):
+        print("Stopping websocket pool...")
+        for client in self.clients:
+            client.running = False
+        self.stop()
+        print("Websocket pool stopped.")
+
+    @property
+    def running(self):
+        return any(client.running for client in self.clients)
+
+    @property
+    def symbols(self):
+        return [symbol for client in self.clients for symbol in client.symbols]
+
+    def _on_quote(self, symbol, quote):
+        if self.quote_callback:
+            self.quote_callback(symbol, quote)
+        if self.queue is not None:
+            try:
+                self.queue.put_nowait((symbol, quote))
+            except queue.Full:
+                pass
+
+    def _new_client(self, symbols):
+        client = WebSocketClient(
+            api_key=self.api_key,
+            endpoint=self.endpoint,
+            symbols=symbols,
+            quote_callback=self._on_quote,
+            candle_callback=self.candle_callback,
+            install_signal_handlers=False,
+            **self.client_kwargs,
+        )
+        if self.started:
+            client.start()
+        return client
+
+    def _client_for(self, symbol):
+        for client in self.clients:
+            if symbol in client.symbols:
+                return client
+        return None
+
+    def start(self):
+        with self._lock:
+            self.started = True
+            self._started_at = time.monotonic()
+            for client in self.clients:
+                client.start()
+
+    def stop(self):
+        with self._lock:
+            if not self.started:
+                return
+            self.started = False
+            for client in self.clients:
+                client.stop()
+
+    def add_symbols(self, symbols):
+        """Subscribe new symbols on the least loaded connections, opening more if needed."""
+
+        with self._lock:
+            for symbol in symbols:
+                if self._client_for(symbol) is not None:
+                    continue
+                client = min(self.clients, key=lambda client: len(client.symbols), default=None)
+                if client is None or len(client.symbols) >= self.max_symbols_per_connection:
+                    self.clients.append(self._new_client([symbol]))
+                else:
+                    client.subscribe([symbol])
+
+    def remove_symbols(self, symbols):
+        with self._lock:
+            for symbol in symbols:
+                client = self._client_for(symbol)
+                if client is not None:
+                    client.unsubscribe([symbol])
+            self.rebalance()
+
+    def rebalance(self):
+        """Close connections that are no longer needed and even out symbols per connection."""
+
+        with self._lock:
+            for client in [client for client in self.clients if not client.symbols]:
+                if self.started:
+                    client.stop()
+                self.clients.remove(client)
+
+            total = sum(len(client.symbols) for client in self.clients)
+            needed = max(math.ceil(total / self.max_symbols_per_connection), 1)
+            # Fold the smallest connections into the others when fewer will do
+            while len(self.clients) > needed:
+                smallest = min(self.clients, key=lambda client: len(client.symbols))
+                moved = smallest.symbols
+                smallest.unsubscribe(moved)
+                if self.started:
+                    smallest.stop()
+                self.clients.remove(smallest)
+                for symbol in moved:
+                    min(self.clients, key=lambda client: len(client.symbols)).subscribe([symbol])
+
+            # Move symbols from the fullest to the emptiest until they differ by at most one
+            while self.clients:
+                fullest = max(self.clients, key=lambda client: len(client.symbols))
+                emptiest = min(self.clients, key=lambda client: len(client.symbols))
+                if len(fullest.symbols) - len(emptiest.symbols) <= 1:
+                    break
+                symbol = fullest.symbols[-1]
+                fullest.unsubscribe([symbol])
+                emptiest.subscribe([symbol])
+
+    def message_rates(self):
+        """Messages per second on each connection since the previous call (or the start)."""
+
+        now = time.monotonic()
+        rates = []
+        for index, client in enumerate(self.clients):
+            last_time, last_count = self._rates.get(id(client), (self._started_at, 0))
+            elapsed = now - last_time
+            rates.append(
+                {
+                    "connection": index,
+                    "symbols": len(client.symbols),
+                    "messages": client.message_count,
+                    "rate": (client.message_count - last_count) / elapsed if elapsed > 0 else 0.0,
+                }
+            )
+            self._rates[id(client)] = (now, client.message_count)
+        return rates
+
+    def get_data(self):
+        return [message for client in self.clients for message in client.get_data()]
+
+    def get_most_recent_quote(self, stock_ticker):
+        client = self._client_for(stock_ticker)
+        if client is None:
+            raise KeyError(stock_ticker)
+        return client.get_most_recent_quote(stock_ticker)
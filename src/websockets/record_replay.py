@@ -0,0 +1,220 @@
+import argparse
+import asyncio
+import json
+import logging
+import os
+import struct
+import threading
+import time
+
+from src.websockets.websocket_class.messages import decode
+
+logger = logging.getLogger(__name__)
+
+# Record and Replay
+#
+# MessageRecorder appends every raw websocket message with its receive time to
+# a compact binary log. The log starts with a magic header. Each record is a
+# little-endian int64 receive time in nanoseconds, a uint32 payload length, and
+# the UTF-8 payload. ReplayServer is a local stand-in for the EODHD websocket
+# that serves a log back at real-time, accelerated (speed > 1) or maximum speed
+# (speed=None). Clients subscribe as they would with EODHD and receive only their
+# symbols; a client with no symbols subscribed receives nothing. After the last
+# message the connection stays open and idle until the client closes it, so a
+# client that reconnects on close does not replay the log again. Point
+# WebSocketClient/AsyncWebSocketClient at it with url=..., or point the bots at
+# it by setting EODHD_WS_URL.
+
+_MAGIC = b"EQRLOG1\n"
+_RECORD = struct.Struct("<qI")
+
+
+class MessageRecorder:
+    """Thread-safe append-only writer for the binary message log."""
+
+    def __init__(self, path: str):
+        self.path = path
+        is_new = not os.path.exists(path) or os.path.getsize(path) == 0
+        self._file = open(path, "ab")
+        if is_new:
+            self._file.write(_MAGIC)
+        self._lock = threading.Lock()
+        self.count = 0
+
+    def record(self, message, timestamp_ns: int | None = None) -> None:
+        payload = message.encode() if isinstance(message, str) else bytes(message)
+        timestamp_ns = time.time_ns() if timestamp_ns is None else timestamp_ns
+        with self._lock:
+            self._file.write(_RECORD.pack(timestamp_ns, len(payload)))
+            self._file.write(payload)
+            self.count += 1
+
+    def flush(self) -> None:
+        with self._lock:
+            self._file.flush()
+
+    def close(self) -> None:
+        with self._lock:
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def read_log(path: str):
+    """Yield (timestamp_ns, payload bytes) for every message in a log."""
+
+    with open(path, "rb") as f:
+        if f.read(len(_MAGIC)) != _MAGIC:
+            raise ValueError(f"{path} is not a message log")
+        while True:
+            header = f.read(_RECORD.size)
+            if len(header) < _RECORD.size:
+                return
+            timestamp_ns, length = _RECORD.unpack(header)
+            payload = f.read(length)
+            if len(payload) < length:
+                # Truncated tail from an interrupted recording
+                return
+            yield timestamp_ns, payload
+
+
+def _symbols(action_message) -> set:
+    return {symbol for symbol in action_message.get("symbols", "").split(",") if symbol}
+
+
+class ReplayServer:
+    def __init__(self, path: str, speed: float | None = 1.0, host: str = "127.0.0.1", port: int = 8765):
+        if speed is not None and speed <= 0:
+            raise ValueError(f"Speed must be positive or None for maximum speed, got {speed}")
+        self.path = path
+        self.speed = speed
+        self.host = host
+        self.port = port
+        self.sent = 0
+        self._server = None
+
+    @property
+    def url(self) -> str:
+        return f"ws://{self.host}:{self.port}"
+
+    async def _listen(self, ws, subscribed: set) -> None:
+        # Later subscribe/unsubscribe actions change what this client receives
+        async for raw in ws:
+            action = json.loads(raw)
+            if action.get("action") == "subscribe":
+                subscribed.update(_symbols(action))
+            elif action.get("action") == "unsubscribe":
+                subscribed.difference_update(_symbols(action))
+
+    async def _serve(self, ws) -> None:
+        import websockets
+
+        action = json.loads(await ws.recv())
+        subscribed = _symbols(action) if action.get("action") == "subscribe" else set()
+        listener = asyncio.create_task(self._listen(ws, subscribed))
+        loop = asyncio.get_running_loop()
+        try:
+            first = None
+            started = loop.time()
+            for timestamp_ns, payload in read_log(self.path):
+                message = decode(payload)
+                # Nothing is sent until the client subscribes, or after it unsubscribes from everything
+                if message.get("s") not in subscribed:
+                    continue
+                if self.speed is not None:
+                    first = timestamp_ns if first is None else first
+                    wait = started + (timestamp_ns - first) / 1e9 / self.speed - loop.time()
+                    if wait > 0:
+                        await asyncio.sleep(wait)
+                await ws.send(payload.decode())
+                self.sent += 1
+            # Closing here would make a reconnecting client start the log over,
+            # so stay connected and idle until the client leaves
+            await listener
+        except websockets.ConnectionClosed:
+            pass
+        finally:
+            listener.cancel()
+
+    async def start(self):
+        import websockets
+
+        self._server = await websockets.serve(self._serve, self.host, self.port)
+        # Port 0 picks a free port; report the real one
+        self.port = self._server.sockets[0].getsockname()[1]
+        logger.info("Replaying %s on %s at %s", self.path, self.url, self.speed or "max speed")
+        return self
+
+    async def stop(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def serve_forever(self):
+        await self.start()
+        try:
+            await asyncio.Future()
+        finally:
+            await self.stop()
+
+
+async def record_stream(api_key: str, endpoint: str, symbols: list, path: str, duration: float | None = None) -> int:
+    """Record a live EODHD stream to ``path`` for ``duration`` seconds (or until cancelled)."""
+
+    from src.websockets.websocket_class.async_client import AsyncWebSocketClient
+
+    client = AsyncWebSocketClient(api_key, endpoint, symbols)
+    with MessageRecorder(path) as recorder:
+        client.recorder = recorder
+        try:
+            await asyncio.wait_for(_drain(client), duration)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            await client.close()
+        return recorder.count
+
+
+async def _drain(client) -> None:
+    async for _ in client:
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Record or replay EODHD websocket streams")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    record = commands.add_parser("record")
+    record.add_argument("path")
+    record.add_argument("symbols", help="Comma separated symbols")
+    record.add_argument("--endpoint", default="us-quote")
+    record.add_argument("--duration", type=float, default=None)
+
+    replay = commands.add_parser("replay")
+    replay.add_argument("path")
+    replay.add_argument("--speed", type=float, default=1.0, help="Playback speed, 0 for maximum speed")
+    replay.add_argument("--host", default="127.0.0.1")
+    replay.add_argument("--port", type=int, default=8765)
+
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    if args.command == "record":
+        from dotenv import load_dotenv
+
+        load_dotenv()
+        count = asyncio.run(
+            record_stream(os.getenv("EOD_HD_API_KEY"), args.endpoint, args.symbols.split(","), args.path, args.duration)
+        )
+        print(f"Recorded {count} messages to {args.path}")
+    else:
+        server = ReplayServer(args.path, args.speed or None, args.host, args.port)
+        asyncio.run(server.serve_forever())
+
+
+if __name__ == "__main__":
+    main()
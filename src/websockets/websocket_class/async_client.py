@@ -0,0 +1,147 @@
+import asyncio
+import json
+import logging
+
+import websockets
+
+from src.websockets.websocket_class.messages import Quote, decode
+from src.websockets.websocket_class.ws_amended import MAX_SYMBOLS, WebSocketClient
+
+logger = logging.getLogger(__name__)
+
+# Asyncio EODHD Client
+#
+# Single-connection EODHD stream that runs on the caller's event loop instead of
+# in collector and keepalive threads. Iterating over the client yields every
+# parsed message:
+#
+#     async for message in AsyncWebSocketClient(api_key, "us-quote", symbols):
+#         ...
+#
+# The websockets library sends pings and closes connections whose pongs stop
+# arriving. A closed or failed connection is reopened with exponential backoff,
+# and the current symbol list is subscribed again. Cancelling the consuming
+# task, or calling close(), shuts the connection down cleanly.
+
+
+class AsyncWebSocketClient:
+    def __init__(
+        self,
+        api_key: str,
+        endpoint: str,
+        symbols: list,
+        url: str | None = None,
+        ping_interval: float = 20,
+        ping_timeout: float = 20,
+        reconnect_delay: float = 1.0,
+        max_reconnect_delay: float = 30.0,
+        recorder=None,
+    ) -> None:
+        if endpoint not in ["us", "us-quote", "forex", "crypto"]:
+            raise ValueError("Endpoint is invalid")
+        if len(symbols) == 0:
+            raise ValueError("No symbol(s) provided")
+        WebSocketClient._validate_symbols(symbols)
+        if len(symbols) > MAX_SYMBOLS:
+            raise ValueError("Max symbol subscription count is 50!")
+
+        self._endpoint = endpoint
+        self._symbols = list(symbols)
+        # url lets the client point at a local stand-in such as the replay server
+        self.url = url or f"wss://ws.eodhistoricaldata.com/ws/{endpoint}?api_token={api_key}"
+        self.ping_interval = ping_interval
+        self.ping_timeout = ping_timeout
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+        # Optional MessageRecorder that logs every raw message
+        self.recorder = recorder
+
+        self.ws = None
+        self.closed = False
+        self.message_count = 0
+        self.reconnects = 0
+        self.most_recent_quote = {}
+
+    @property
+    def symbols(self):
+        return list(self._symbols)
+
+    async def _send_action(self, action, symbols):
+        if self.ws is not None:
+            await self.ws.send(json.dumps({"action": action, "symbols": ",".join(symbols)}))
+
+    async def subscribe(self, symbols):
+        symbols = [symbol for symbol in symbols if symbol not in self._symbols]
+        WebSocketClient._validate_symbols(symbols)
+        if len(self._symbols) + len(symbols) > MAX_SYMBOLS:
+            raise ValueError("Max symbol subscription count is 50!")
+        if symbols:
+            self._symbols.extend(symbols)
+            await self._send_action("subscribe", symbols)
+
+    async def unsubscribe(self, symbols):
+        symbols = [symbol for symbol in symbols if symbol in self._symbols]
+        if symbols:
+            self._symbols = [symbol for symbol in self._symbols if symbol not in symbols]
+            for symbol in symbols:
+                self.most_recent_quote.pop(symbol, None)
+            await self._send_action("unsubscribe", symbols)
+
+    def _record(self, message):
+        # Keep the latest quote per symbol, as WebSocketClient does
+        if self._endpoint == "us-quote" and "message" not in message and "s" in message:
+            quote = self.most_recent_quote.get(message["s"])
+            if quote is None:
+                quote = self.most_recent_quote[message["s"]] = Quote()
+            quote.update(message)
+
+    async def messages(self):
+        """Parsed messages, across reconnects, until close() or cancellation."""
+
+        delay = self.reconnect_delay
+        while not self.closed:
+            try:
+                async with websockets.connect(
+                    self.url, ping_interval=self.ping_interval, ping_timeout=self.ping_timeout
+                ) as ws:
+                    self.ws = ws
+                    await self._send_action("subscribe", self._symbols)
+                    async for raw in ws:
+                        # Back off again from the start only once data is flowing
+                        delay = self.reconnect_delay
+                        self.message_count += 1
+                        if self.recorder is not None:
+                            self.recorder.record(raw)
+                        message = decode(raw)
+                        self._record(message)
+                        yield message
+            # WebSocketException also covers a rejected handshake, e.g. a 429 or 5xx from the server
+            except (websockets.WebSocketException, OSError, asyncio.TimeoutError) as exc:
+                if self.closed:
+                    break
+                logger.warning("EODHD %s connection lost (%s), reconnecting in %.1fs", self._endpoint, exc, delay)
+            finally:
+                self.ws = None
+            if self.closed:
+                break
+            # The server closed the stream cleanly or the connection failed: back off and resubscribe
+            self.reconnects += 1
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, self.max_reconnect_delay)
+
+    def __aiter__(self):
+        return self.messages()
+
+    async def close(self):
+        self.closed = True
+        if self.ws is not None:
+            await self.ws.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    def get_most_recent_quote(self, stock_ticker):
+        return self.most_recent_quote[stock_ticker].copy()
@@ -0,0 +1,147 @@
+import numpy as np
+
+# Candle Aggregator
+#
+# Builds OHLCV candles from trade ticks for any number of symbols and intervals
+# at once. State lives in preallocated (symbol x interval) arrays indexed by a
+# symbol id. Each tick updates every interval of its symbol with a handful of
+# vectorised operations, so the per-message cost does not grow with the number
+# of symbols and barely with the number of intervals.
+
+_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+_NAMES = {
+    "1 minute": 60,
+    "5 minutes": 300,
+    "1 hour": 3600,
+}
+
+
+def interval_seconds(interval) -> int:
+    """Seconds in an interval given as seconds, "1m"/"5m"/"1h" or the old "1 minute" names."""
+
+    if isinstance(interval, (int, np.integer)):
+        seconds = int(interval)
+    elif interval in _NAMES:
+        seconds = _NAMES[interval]
+    elif isinstance(interval, str) and interval[:-1].isdigit() and interval[-1] in _UNITS:
+        seconds = int(interval[:-1]) * _UNITS[interval[-1]]
+    else:
+        raise ValueError(f"Unsupported interval: {interval}")
+    if seconds <= 0:
+        raise ValueError(f"Unsupported interval: {interval}")
+    return seconds
+
+
+class CandleAggregator:
+    def __init__(self, symbols: list, intervals: list, callback=None, capacity: int | None = None):
+        if len(intervals) == 0:
+            raise ValueError("No interval(s) provided")
+        self.intervals = np.array([interval_seconds(interval) for interval in intervals], dtype=np.int64)
+        self._interval_ms = self.intervals * 1000
+        self.callback = callback
+
+        self.symbols = []
+        self.symbol_ids = {}
+        size = max(capacity or 0, len(symbols), 1)
+        shape = (size, len(self.intervals))
+        self.start = np.full(shape, -1, dtype=np.int64)
+        self.open = np.zeros(shape)
+        self.high = np.zeros(shape)
+        self.low = np.zeros(shape)
+        self.close = np.zeros(shape)
+        self.volume = np.zeros(shape)
+        for symbol in symbols:
+            self.add_symbol(symbol)
+
+    def add_symbol(self, symbol: str) -> int:
+        if symbol in self.symbol_ids:
+            return self.symbol_ids[symbol]
+        symbol_id = len(self.symbols)
+        if symbol_id == self.start.shape[0]:
+            self._grow(2 * symbol_id)
+        self.symbols.append(symbol)
+        self.symbol_ids[symbol] = symbol_id
+        return symbol_id
+
+    def _grow(self, size: int) -> None:
+        extra = size - self.start.shape[0]
+        self.start = np.vstack([self.start, np.full((extra, len(self.intervals)), -1, dtype=np.int64)])
+        for name in ("open", "high", "low", "close", "volume"):
+            array = getattr(self, name)
+            setattr(self, name, np.vstack([array, np.zeros((extra, len(self.intervals)))]))
+
+    def _candle(self, symbol_id: int, column: int) -> dict:
+        # Same keys as the candles the websocket client used to print.
+        return {
+            "t": int(self.start[symbol_id, column]),
+            "m": self.symbols[symbol_id],
+            "g": int(self.intervals[column]),
+            "o": float(self.open[symbol_id, column]),
+            "h": float(self.high[symbol_id, column]),
+            "l": float(self.low[symbol_id, column]),
+            "c": float(self.close[symbol_id, column]),
+            "v": float(self.volume[symbol_id, column]),
+        }
+
+    def _emit(self, candle: dict) -> None:
+        if self.callback:
+            self.callback(candle)
+
+    def update(self, symbol: str, timestamp_ms: int, price: float, volume: float = 0.0) -> list:
+        """Add one trade; returns the candles it completed (also passed to the callback)."""
+
+        symbol_id = self.symbol_ids.get(symbol)
+        if symbol_id is None:
+            symbol_id = self.add_symbol(symbol)
+
+        buckets = timestamp_ms - timestamp_ms % self._interval_ms
+        start = self.start[symbol_id]
+        if np.array_equal(buckets, start):
+            # Common case: the tick lands in the forming candle of every interval.
+            high, low = self.high[symbol_id], self.low[symbol_id]
+            np.maximum(high, price, out=high)
+            np.minimum(low, price, out=low)
+            self.close[symbol_id] = price
+            self.volume[symbol_id] += volume
+            return []
+
+        completed = []
+        # A tick in a later bucket closes the open candle of that interval; a
+        # late tick for an already closed bucket is ignored for that interval.
+        fresh = buckets > start
+        rolled = fresh & (start >= 0)
+        if rolled.any():
+            for column in np.flatnonzero(rolled):
+                completed.append(self._candle(symbol_id, column))
+
+        if fresh.all():
+            self.open[symbol_id] = price
+            self.high[symbol_id] = price
+            self.low[symbol_id] = price
+            self.close[symbol_id] = price
+            self.volume[symbol_id] = volume
+        else:
+            same = buckets == start
+            self.open[symbol_id, fresh] = price
+            self.high[symbol_id, fresh | same] = np.where(fresh, price, np.maximum(self.high[symbol_id], price))[fresh | same]
+            self.low[symbol_id, fresh | same] = np.where(fresh, price, np.minimum(self.low[symbol_id], price))[fresh | same]
+            self.close[symbol_id, fresh | same] = price
+            self.volume[symbol_id, fresh] = volume
+            self.volume[symbol_id, same] += volume
+        np.maximum(start, buckets, out=start)
+
+        for candle in completed:
+            self._emit(candle)
+        return completed
+
+    def flush(self) -> list:
+        """Emit every candle still forming, e.g. when the stream stops."""
+
+        completed = [
+            self._candle(symbol_id, column)
+            for symbol_id, column in zip(*np.nonzero(self.start[: len(self.symbols)] >= 0))
+        ]
+        self.start[:] = -1
+        for candle in completed:
+            self._emit(candle)
+        return completed
@@ -0,0 +1,159 @@
+import threading
+import time
+import traceback
+from collections import OrderedDict, deque
+
+# Quote Dispatch
+#
+# Moves callbacks off the websocket receive thread. The receive loop only
+# submits (symbol, payload) pairs; consumer threads run the callback. Each
+# symbol is pinned to one consumer, so a symbol's callbacks never run
+# concurrently or out of order, while different symbols run in parallel.
+#
+# Every consumer reads from a bounded ring buffer. When it is full the oldest
+# entry is dropped. With conflation on, the buffer keeps only the latest
+# payload per symbol, so a slow callback always sees the newest quote instead
+# of working through a backlog of stale ones.
+
+
+class RingBuffer:
+    """Bounded FIFO of (symbol, payload); drops the oldest entry when full."""
+
+    def __init__(self, capacity: int, conflate: bool = False):
+        if capacity < 1:
+            raise ValueError(f"Capacity must be at least 1, got {capacity}")
+        self.capacity = capacity
+        self.conflate = conflate
+        self._items = OrderedDict() if conflate else deque()
+        self._condition = threading.Condition()
+        self.enqueued = 0
+        self.dropped = 0
+        self.conflated = 0
+        self.high_water = 0
+        # Updated only by the buffer's single consumer
+        self.dispatched = 0
+        self.errors = 0
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def put(self, symbol, payload) -> None:
+        with self._condition:
+            if self.conflate and symbol in self._items:
+                # Replace the pending payload but keep the symbol's place in line.
+                self._items[symbol] = payload
+                self.conflated += 1
+            else:
+                if len(self._items) >= self.capacity:
+                    if self.conflate:
+                        self._items.popitem(last=False)
+                    else:
+                        self._items.popleft()
+                    self.dropped += 1
+                if self.conflate:
+                    self._items[symbol] = payload
+                else:
+                    self._items.append((symbol, payload))
+            self.enqueued += 1
+            self.high_water = max(self.high_water, len(self._items))
+            self._condition.notify()
+
+    def clear(self) -> None:
+        with self._condition:
+            self._items.clear()
+
+    def get(self, timeout: float | None = None):
+        """Next (symbol, payload), or None if nothing arrived within ``timeout``."""
+
+        with self._condition:
+            if not self._items and not self._condition.wait_for(lambda: len(self._items) > 0, timeout):
+                return None
+            if self.conflate:
+                return self._items.popitem(last=False)
+            return self._items.popleft()
+
+
+class QuoteDispatcher:
+    def __init__(self, callback, workers: int = 1, capacity: int = 1024, conflate: bool = False):
+        if workers < 1:
+            raise ValueError(f"Need at least one worker, got {workers}")
+        self.callback = callback
+        self.buffers = [RingBuffer(capacity, conflate) for _ in range(workers)]
+        self._symbol_worker = {}
+        self._threads = []
+        self._stop_event = threading.Event()
+        self._started = time.monotonic()
+
+    def _buffer_for(self, symbol) -> RingBuffer:
+        worker = self._symbol_worker.get(symbol)
+        if worker is None:
+            # Round-robin assignment on first sight keeps symbols evenly spread.
+            worker = self._symbol_worker[symbol] = len(self._symbol_worker) % len(self.buffers)
+        return self.buffers[worker]
+
+    def submit(self, symbol, payload) -> None:
+        """Called on the receive thread; never blocks on the callback."""
+
+        self._buffer_for(symbol).put(symbol, payload)
+
+    def _consume(self, buffer: RingBuffer) -> None:
+        while not self._stop_event.is_set() or len(buffer):
+            item = buffer.get(timeout=0.1)
+            if item is None:
+                continue
+            try:
+                self.callback(*item)
+            except Exception:
+                buffer.errors += 1
+                print(f"Error in quote callback for {item[0]}:")
+                traceback.print_exc()
+            buffer.dispatched += 1
+
+    def start(self) -> None:
+        self._stop_event.clear()
+        self._started = time.monotonic()
+        self._threads = [
+            threading.Thread(target=self._consume, args=(buffer,), daemon=True, name=f"quote-dispatch-{index}")
+            for index, buffer in enumerate(self.buffers)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self, drain: bool = True) -> None:
+        """Stop the consumers, by default after they have emptied their buffers."""
+
+        if not drain:
+            for buffer in self.buffers:
+                buffer.clear()
+        self._stop_event.set()
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+
+    def metrics(self) -> dict:
+        """Queue depth and throughput counters, overall and per worker."""
+
+        elapsed = max(time.monotonic() - self._started, 1e-9)
+        per_worker = [
+            {
+                "depth": len(buffer),
+                "high_water": buffer.high_water,
+                "enqueued": buffer.enqueued,
+                "dropped": buffer.dropped,
+                "conflated": buffer.conflated,
+                "dispatched": buffer.dispatched,
+                "errors": buffer.errors,
+            }
+            for buffer in self.buffers
+        ]
+        return {
+            "depth": sum(worker["depth"] for worker in per_worker),
+            "high_water": max(worker["high_water"] for worker in per_worker),
+            "enqueued": sum(worker["enqueued"] for worker in per_worker),
+            "dropped": sum(worker["dropped"] for worker in per_worker),
+            "conflated": sum(worker["conflated"] for worker in per_worker),
+            "dispatched": sum(worker["dispatched"] for worker in per_worker),
+            "errors": sum(worker["errors"] for worker in per_worker),
+            "dispatch_rate": sum(worker["dispatched"] for worker in per_worker) / elapsed,
+            "workers": per_worker,
+        }
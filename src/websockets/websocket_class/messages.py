@@ -0,0 +1,76 @@
+import json
+
+# Stream Messages
+#
+# decode() parses a raw websocket frame with the fastest JSON library that is
+# installed: orjson, then msgspec, then the stdlib json module. Quote is the
+# per-symbol record of the latest quote. It is updated in place for every
+# message, so the receive loop does not build a new dict per quote. It still
+# reads like the old dict (quote['ask_price'], .get(), .keys()).
+
+try:
+    import orjson
+
+    decode = orjson.loads
+    DECODER = "orjson"
+except ImportError:
+    try:
+        import msgspec
+
+        decode = msgspec.json.Decoder().decode
+        DECODER = "msgspec"
+    except ImportError:
+        decode = json.loads
+        DECODER = "json"
+
+
+class Quote:
+    __slots__ = ("ask_price", "bid_price", "timestamp", "ask_size", "bid_size")
+
+    def __init__(self, ask_price=None, bid_price=None, timestamp=None, ask_size=None, bid_size=None):
+        self.ask_price = ask_price
+        self.bid_price = bid_price
+        self.timestamp = timestamp
+        self.ask_size = ask_size
+        self.bid_size = bid_size
+
+    def update(self, message) -> "Quote":
+        """Overwrite the fields from a us-quote message (ap, bp, t, as, bs)."""
+
+        self.ask_price = message["ap"]
+        self.bid_price = message["bp"]
+        self.timestamp = message["t"]
+        self.ask_size = message["as"]
+        self.bid_size = message["bs"]
+        return self
+
+    def copy(self) -> "Quote":
+        return Quote(self.ask_price, self.bid_price, self.timestamp, self.ask_size, self.bid_size)
+
+    def __getitem__(self, key):
+        if key not in self.__slots__:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __contains__(self, key) -> bool:
+        return key in self.__slots__
+
+    def get(self, key, default=None):
+        return getattr(self, key) if key in self.__slots__ else default
+
+    def keys(self):
+        return self.__slots__
+
+    def items(self):
+        return [(key, getattr(self, key)) for key in self.__slots__]
+
+    def to_dict(self) -> dict:
+        return dict(self.items())
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, Quote):
+            other = other.to_dict()
+        return self.to_dict() == other
+
+    def __repr__(self) -> str:
+        return repr(self.to_dict())
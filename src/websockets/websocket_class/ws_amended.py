@@ -6,8 +6,15 @@ import json
 import re
 import pandas as pd
 
+from src.websockets.websocket_class.candle_aggregator import CandleAggregator, interval_seconds
+from src.websockets.websocket_class.dispatch import QuoteDispatcher
+from src.websockets.websocket_class.messages import Quote, decode
+
 pd.set_option('display.float_format', '{:.8f}'.format)
 
+# EODHD accepts at most 50 symbols per connection
+MAX_SYMBOLS = 50
+
 
 class WebSocketClient:
     def __init__(
@@ -22,6 +29,13 @@ class WebSocketClient:
         display_candle_1h: bool = False,
         quote_callback=None,
         candle_callback=None,
+        candle_intervals: list | None = None,
+        dispatch_workers: int = 0,
+        dispatch_queue_size: int = 1024,
+        conflate_quotes: bool = False,
+        url: str | None = None,
+        recorder=None,
+        install_signal_handlers: bool = True,
     ) -> None:
         # Validate API key
         prog = re.compile(r"^[A-z0-9.]{16,32}$")
@@ -36,20 +50,20 @@ class WebSocketClient:
         if len(symbols) == 0:
             raise ValueError("No symbol(s) provided")
 
-        # Validate individual symbols
-        prog = re.compile(r"^[A-z0-9-$]{1,48}$")
-        for symbol in symbols:
-            if not prog.match(symbol):
-                raise ValueError(f"Symbol is invalid: {symbol}")
+        self._validate_symbols(symbols)
 
         # Validate max symbol subscriptions
-        if len(symbols) > 50:
+        if len(symbols) > MAX_SYMBOLS:
             raise ValueError("Max symbol subscription count is 50!")
 
         # Map class arguments to private variables
         self._api_key = api_key
         self._endpoint = endpoint
-        self._symbols = symbols
+        # url overrides the EODHD address, e.g. to point at a local replay server
+        self._url = url or f"wss://ws.eodhistoricaldata.com/ws/{endpoint}?api_token={api_key}"
+        # Optional MessageRecorder that logs every raw message
+        self.recorder = recorder
+        self._symbols = list(symbols)
         self._store_data = store_data
         self._display_stream = display_stream
         self._display_candle_1m = display_candle_1m
@@ -58,16 +72,47 @@ class WebSocketClient:
         self.quote_callback = quote_callback
         self.candle_callback = candle_callback
 
+        # Candle intervals: explicit list, or the ones switched on by the display flags
+        if candle_intervals is None:
+            candle_intervals = [
+                interval
+                for interval, enabled in (
+                    ("1m", display_candle_1m),
+                    ("5m", display_candle_5m),
+                    ("1h", display_candle_1h),
+                )
+                if enabled
+            ]
+        self.candles = None
+        if candle_intervals:
+            self.candles = CandleAggregator(symbols, candle_intervals, self._on_candle)
+
+        # With dispatch workers, quote_callback runs on consumer threads fed by a
+        # bounded buffer, so a slow callback cannot stall the receive loop
+        self.dispatcher = None
+        if dispatch_workers > 0 and quote_callback:
+            self.dispatcher = QuoteDispatcher(quote_callback, dispatch_workers, dispatch_queue_size, conflate_quotes)
+
         self.running = True
         self.message = None
         self.stop_event = threading.Event()
         self.data_list = []
         self.ws = None
         self.most_recent_quote = {}
+        self.message_count = 0
+
+        # Register signal handlers; a WebSocketPool turns this off and stops all its clients itself
+        if install_signal_handlers:
+            signal.signal(signal.SIGINT, self._signal_handler)
+            signal.signal(signal.SIGTERM, self._signal_handler)
 
-        # Register signal handlers
-        signal.signal(signal.SIGINT, self._signal_handler)
-        signal.signal(signal.SIGTERM, self._signal_handler)
+    @staticmethod
+    def _validate_symbols(symbols):
+        # Validate individual symbols
+        prog = re.compile(r"^[A-z0-9-$]{1,48}$")
+        for symbol in symbols:
+            if not prog.match(symbol):
+                raise ValueError(f"Symbol is invalid: {symbol}")
 
     def _signal_handler(self, signum, frame):
         print("Stopping websocket...")
@@ -77,34 +122,18 @@ class WebSocketClient:
         print("Websocket stopped.")
 
     def _floor_to_nearest_interval(self, timestamp_ms, interval):
-        # Convert to seconds
-        timestamp_s = timestamp_ms // 1000
-
-        # Define the number of seconds for each interval
-        seconds_per_minute = 60
-        seconds_per_hour = seconds_per_minute * 60
-
-        # Determine the number of seconds for the given interval
-        if interval == "1 minute":
-            interval_seconds = seconds_per_minute
-        elif interval == "5 minutes":
-            interval_seconds = 5 * seconds_per_minute
-        elif interval == "1 hour":
-            interval_seconds = seconds_per_hour
-        else:
-            raise ValueError(f"Unsupported interval: {interval}")
-
-        # Floor to the nearest interval
-        floored_s = (timestamp_s // interval_seconds) * interval_seconds
-
-        # Convert back to milliseconds
-        floored_ms = floored_s * 1000
+        interval_ms = interval_seconds(interval) * 1000
+        return (timestamp_ms // interval_ms) * interval_ms
 
-        return floored_ms
+    def _on_candle(self, candle):
+        # Completed candles go to candle_callback, or are printed as before
+        if self.candle_callback:
+            self.candle_callback(candle)
+        else:
+            print(candle)
 
     def _collect_data(self):
-        self.ws = websocket.create_connection(
-            f"wss://ws.eodhistoricaldata.com/ws/{self._endpoint}?api_token={self._api_key}")
+        self.ws = websocket.create_connection(self._url)
 
         # Send the subscription message
         payload = {
@@ -113,172 +142,55 @@ class WebSocketClient:
         }
         self.ws.send(json.dumps(payload))
 
-        candle_1m = {}
-        candle_5m = {}
-        candle_1h = {}
-
         # Collect data until the stop event is set
         while not self.stop_event.is_set():
             self.message = self.ws.recv()
-            message_json = json.loads(self.message)
+            self.message_count += 1
+            if self.recorder is not None:
+                self.recorder.record(self.message)
+            message_json = decode(self.message)
             # print('message json', message_json)
             if self._store_data:
                 # self.data_list.append(self.message)
                 if self._endpoint == "us-quote" and not "message" in message_json:
                     symbol = message_json['s']
-                    self.most_recent_quote[symbol] = {
-                        'ask_price': message_json['ap'],
-                        'bid_price': message_json['bp'],
-                        'timestamp': message_json['t'],
-                        'ask_size': message_json['as'],
-                        'bid_size': message_json['bs'],
-                    }
-                    # print('new quote calling callback',
-                    #       self.most_recent_quote[symbol])
-
-                    if self.quote_callback:
-                        self.quote_callback(
-                            symbol, self.most_recent_quote[symbol])
+                    # One record per symbol, updated in place
+                    quote = self.most_recent_quote.get(symbol)
+                    if quote is None:
+                        quote = self.most_recent_quote[symbol] = Quote()
+                    quote.update(message_json)
+
+                    if self.dispatcher:
+                        # Queued quotes are read later on another thread, so they get a snapshot
+                        self.dispatcher.submit(symbol, quote.copy())
+                    elif self.quote_callback:
+                        self.quote_callback(symbol, quote)
 
             if self._display_stream:
                 print(self.message)
 
-            if self._display_candle_1m:
-
-                if "t" in message_json:
-                    candle_date = self._floor_to_nearest_interval(
-                        message_json["t"], "1 minute")
-
-                    if "t" in candle_1m and (candle_date != candle_1m["t"]):
-                        print(candle_1m)
-                        # self.candle_callback(candle_1m)
-                        # candle callback goes here will only get called when a trade in a new minute is made
-
-                        # New candle
-                        candle_1m = {}
-
-                    candle_1m["t"] = candle_date
-
-                if "s" in message_json:
-                    candle_1m["m"] = message_json["s"]
-                    candle_1m["g"] = 60
-
-                if "p" in message_json and "o" not in candle_1m:
-                    # Forming candle
-                    candle_1m["o"] = message_json["p"]
-                    candle_1m["h"] = message_json["p"]
-                    candle_1m["l"] = message_json["p"]
-                    candle_1m["c"] = message_json["p"]
-                    if "v" in message_json:
-                        candle_1m["v"] = float(message_json["v"])
-                elif "p" in message_json and "o" in candle_1m:
-                    # Update candle
-                    candle_1m["c"] = message_json["p"]
-
-                    if message_json["p"] > candle_1m["h"]:
-                        candle_1m["h"] = message_json["p"]
-
-                    if message_json["p"] < candle_1m["l"]:
-                        candle_1m["l"] = message_json["p"]
-
-                    # Sum volume
-                    candle_1m["v"] += float(message_json["v"])
-
-                # Uncomment this to see the candle forming
-                # print(candle_1m)
-
-            if self._display_candle_5m:
-                if "t" in message_json:
-                    candle_date = self._floor_to_nearest_interval(
-                        message_json["t"], "5 minutes")
-
-                    if "t" in candle_5m and (candle_date != candle_5m["t"]):
-                        print(candle_5m)
-
-                        # New candle
-                        candle_5m = {}
-
-                    candle_5m["t"] = candle_date
-
-                if "s" in message_json:
-                    candle_5m["m"] = message_json["s"]
-                    candle_5m["g"] = 60
-
-                if "p" in message_json and "o" not in candle_5m:
-                    # Forming candle
-                    candle_5m["o"] = message_json["p"]
-                    candle_5m["h"] = message_json["p"]
-                    candle_5m["l"] = message_json["p"]
-                    candle_5m["c"] = message_json["p"]
-                    if "q" in message_json:
-                        candle_5m["v"] = float(message_json["q"])
-                elif "p" in message_json and "o" in candle_5m:
-                    # Update candle
-                    candle_5m["c"] = message_json["p"]
-
-                    if message_json["p"] > candle_5m["h"]:
-                        candle_5m["h"] = message_json["p"]
-
-                    if message_json["p"] < candle_5m["l"]:
-                        candle_5m["l"] = message_json["p"]
-
-                    # Sum volume
-                    candle_5m["v"] += float(message_json["q"])
-
-                # Uncomment this to see the candle forming
-                # print(candle_5m)
-
-            if self._display_candle_1h:
-                if "t" in message_json:
-                    candle_date = self._floor_to_nearest_interval(
-                        message_json["t"], "1 hour")
-
-                    if "t" in candle_1h and (candle_date != candle_1h["t"]):
-                        print(candle_1h)
-
-                        # New candle
-                        candle_1h = {}
-
-                    candle_1h["t"] = candle_date
-
-                if "s" in message_json:
-                    candle_1h["m"] = message_json["s"]
-                    candle_1h["g"] = 60
-
-                if "p" in message_json and "o" not in candle_1h:
-                    # Forming candle
-                    candle_1h["o"] = message_json["p"]
-                    candle_1h["h"] = message_json["p"]
-                    candle_1h["l"] = message_json["p"]
-                    candle_1h["c"] = message_json["p"]
-                    if "q" in message_json:
-                        candle_1h["v"] = float(message_json["q"])
-                elif "p" in message_json and "o" in candle_1h:
-                    # Update candle
-                    candle_1h["c"] = message_json["p"]
-
-                    if message_json["p"] > candle_1h["h"]:
-                        candle_1h["h"] = message_json["p"]
-
-                    if message_json["p"] < candle_1h["l"]:
-                        candle_1h["l"] = message_json["p"]
-
-                    # Sum volume
-                    candle_1h["v"] += float(message_json["q"])
-
-                # Uncomment this to see the candle forming
-                # print(candle_1h)
+            # Trades carry a price; feed them to every candle interval of their symbol
+            if self.candles is not None and "p" in message_json and "t" in message_json and "s" in message_json:
+                self.candles.update(
+                    message_json["s"],
+                    message_json["t"],
+                    message_json["p"],
+                    float(message_json.get("v", message_json.get("q", 0))),
+                )
 
         # Close the WebSocket connection
         self.ws.close()
 
     def _keepalive(self, interval=30):
         if (self.ws is not None) and (hasattr(self.ws, "connected")):
-            while self.ws.connected:
+            while self.ws.connected and not self.stop_event.is_set():
                 self.ws.ping("keepalive")
-                time.sleep(interval)
+                # Wakes up as soon as stop() is called instead of sleeping out the interval
+                self.stop_event.wait(interval)
 
     def start(self):
+        if self.dispatcher:
+            self.dispatcher.start()
         self.thread = threading.Thread(target=self._collect_data)
         self.keepalive = threading.Thread(target=self._keepalive)
         self.thread.start()
@@ -288,12 +200,52 @@ class WebSocketClient:
         self.stop_event.set()
         self.thread.join()
         self.keepalive.join()
+        if self.dispatcher:
+            self.dispatcher.stop()
+
+    @property
+    def symbols(self):
+        return list(self._symbols)
+
+    def _send_action(self, action, symbols):
+        if self.ws is not None and getattr(self.ws, "connected", False):
+            self.ws.send(json.dumps({"action": action, "symbols": ",".join(symbols)}))
+
+    def subscribe(self, symbols):
+        """Add symbols on the open connection (or for the next connect)."""
+
+        symbols = [symbol for symbol in symbols if symbol not in self._symbols]
+        self._validate_symbols(symbols)
+        if len(self._symbols) + len(symbols) > MAX_SYMBOLS:
+            raise ValueError("Max symbol subscription count is 50!")
+        if not symbols:
+            return
+        self._symbols.extend(symbols)
+        if self.candles is not None:
+            for symbol in symbols:
+                self.candles.add_symbol(symbol)
+        self._send_action("subscribe", symbols)
+
+    def unsubscribe(self, symbols):
+        """Drop symbols from the open connection."""
+
+        symbols = [symbol for symbol in symbols if symbol in self._symbols]
+        if not symbols:
+            return
+        self._symbols = [symbol for symbol in self._symbols if symbol not in symbols]
+        for symbol in symbols:
+            self.most_recent_quote.pop(symbol, None)
+        self._send_action("unsubscribe", symbols)
 
     def get_data(self):
         return self.data_list
 
     def get_most_recent_quote(self, stock_ticker):
-        return self.most_recent_quote[stock_ticker]
+        # A snapshot, so the caller's copy does not change under it
+        return self.most_recent_quote[stock_ticker].copy()
+
+    def get_dispatch_metrics(self):
+        return self.dispatcher.metrics() if self.dispatcher else None
 
 
 if __name__ == "__main__":
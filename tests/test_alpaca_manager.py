@@ -0,0 +1,158 @@
+import asyncio
+import time
+from types import SimpleNamespace
+
+import pytest
+from alpaca.trading.enums import OrderSide, PositionSide
+
+from src.paper_trading import alpaca_manager
+from src.paper_trading.alpaca_manager import AlpacaManager
+
+
+class FakeTradingClient:
+    """Counts REST calls; answers from plain attributes."""
+
+    def __init__(self, *args, **kwargs):
+        self.calls = []
+        self.buying_power = "10000"
+        self.held = []
+
+    def get_account(self):
+        self.calls.append("account")
+        return SimpleNamespace(buying_power=self.buying_power, trading_blocked=False)
+
+    def get_clock(self):
+        self.calls.append("clock")
+        return SimpleNamespace(is_open=True, next_close=None, next_open=None)
+
+    def get_all_positions(self):
+        self.calls.append("positions")
+        return list(self.held)
+
+    def submit_order(self, order):
+        self.calls.append("submit")
+        return SimpleNamespace(id="1", symbol=order)
+
+
+class FakeTradingStream:
+    def __init__(self, *args, **kwargs):
+        pass
+
+
+@pytest.fixture
+def manager(monkeypatch):
+    monkeypatch.setattr(alpaca_manager, "TradingClient", FakeTradingClient)
+    monkeypatch.setattr(alpaca_manager, "TradingStream", FakeTradingStream)
+    manager = AlpacaManager(["AAA"], account_ttl=0.05, positions_ttl=0.05)
+    manager.api.calls.clear()
+    return manager
+
+
+def _fill(symbol, side, qty, price, position_qty, event="fill"):
+    return SimpleNamespace(event=event, order=SimpleNamespace(symbol=symbol, side=side),
+                           qty=qty, price=price, position_qty=position_qty)
+
+
+def _position(symbol, qty, side, entry):
+    return SimpleNamespace(symbol=symbol, qty=str(qty), side=side, avg_entry_price=str(entry))
+
+
+def test_entries_are_served_within_their_ttl_and_refetched_after(manager):
+    assert manager.get_buying_power() == 10000
+    manager.api.buying_power = "5000"
+    assert manager.get_buying_power() == 10000
+    assert manager.api.calls == []
+
+    time.sleep(0.06)
+    assert manager.get_buying_power() == 5000
+    assert manager.api.calls == ["account"]
+
+
+def test_invalidated_entries_are_refetched_on_the_next_read(manager):
+    manager.get_position_by_symbol("AAA")
+    manager.api.held = [_position("AAA", 5, PositionSide.LONG, 10)]
+    manager.invalidate("positions")
+    assert manager.get_position_by_symbol("AAA").qty == "5"
+    assert manager.api.calls == ["positions", "positions"]
+
+
+def test_expired_entries_are_served_stale_while_reconciling(manager):
+    manager.get_position_by_symbol("AAA")
+    manager._reconciling = True
+    time.sleep(0.06)
+    manager.get_position_by_symbol("AAA")
+    assert manager.api.calls == ["positions"]
+
+    # Invalidated is not just expired: it is refetched even while reconciling
+    manager.invalidate("positions")
+    manager.get_position_by_symbol("AAA")
+    assert manager.api.calls == ["positions", "positions"]
+
+
+def test_fills_update_the_cache_without_rest(manager):
+    manager.get_position_by_symbol("AAA")
+    manager.get_buying_power()
+    manager.api.calls.clear()
+
+    manager.apply_trade_update(_fill("AAA", OrderSide.BUY, None, None, None, event="new"))
+    manager.apply_trade_update(_fill("AAA", OrderSide.BUY, "10", "100", "10"))
+    position = manager.get_position_by_symbol("AAA")
+    assert (float(position.qty), position.side, float(position.avg_entry_price)) == (10, PositionSide.LONG, 100)
+    assert manager.get_buying_power() == 9000
+
+    manager.apply_trade_update(_fill("AAA", OrderSide.BUY, "10", "110", "20"))
+    assert float(manager.get_position_by_symbol("AAA").avg_entry_price) == 105
+    manager.apply_trade_update(_fill("AAA", OrderSide.SELL, "5", "120", "15"))
+    position = manager.get_position_by_symbol("AAA")
+    assert (float(position.qty), float(position.avg_entry_price)) == (15, 105)
+    assert manager.get_buying_power() == 10000 - 1000 - 1100 + 600
+
+    manager.apply_trade_update(_fill("AAA", OrderSide.SELL, "15", "120", "0"))
+    assert manager.get_position_by_symbol("AAA") is None
+    assert manager.api.calls == []
+
+
+def test_a_fill_can_flip_a_fetched_position(manager):
+    manager.api.held = [_position("AAA", 10, PositionSide.LONG, 100)]
+    manager.refresh("positions")
+
+    manager.apply_trade_update(_fill("AAA", OrderSide.SELL, "15", "90", "-5"))
+
+    position = manager.get_position_by_symbol("AAA")
+    assert (float(position.qty), position.side, float(position.avg_entry_price)) == (5, PositionSide.SHORT, 90)
+
+
+def test_a_refetch_drops_the_fill_adjustments(manager):
+    manager.get_buying_power()
+    manager.apply_trade_update(_fill("AAA", OrderSide.BUY, "10", "100", "10"))
+    assert manager.get_buying_power() == 9000
+    manager.api.buying_power = "8900"
+    manager.refresh("account")
+    assert manager.get_buying_power() == 8900
+
+
+def test_own_orders_invalidate_only_without_the_trade_updates_stream(manager):
+    manager.get_buying_power()
+    manager.submit_order("order")
+    manager.get_buying_power()
+    assert manager.api.calls == ["submit", "account"]
+
+    manager._trade_updates_thread = object()
+    manager.api.calls.clear()
+    manager.submit_order("order")
+    manager.get_buying_power()
+    assert manager.api.calls == ["submit"]
+
+
+def test_reconcile_refetches_expired_entries(manager):
+    manager.get_buying_power()
+    manager.api.calls.clear()
+
+    async def run():
+        task = asyncio.create_task(manager.reconcile(interval=0.01, trade_updates=False))
+        await asyncio.sleep(0.1)
+        task.cancel()
+
+    asyncio.run(run())
+    assert "account" in manager.api.calls
+    assert not manager._reconciling
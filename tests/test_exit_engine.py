@@ -0,0 +1,157 @@
+from alpaca.trading.enums import OrderSide, OrderStatus, TimeInForce
+
+from src.paper_trading.exit_engine import ExitEngine, ExitRules
+from src.paper_trading.simulated_broker import SimulatedBroker
+
+
+class Session:
+    """A SimulatedBroker and an ExitEngine fed the same quotes, one second apart."""
+
+    def __init__(self, close_timeout=30, **rules):
+        self.broker = SimulatedBroker(["AAA"], latency=0.5, slippage_bps=0, market_hours=False)
+        self.engine = ExitEngine(self.broker, ExitRules(**rules), close_timeout=close_timeout)
+        self.now = 0
+
+    def quote(self, bid, ask=None, bid_size=100, ask_size=100):
+        ask = bid + 0.02 if ask is None else ask
+        self.now += 1
+        self.broker.on_quote("AAA", bid, ask, self.now, bid_size, ask_size)
+        return self.engine.on_quote("AAA", {"bid_price": bid, "ask_price": ask,
+                                            "bid_size": bid_size, "ask_size": ask_size})
+
+    def tick(self, bid, ask=None):
+        """A quote for the broker only, e.g. to fill an exit the engine has placed."""
+        self.now += 1
+        self.broker.on_quote("AAA", bid, bid + 0.02 if ask is None else ask, self.now)
+
+    def order(self, qty, side):
+        return self.broker.submit_order(self.broker.create_market_order("AAA", qty, side, TimeInForce.DAY))
+
+    def open_orders(self):
+        return [order for order in self.broker.open_orders if order.symbol == "AAA"]
+
+
+def test_book_is_seeded_from_positions_then_follows_fills():
+    session = Session(take_profit_pct=1)
+    session.quote(100)
+    session.order(10, OrderSide.BUY)
+    session.quote(100)
+    session.engine.start()
+    assert session.engine.positions["AAA"].qty == 10
+    assert session.engine.positions["AAA"].entry_price == 100.02
+
+    session.order(10, OrderSide.BUY)
+    session.quote(101)
+    position = session.engine.positions["AAA"]
+    assert position.qty == 20
+    assert round(position.entry_price, 6) == 100.52
+
+    session.order(15, OrderSide.SELL)
+    session.quote(101)
+    assert session.engine.positions["AAA"].qty == 5
+    session.order(5, OrderSide.SELL)
+    session.quote(101)
+    assert "AAA" not in session.engine.positions
+
+
+def test_a_short_opened_by_a_fill_is_tracked_with_negative_qty():
+    session = Session(take_profit_pct=1)
+    session.engine.start()
+    session.quote(100)
+    session.order(10, OrderSide.SELL)
+    session.quote(100)
+    assert session.engine.positions["AAA"].qty == -10
+    assert not session.engine.positions["AAA"].is_long
+
+
+def test_one_exit_in_flight_per_position():
+    session = Session(take_profit_pct=.005)
+    session.engine.start()
+    session.quote(100)
+    session.order(10, OrderSide.BUY)
+    session.quote(100)
+
+    # The close is still in flight after the first quote; later quotes send nothing more
+    exit = session.engine.on_quote("AAA", {"bid_price": 101, "ask_price": 101.02, "bid_size": 100, "ask_size": 100})
+    assert exit["reason"] == "take_profit"
+    assert session.engine.on_quote("AAA", {"bid_price": 102, "ask_price": 102.02,
+                                           "bid_size": 100, "ask_size": 100}) is None
+    assert len(session.open_orders()) == 1
+    assert session.engine.positions["AAA"].closing is not None
+
+    session.quote(101)
+    assert "AAA" not in session.engine.positions
+    assert len(session.engine.exits) == 1
+
+
+def test_terminal_event_clears_the_claim():
+    session = Session(take_profit_pct=.005, partial_take_profit=True)
+    session.engine.start()
+    session.quote(100)
+    session.order(10, OrderSide.BUY)
+    session.quote(100)
+
+    # Only 4 are bid, so a resting limit sells 4 at the bid
+    exit = session.quote(101, bid_size=4)
+    assert exit["partial"] and exit["qty"] == 4
+    resting = session.open_orders()[0]
+    assert session.quote(100) is None
+
+    session.broker.cancel_order_by_id(resting.id)
+    position = session.engine.positions["AAA"]
+    assert position.closing is None and position.qty == 10
+    assert session.quote(101, bid_size=4)["qty"] == 4
+
+
+def test_partial_fill_keeps_the_rest_of_the_position():
+    session = Session(take_profit_pct=.005, partial_take_profit=True)
+    session.engine.start()
+    session.quote(100)
+    session.order(10, OrderSide.BUY)
+    session.quote(100)
+
+    session.quote(101, bid_size=4)
+    session.tick(101)
+    position = session.engine.positions["AAA"]
+    assert position.qty == 6
+    assert position.closing is None
+
+
+def test_timeout_cancels_a_live_exit_before_rearming():
+    session = Session(close_timeout=0, take_profit_pct=.005, partial_take_profit=True)
+    session.engine.start()
+    session.quote(100)
+    session.order(10, OrderSide.BUY)
+    session.quote(100)
+    session.quote(101, bid_size=4)
+    resting = session.open_orders()[0]
+    # Trade updates stop arriving
+    session.broker.trade_update_handlers.clear()
+
+    # Timed out with the order live (the bid is below its limit): it is
+    # canceled, and nothing new is sent
+    assert session.quote(100.8, bid_size=4) is None
+    assert resting.status == OrderStatus.CANCELED
+    assert session.open_orders() == []
+    assert session.engine.positions["AAA"].closing is not None
+
+    # The next check finds it canceled, releases the claim and exits again
+    exit = session.quote(100.8, bid_size=4)
+    assert exit["qty"] == 4
+    assert len(session.open_orders()) == 1
+
+
+def test_timeout_after_an_unreported_fill_rereads_the_position():
+    session = Session(close_timeout=0, take_profit_pct=.005)
+    session.engine.start()
+    session.quote(100)
+    session.order(10, OrderSide.BUY)
+    session.quote(100)
+    assert session.quote(101)["reason"] == "take_profit"
+    session.broker.trade_update_handlers.clear()
+
+    # The close fills, but the engine never hears about it
+    assert session.quote(101) is None
+    assert session.broker.get_positions() == []
+    assert "AAA" not in session.engine.positions
+    assert len(session.engine.exits) == 1
@@ -0,0 +1,162 @@
+import asyncio
+import json
+import os
+import threading
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pandas as pd
+import pytest
+
+from src.data_fetchers.eodhd.fetch_pipeline import (
+    FetchPipeline,
+    fetch_baseline_data,
+    fetch_bulk_data,
+    fetch_tick_data,
+    intraday_jobs,
+)
+from src.data_store.market_data_store import MarketDataStore
+
+
+class StubEODHD:
+    """Local HTTP server answering eod/ and intraday/ requests; ``fail`` maps a path to statuses to return first."""
+
+    def __init__(self):
+        self.requests = []
+        self.fail = {}
+        self.bulk_codes = ["AAA", "BBB"]
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                url = urllib.parse.urlparse(self.path)
+                stub.requests.append(url.path)
+                statuses = stub.fail.get(url.path)
+                if statuses:
+                    self.send_response(statuses.pop(0))
+                    self.send_header("Retry-After", "0")
+                    self.end_headers()
+                    return
+                ticker = url.path.rsplit("/", 1)[-1]
+                if url.path.startswith("/api/eod-bulk-last-day/"):
+                    date = urllib.parse.parse_qs(url.query)["date"][0]
+                    rows = [{"code": code, "date": date, "close": 2.0} for code in stub.bulk_codes]
+                else:
+                    rows = [{"date": "2024-01-02", "close": 1.0, "ticker": ticker}]
+                body = json.dumps(rows).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server.server_address[1]}/api"
+
+    def count(self, path):
+        return self.requests.count(path)
+
+
+@pytest.fixture
+def stub():
+    server = StubEODHD()
+    server.thread.start()
+    yield server
+    server.server.shutdown()
+    server.server.server_close()
+
+
+@pytest.fixture
+def store(tmp_path):
+    return MarketDataStore(str(tmp_path / "market_data"), str(tmp_path / "baseline_data"))
+
+
+@pytest.fixture
+def tickers_json(tmp_path):
+    path = tmp_path / "tickers.json"
+    path.write_text(json.dumps([{"Exchange": "NYSE", "Code": "AAA"}, {"Exchange": "NYSE", "Code": "BBB"}]))
+    return str(path)
+
+
+def test_retries_throttled_requests_and_writes_output(stub, tmp_path):
+    stub.fail["/api/intraday/AAA.US"] = [429, 503]
+    pipeline = FetchPipeline("token", base_url=stub.url, backoff=0.01)
+
+    summary = asyncio.run(pipeline.run(intraday_jobs(["AAA", "BBB"], str(tmp_path))))
+
+    assert summary == {"completed": 2, "skipped": 0, "failed": {}}
+    assert stub.count("/api/intraday/AAA.US") == 3
+    assert pd.read_csv(tmp_path / "AAA1m.csv")["ticker"].tolist() == ["AAA.US"]
+
+
+def test_resumes_after_a_failed_run_then_clears_the_checkpoint(stub, store, tickers_json):
+    stub.fail["/api/eod/BBB"] = [500, 500]
+    kwargs = {"base_url": stub.url, "backoff": 0.01, "max_retries": 1, "store": store}
+
+    first = asyncio.run(fetch_baseline_data("token", tickers_json, "2020-01-01", **kwargs))
+    assert first["completed"] == 1 and list(first["failed"]) == ["eod:NYSE:BBB"]
+
+    second = asyncio.run(fetch_baseline_data("token", tickers_json, "2020-01-01", **kwargs))
+    assert second == {"completed": 1, "skipped": 1, "failed": {}}
+    assert stub.count("/api/eod/AAA") == 1
+    assert not [name for name in os.listdir(store.root) if name.endswith(".checkpoint")]
+    assert store.read_exchange("NYSE", ["close"])["ticker"].tolist() == ["AAA", "BBB"]
+
+
+def test_baseline_lands_next_to_migrated_data(stub, store, tickers_json):
+    # NYSE is already on Parquet, so its CSVs would no longer be read
+    store.write_part("NYSE", pd.DataFrame({"ticker": ["CCC"], "date": ["2024-01-02"], "close": [3.0]}))
+
+    asyncio.run(fetch_baseline_data("token", tickers_json, "2020-01-01", base_url=stub.url, store=store))
+
+    data = store.read_exchange("NYSE", ["close"])
+    assert data["ticker"].tolist() == ["AAA", "BBB", "CCC"]
+    assert len(store._parts("NYSE")) == 1
+    assert store.last_dates("NYSE") == {"AAA": "2024-01-02", "BBB": "2024-01-02", "CCC": "2024-01-02"}
+
+
+def test_baseline_migrates_a_csv_exchange_first(stub, store, tickers_json, tmp_path):
+    os.makedirs(tmp_path / "baseline_data" / "NYSE")
+    pd.DataFrame({"date": ["2023-12-29"], "close": [3.0]}).to_csv(
+        tmp_path / "baseline_data" / "NYSE" / "CCC_baseline.csv", index=False)
+
+    asyncio.run(fetch_baseline_data("token", tickers_json, "2020-01-01", base_url=stub.url, store=store))
+
+    assert store.read_exchange("NYSE", ["close"])["ticker"].tolist() == ["AAA", "BBB", "CCC"]
+
+
+def test_bulk_update_appends_known_tickers(stub, store, tickers_json):
+    asyncio.run(fetch_baseline_data("token", tickers_json, "2020-01-01", base_url=stub.url, store=store))
+    stub.bulk_codes = ["AAA", "BBB", "ZZZ"]
+
+    summary = asyncio.run(fetch_bulk_data("token", ["NYSE"], "2024-01-03", base_url=stub.url, store=store))
+
+    assert summary == {"completed": 1, "skipped": 0, "failed": {}}
+    data = store.read_exchange("NYSE", ["close"])
+    assert data.groupby("ticker")["close"].last().to_dict() == {"AAA": 2.0, "BBB": 2.0}
+    assert store.last_dates("NYSE") == {"AAA": "2024-01-03", "BBB": "2024-01-03"}
+
+
+def test_an_interrupted_run_resumes_on_any_day_and_a_finished_one_starts_over(stub, tmp_path):
+    kwargs = {"base_url": stub.url, "backoff": 0.01, "max_retries": 0}
+    checkpoint = tmp_path / ".intraday_1m_None_None.checkpoint"
+    stub.fail["/api/intraday/BBB.US"] = [503]
+
+    first = asyncio.run(fetch_tick_data("token", ["AAA", "BBB"], str(tmp_path), **kwargs))
+    assert list(first["failed"]) == ["intraday:1m:BBB:None:None"]
+    # Named after the job parameters only, so a rerun the next day still finds it
+    assert checkpoint.read_text() == "intraday:1m:AAA:None:None\n"
+
+    second = asyncio.run(fetch_tick_data("token", ["AAA", "BBB"], str(tmp_path), **kwargs))
+    assert second == {"completed": 1, "skipped": 1, "failed": {}}
+    assert not checkpoint.exists()
+
+    third = asyncio.run(fetch_tick_data("token", ["AAA", "BBB"], str(tmp_path), **kwargs))
+    assert third["completed"] == 2
+    assert stub.count("/api/intraday/AAA.US") == 2
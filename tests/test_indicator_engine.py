@@ -0,0 +1,113 @@
+import datetime
+from zoneinfo import ZoneInfo
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.paper_trading.helpers.indicator_engine import IndicatorEngine
+from src.paper_trading.helpers.rsi_crossover_helpers import RSI_Calculator
+from src.paper_trading.helpers.vwap_helper import VWAPCalculator
+
+SYMBOLS = ["AAA", "BBB", "CCC", "DDD"]
+
+
+def _engine():
+    engine = IndicatorEngine(SYMBOLS, session_start="09:30")
+    engine.add_rsi("rsi", period=5)
+    engine.add_rsi("rsi_wilder", period=5, mode="wilder")
+    engine.add_rsi("rsi_session", period=3, mode="ema", session_reset=True)
+    engine.add_bollinger("bands", period=4)
+    engine.add_vwap()
+    return engine
+
+
+@pytest.fixture
+def ticks():
+    # Random ticks for random symbols over two sessions
+    rng = np.random.default_rng(3)
+    start = datetime.datetime(2024, 5, 1, 15, 0, tzinfo=datetime.timezone.utc)
+    times = sorted(start + datetime.timedelta(minutes=int(m)) for m in rng.integers(0, 2 * 24 * 60, 400))
+    return [(SYMBOLS[rng.integers(len(SYMBOLS))], 100 + rng.normal() * 5,
+             float(rng.integers(1, 500)), time) for time in times]
+
+
+def test_update_matches_update_many(ticks):
+    single, many = _engine(), _engine()
+    for symbol, price, volume, time in ticks:
+        single.update(symbol, price, volume, time)
+        prices = np.full(len(SYMBOLS), np.nan)
+        volumes = np.zeros(len(SYMBOLS))
+        prices[SYMBOLS.index(symbol)] = price
+        volumes[SYMBOLS.index(symbol)] = volume
+        many.update_many(prices, volumes, time)
+
+    assert single.table().notna().any().all()
+    pd.testing.assert_frame_equal(single.table(), many.table())
+    np.testing.assert_array_equal(single.session, many.session)
+    np.testing.assert_array_equal(single.last_timestamp, many.last_timestamp)
+
+
+def test_update_touches_only_its_symbol():
+    engine = _engine()
+    for price in range(10):
+        engine.update("AAA", 100.0 + price, 10.0, 1714575600000 + price)
+    table = engine.table()
+    assert table.loc["AAA"].notna().all()
+    assert table.drop("AAA").isna().all().all()
+
+
+def test_update_skips_nan_price():
+    engine = _engine()
+    engine.update("AAA", np.nan, 10.0, 1714575600000)
+    assert engine.last_timestamp[0] == -1
+    assert engine.table().isna().all().all()
+
+
+def test_session_reset_at_session_start(ticks):
+    # Ticks straddling 09:30 New York (13:30 UTC) on both days, on top of the random ones
+    boundary = [datetime.datetime(2024, 5, day, 13, 30, tzinfo=datetime.timezone.utc)
+                + datetime.timedelta(milliseconds=offset) for day in (1, 2) for offset in (-1, 0, 1)]
+    extra = [("AAA", 100 + index, 10.0 + index, time) for index, time in enumerate(boundary)]
+    ticks = sorted(ticks + extra, key=lambda tick: tick[3])
+
+    engine = _engine()
+    new_york = ZoneInfo("America/New_York")
+    references = {}
+    for symbol, price, volume, time in ticks:
+        engine.update(symbol, price, volume, time)
+
+        # Per-session reference: fresh calculators whenever the local day shifted by 09:30 changes
+        session = (time.astimezone(new_york) - datetime.timedelta(hours=9, minutes=30)).date()
+        key, vwap, rsi = references.get(symbol, (None, None, None))
+        if key != session:
+            vwap, rsi = VWAPCalculator(), RSI_Calculator(period=3, mode="ema")
+            references[symbol] = (session, vwap, rsi)
+        vwap.add_tick(price, volume)
+        rsi.add_price(price)
+
+        assert engine.get(symbol, "vwap") == pytest.approx(vwap.get_vwap())
+        expected_rsi = rsi.get_rsi() if rsi.avg_gain is not None else None
+        assert engine.get(symbol, "rsi_session") == pytest.approx(expected_rsi)
+
+    # The tick one millisecond before 09:30 belongs to the previous session, the 09:30 tick starts a new one
+    day_one = [engine.session_of(engine._to_ms(time)) for time in boundary[:3]]
+    assert day_one[0] != day_one[1] == day_one[2]
+
+
+def test_snapshot_restore_matches_uninterrupted_run(ticks, tmp_path):
+    uninterrupted, first = _engine(), _engine()
+    half = len(ticks) // 2
+    for symbol, price, volume, time in ticks[:half]:
+        uninterrupted.update(symbol, price, volume, time)
+        first.update(symbol, price, volume, time)
+    first.snapshot(tmp_path / "engine.npz")
+
+    restored = _engine().restore(tmp_path / "engine.npz")
+    for symbol, price, volume, time in ticks[half:]:
+        uninterrupted.update(symbol, price, volume, time)
+        restored.update(symbol, price, volume, time)
+
+    pd.testing.assert_frame_equal(uninterrupted.table(), restored.table())
+    np.testing.assert_array_equal(uninterrupted.session, restored.session)
+    np.testing.assert_array_equal(uninterrupted.last_timestamp, restored.last_timestamp)
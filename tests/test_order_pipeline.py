@@ -0,0 +1,71 @@
+from alpaca.trading.enums import OrderSide, TimeInForce
+from alpaca.trading.requests import MarketOrderRequest
+
+from src.paper_trading.order_pipeline import MockBroker, OrderPipeline
+
+SYMBOLS = ["AAA", "BBB", "CCC", "DDD", "EEE", "FFF"]
+
+
+def _orders(symbols, side=OrderSide.BUY):
+    return [MarketOrderRequest(symbol=symbol, notional=100, side=side, time_in_force=TimeInForce.DAY)
+            for symbol in symbols]
+
+
+def _pipeline(broker, **kwargs):
+    return OrderPipeline(broker, concurrency=4, backoff=0.001, timeout=5, **kwargs)
+
+
+def test_client_order_ids_come_from_symbol_and_side():
+    orders = _orders(["AAA", "BBB"]) + _orders(["AAA"], OrderSide.SELL) + _orders(["AAA"])
+    results = _pipeline(MockBroker(latency=0)).submit_batch(orders, batch_id="batch")
+    assert list(results["client_order_id"]) == ["batch-AAA-buy", "batch-BBB-buy", "batch-AAA-sell", "batch-AAA-buy-2"]
+    assert (results["status"] == "acked").all()
+
+
+def test_retries_place_each_order_once():
+    broker = MockBroker(latency=0.001, failure_rate=0.2, throttle_rate=0.2, lost_ack_rate=0.2, seed=1)
+    results = _pipeline(broker, max_retries=20, orders_per_minute=6000).submit_batch(_orders(SYMBOLS * 5), batch_id="batch")
+
+    assert results["status"].isin(["acked", "duplicate"]).all()
+    assert (results["attempts"] > 1).any()
+    assert broker.calls > len(results)
+    # One broker order per request, and every row points at it
+    assert len(broker.orders) == len(results)
+    for row in results.itertuples():
+        assert row.order_id == str(broker.orders[row.client_order_id].id)
+
+
+def test_lost_ack_is_resolved_by_lookup():
+    broker = MockBroker(latency=0, lost_ack_rate=1.0)
+    results = _pipeline(broker).submit_batch(_orders(["AAA"]), batch_id="batch")
+    row = results.iloc[0]
+    assert row["status"] == "duplicate"
+    assert row["attempts"] == 2
+    assert row["order_id"] == str(broker.orders["batch-AAA-buy"].id)
+
+
+def test_rerun_with_changed_list_places_nothing_twice():
+    broker = MockBroker(latency=0)
+    first = _pipeline(broker).submit_batch(_orders(SYMBOLS), batch_id="batch")
+    placed = dict(broker.orders)
+
+    # The rerun's list is reordered, drops one symbol and adds a new one
+    rerun = _pipeline(broker).submit_batch(_orders(["GGG"] + SYMBOLS[:0:-1]), batch_id="batch")
+
+    assert (first["status"] == "acked").all()
+    assert list(rerun["status"]) == ["acked"] + ["duplicate"] * (len(SYMBOLS) - 1)
+    assert len(broker.orders) == len(SYMBOLS) + 1
+    for row in rerun.iloc[1:].itertuples():
+        assert row.order_id == str(placed[row.client_order_id].id)
+
+
+def test_non_retryable_error_is_rejected():
+    class Rejecting(MockBroker):
+        def submit_order(self, order):
+            self.calls += 1
+            raise ValueError("insufficient buying power")
+
+    rejecting = Rejecting(latency=0)
+    results = _pipeline(rejecting).submit_batch(_orders(["AAA"]), batch_id="batch")
+    assert results.iloc[0]["status"] == "rejected"
+    assert rejecting.calls == 1
@@ -0,0 +1,69 @@
+import asyncio
+import json
+
+import pytest
+
+from src.websockets.record_replay import MessageRecorder, ReplayServer, read_log
+from src.websockets.websocket_class.async_client import AsyncWebSocketClient
+
+
+@pytest.fixture
+def log_path(tmp_path):
+    path = str(tmp_path / "session.log")
+    with MessageRecorder(path) as recorder:
+        for index, symbol in enumerate(["AAA", "BBB", "AAA", "CCC"]):
+            message = {"s": symbol, "ap": 10 + index, "bp": 9 + index, "as": 1, "bs": 1, "t": index}
+            recorder.record(json.dumps(message), timestamp_ns=index * 100_000_000)
+    return path
+
+
+async def _collect(url, symbols, wait):
+    client = AsyncWebSocketClient("token", "us-quote", symbols, url=url, reconnect_delay=0.01)
+    received = []
+
+    async def consume():
+        async for message in client:
+            received.append((message["s"], message["t"]))
+
+    task = asyncio.create_task(consume())
+    await asyncio.sleep(wait)
+    await client.close()
+    task.cancel()
+    await asyncio.gather(task, return_exceptions=True)
+    return received, client
+
+
+def test_log_round_trips(log_path):
+    records = list(read_log(log_path))
+    assert [timestamp for timestamp, _ in records] == [0, 100_000_000, 200_000_000, 300_000_000]
+    assert json.loads(records[3][1])["s"] == "CCC"
+
+
+def test_replay_sends_subscribed_symbols_once(log_path):
+    async def run():
+        server = await ReplayServer(log_path, speed=None, port=0).start()
+        try:
+            return await _collect(server.url, ["AAA", "CCC"], wait=0.5)
+        finally:
+            await server.stop()
+
+    received, client = asyncio.run(run())
+    # The connection stays open after the log, so the client neither reconnects nor sees a repeat
+    assert received == [("AAA", 0), ("AAA", 2), ("CCC", 3)]
+    assert client.reconnects == 0
+
+
+def test_replay_keeps_recorded_spacing(log_path):
+    async def run():
+        server = await ReplayServer(log_path, speed=1.0, port=0).start()
+        try:
+            # The log spans 300ms; 100ms in only the first messages have been sent
+            early, _ = await _collect(server.url, ["AAA", "BBB", "CCC"], wait=0.1)
+            full, _ = await _collect(server.url, ["AAA", "BBB", "CCC"], wait=0.6)
+            return early, full
+        finally:
+            await server.stop()
+
+    early, full = asyncio.run(run())
+    assert 0 < len(early) < 4
+    assert len(full) == 4
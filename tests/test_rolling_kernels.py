@@ -0,0 +1,59 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.utils.rolling_kernels import (
+    rolling_argmax,
+    rolling_argmin,
+    rolling_decay_linear,
+    rolling_product,
+    rolling_rank,
+)
+
+
+# The pandas rolling().apply() implementations the kernels replaced
+def _pandas_decay_linear(x, d):
+    weights = np.arange(1, d + 1)
+    weights = weights / np.sum(weights)
+    return pd.Series(x).rolling(window=d).apply(lambda w: np.sum(weights * w), raw=True)
+
+
+PANDAS = {
+    rolling_argmax: lambda x, d: pd.Series(x).rolling(window=d).apply(np.argmax, raw=True),
+    rolling_argmin: lambda x, d: pd.Series(x).rolling(window=d).apply(np.argmin, raw=True),
+    rolling_rank: lambda x, d: pd.Series(x).rolling(window=d).apply(
+        lambda w: pd.Series(w).rank(pct=True).iloc[-1], raw=True),
+    rolling_product: lambda x, d: pd.Series(x).rolling(window=d).apply(np.prod, raw=True),
+    rolling_decay_linear: _pandas_decay_linear,
+}
+
+
+def _random_series(seed, n=300, nan_rate=0.05):
+    rng = np.random.default_rng(seed)
+    x = rng.normal(size=n)
+    # Repeated values exercise tie handling in argmax/argmin/rank
+    x[rng.random(n) < 0.1] = 0.5
+    x[rng.random(n) < nan_rate] = np.nan
+    return x
+
+
+@pytest.mark.parametrize("kernel", list(PANDAS), ids=lambda kernel: kernel.__name__)
+@pytest.mark.parametrize("d", [1, 3, 10])
+def test_kernel_matches_pandas(kernel, d):
+    x = _random_series(d)
+    expected = PANDAS[kernel](x, d).to_numpy()
+    np.testing.assert_allclose(kernel(x, d), expected, rtol=1e-12, atol=1e-12, equal_nan=True)
+
+
+@pytest.mark.parametrize("kernel", list(PANDAS), ids=lambda kernel: kernel.__name__)
+def test_kernel_on_panel_matches_each_column(kernel):
+    panel = np.column_stack([_random_series(seed) for seed in range(4)])
+    result = kernel(panel, 5)
+    for column in range(panel.shape[1]):
+        expected = PANDAS[kernel](panel[:, column], 5).to_numpy()
+        np.testing.assert_allclose(result[:, column], expected, rtol=1e-12, atol=1e-12, equal_nan=True)
+
+
+@pytest.mark.parametrize("kernel", list(PANDAS), ids=lambda kernel: kernel.__name__)
+def test_series_shorter_than_window_is_all_nan(kernel):
+    assert np.isnan(kernel(np.arange(3.0), 5)).all()
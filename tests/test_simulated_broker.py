@@ -0,0 +1,152 @@
+import pytest
+from alpaca.trading.enums import OrderSide, OrderStatus, OrderType, TimeInForce
+from alpaca.trading.requests import StopOrderRequest
+
+from src.paper_trading.simulated_broker import SimulatedBroker
+
+
+def _broker(**kwargs):
+    kwargs = {"latency": 0.5, "slippage_bps": 0, "market_hours": False, **kwargs}
+    return SimulatedBroker(["AAA"], **kwargs)
+
+
+def _market(broker, qty, side):
+    return broker.submit_order(broker.create_market_order("AAA", qty, side, TimeInForce.DAY))
+
+
+def _limit(broker, qty, side, limit_price, **legs):
+    return broker.submit_order(broker.create_limit_order("AAA", qty, side, TimeInForce.DAY, limit_price, **legs))
+
+
+def _open_long(broker, qty, price, now):
+    _market(broker, qty, OrderSide.BUY)
+    broker.on_quote("AAA", price, price, now)
+
+
+def test_limit_orders_fill_only_once_the_price_reaches_the_limit():
+    broker = _broker()
+    broker.on_quote("AAA", 100.5, 101, 1)
+    order = _limit(broker, 10, OrderSide.BUY, 100)
+
+    broker.on_quote("AAA", 100.2, 100.4, 2)
+    assert order.status == OrderStatus.ACCEPTED
+    # Fills at the better of the limit and the ask
+    broker.on_quote("AAA", 99.3, 99.5, 3)
+    assert order.status == OrderStatus.FILLED
+    assert order.filled_avg_price == 99.5
+
+    sell = _limit(broker, 10, OrderSide.SELL, 102)
+    # A bar whose high reaches the limit fills it at the limit
+    broker.on_bar("AAA", 101, 102.5, 100.5, 102, 4)
+    assert sell.status == OrderStatus.FILLED
+    assert sell.filled_avg_price == 102
+    assert broker.get_positions() == []
+
+
+def test_stops_trigger_on_the_cross_and_fill_with_slippage():
+    broker = _broker(slippage_bps=10)
+    _open_long(broker, 10, 100, 1)
+    stop = broker.submit_order(broker.create_oco_order("AAA", 10, TimeInForce.DAY,
+                                                       take_profit={"limit_price": 110},
+                                                       stop_loss={"stop_price": 95})).legs[0]
+    assert stop.type == OrderType.STOP
+
+    broker.on_quote("AAA", 96, 96.1, 2)
+    assert stop.status == OrderStatus.ACCEPTED
+    # Gapped through the stop: fills at the bid, less slippage
+    broker.on_quote("AAA", 94, 94.1, 3)
+    assert stop.status == OrderStatus.FILLED
+    assert stop.filled_avg_price == pytest.approx(94 * (1 - 0.001))
+
+    buy_stop = broker.submit_order(StopOrderRequest(symbol="AAA", qty=5, side=OrderSide.BUY,
+                                                    time_in_force=TimeInForce.DAY, stop_price=97))
+    # Bar high crosses the stop but it opened below: fills at the stop plus slippage
+    broker.on_bar("AAA", 95, 98, 94.5, 97.5, 4)
+    assert buy_stop.filled_avg_price == pytest.approx(97 * (1 + 0.001))
+
+
+def test_orders_wait_for_their_latency_before_filling():
+    broker = _broker()
+    broker.on_quote("AAA", 100, 100, 10)
+    order = _market(broker, 10, OrderSide.BUY)
+    assert order.arrives_at == 10.5
+
+    broker.on_quote("AAA", 101, 101, 10.4)
+    assert order.status == OrderStatus.ACCEPTED
+    broker.on_quote("AAA", 102, 102, 10.5)
+    assert order.status == OrderStatus.FILLED
+    assert order.filled_avg_price == 102
+    assert broker.fills[-1]["latency"] == 0.5
+
+
+def test_bracket_legs_open_on_the_entry_fill_and_cancel_each_other():
+    broker = _broker()
+    broker.on_quote("AAA", 100, 100, 1)
+    entry = _limit(broker, 10, OrderSide.BUY, 100, take_profit={"limit_price": 103},
+                   stop_loss={"stop_price": 98})
+    # No legs until the entry fills
+    assert broker.open_orders == [entry]
+
+    broker.on_quote("AAA", 99.9, 100, 2)
+    assert entry.status == OrderStatus.FILLED
+    take_profit, stop_loss = entry.legs
+    assert (take_profit.type, take_profit.limit_price, take_profit.side) == (OrderType.LIMIT, 103, OrderSide.SELL)
+    assert (stop_loss.type, stop_loss.stop_price, stop_loss.side) == (OrderType.STOP, 98, OrderSide.SELL)
+    assert float(take_profit.qty) == 10
+    assert broker.open_orders == [take_profit, stop_loss]
+
+    broker.on_quote("AAA", 103.2, 103.3, 3)
+    assert take_profit.status == OrderStatus.FILLED
+    assert stop_loss.status == OrderStatus.CANCELED
+    assert broker.open_orders == []
+    assert broker.get_positions() == []
+
+
+def test_oco_stop_fill_cancels_the_take_profit():
+    broker = _broker()
+    _open_long(broker, 10, 100, 1)
+    take_profit = broker.submit_order(broker.create_oco_order("AAA", 10, TimeInForce.DAY,
+                                                              take_profit={"limit_price": 105},
+                                                              stop_loss={"stop_price": 97}))
+    stop_loss = take_profit.legs[0]
+    broker.on_quote("AAA", 96.5, 96.6, 2)
+    assert stop_loss.status == OrderStatus.FILLED
+    assert take_profit.status == OrderStatus.CANCELED
+    assert broker.get_positions() == []
+
+
+def test_orders_beyond_buying_power_are_rejected():
+    broker = _broker(cash=1_000)
+    broker.on_quote("AAA", 100, 100, 1)
+    rejected = _market(broker, 20, OrderSide.BUY)
+    broker.on_quote("AAA", 100, 100, 2)
+    assert rejected.status == OrderStatus.REJECTED
+    assert broker.fills == []
+    assert broker.get_positions() == []
+
+    _market(broker, 5, OrderSide.BUY)
+    broker.on_quote("AAA", 100, 100, 3)
+    assert float(broker.get_position_by_symbol("AAA").qty) == 5
+
+
+def test_exit_legs_that_would_open_a_position_need_buying_power():
+    broker = _broker(cash=1_000)
+    _open_long(broker, 5, 100, 1)
+    # Selling 20 against a long of 5 would open a short of 15
+    take_profit = broker.submit_order(broker.create_oco_order("AAA", 20, TimeInForce.DAY,
+                                                              take_profit={"limit_price": 101},
+                                                              stop_loss={"stop_price": 90}))
+    broker.on_quote("AAA", 101, 101.1, 2)
+    assert take_profit.status == OrderStatus.REJECTED
+    assert float(broker.get_position_by_symbol("AAA").qty) == 5
+
+    # A leg that only reduces the position fills with no buying power left
+    _market(broker, 4, OrderSide.BUY)
+    broker.on_quote("AAA", 100, 100, 3)
+    assert broker.get_buying_power() == pytest.approx(100)
+    exit_leg = broker.submit_order(broker.create_oco_order("AAA", 9, TimeInForce.DAY,
+                                                           take_profit={"limit_price": 105},
+                                                           stop_loss={"stop_price": 90}))
+    broker.on_quote("AAA", 105, 105.1, 4)
+    assert exit_leg.status == OrderStatus.FILLED
+    assert broker.get_positions() == []
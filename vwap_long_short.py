@@ -1,5 +1,6 @@
 from src.websockets.eodhd_websocket import EodHd_Websocket
 from src.paper_trading.alpaca_manager import AlpacaManager
+from src.paper_trading.helpers.indicator_engine import IndicatorEngine
 from alpaca.data.live import StockDataStream
 from alpaca.trading.requests import GetAssetsRequest, MarketOrderRequest, LimitOrderRequest, StopOrderRequest, StopLimitOrderRequest, GetOrdersRequest, ClosePositionRequest
 from alpaca.trading.enums import OrderSide, TimeInForce, OrderClass
@@ -14,6 +15,8 @@ class VWAPTradingStrategy:
                                  None for stock in stock_list}  # 'long', 'short', or None
         self.quotes = {stock: None
                        for stock in stock_list}
+        # Session VWAP, built from each bar's vwap and volume and reset every trading day
+        self.indicators = IndicatorEngine(stock_list).add_vwap()
         self.api_key = self.ALPACA_API_KEY
         self.api_secret = self.ALPACA_SECRET_KEY
         self.alpaca_manager = AlpacaManager(self.stock_list)
@@ -41,8 +44,10 @@ class VWAPTradingStrategy:
         Handle a new minute bar.
         :param minute_bar: A dictionary with 'average_price' and 'volume'.
         """
-        vwap = minute_bar.vwap
         symbol = minute_bar.symbol
+        self.indicators.update(symbol, minute_bar.vwap,
+                               minute_bar.volume, minute_bar.timestamp)
+        vwap = self.indicators.get(symbol, 'vwap')
         current_price = minute_bar.close
         current_ask_price = self.quotes[minute_bar.symbol]['ask_price']
         current_bid_price = self.quotes[minute_bar.symbol]['bid_price']